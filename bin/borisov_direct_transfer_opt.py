@@ -1,24 +1,37 @@
 from astropy import units as u
-from astropy.time import Time
-import matplotlib.pyplot as plt
 
 from poliastro.frames import Planes
 from poliastro.bodies import Sun
 from poliastro.twobody import Orbit
-from poliastro.twobody.sampling import EpochsArray
 from poliastro.maneuver import Maneuver
-from poliastro.ephem import Ephem
-from poliastro.plotting.misc import plot_solar_system
 from poliastro.util import time_range
 
+from tfm.ephem import load_ephem
+from tfm.kepler import transfer_arcs
+from tfm.optimize import optimize_transfer
+from tfm.porkchop import solve_porkchop
+from tfm.views import MultiViewPlotter
+
 
 # Build the ephemerides
-earth_ephem = Ephem.from_csv("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
-borisov_ephem = Ephem.from_csv("bin/ephem/borisov.csv", plane=Planes.EARTH_ECLIPTIC)
+earth_ephem = load_ephem("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
+borisov_ephem = load_ephem("bin/ephem/borisov.csv", plane=Planes.EARTH_ECLIPTIC)
+
+# Locate the lowest energy transfer, refining the best cells of a coarse porkchop
+launch_span = time_range("2018-04-01", end="2018-10-01", num_values=20, scale="tdb")
+arrival_span = time_range("2019-09-01", end="2020-01-01", num_values=20, scale="tdb")
+escape_velocity = 11.2 * u.km / u.s
+porkchop = solve_porkchop(
+    earth_ephem, borisov_ephem, launch_span, arrival_span, escape_velocity=escape_velocity
+)
+optimum, *_ = optimize_transfer(
+    earth_ephem, borisov_ephem, porkchop, objective="c3_launch", escape_velocity=escape_velocity
+)
+print(f"Minimum energy: {optimum.value:.4f} ({optimum.evaluations} Lambert solves)")
 
 # Define the desired times
-at_launch = Time("2018-07-11", scale="tdb")
-at_arrival = Time("2019-10-27", scale="tdb")
+at_launch = optimum.launch
+at_arrival = optimum.arrival
 epochs = time_range(at_launch, end=at_arrival, num_values=1000, scale="tdb")
 
 # Build associated orbits
@@ -32,10 +45,9 @@ print(f"Total time: {lambert.get_total_time().to(u.day)}")
 for _, dv in lambert.impulses:
     print(f"Impulses: {dv.to(u.km / u.s)}")
     print(f"Cost: {(sum(impulse ** 2 for impulse in dv) ** 0.5).to(u.km/u.s)}")
-transfer, _ = earth.apply_maneuver(lambert, intermediate=True)
 
-# Model the transfer orbit as an ephem
-transfer_ephem = transfer.to_ephem(strategy=EpochsArray(epochs))
+# Sample the transfer orbit at the same epochs as the target
+transfer = transfer_arcs(earth_ephem, borisov_ephem, at_launch, at_arrival, num=len(epochs))
 
 view_and_limits = {
     "xy": [[-3, 3], [-3, 3]],
@@ -43,19 +55,10 @@ view_and_limits = {
     "yz": [[-0.2, 3], [-0.2, 1]],
 }
 
-for view, (xlim, ylim) in view_and_limits.items():
-    plotter = plot_solar_system(epoch=at_launch, outer=False,
-                                length_scale_units=u.AU,
-                                plane=Planes.EARTH_ECLIPTIC, view=view)
-    plotter.plot_ephem(transfer_ephem, label="Transfer orbit", color="red")
-    oumuamua_lines, _ = plotter.plot_coordinates(borisov_ephem.sample(epochs),
-                                                 position=borisov_ephem.rv(at_arrival)[0],
-                                                 label="2I/Borisov at arrival", color="black")
-    oumuamua_lines.set_linestyle("--")
-
-    plotter.backend.ax.set_xlim(xlim)
-    plotter.backend.ax.set_ylim(ylim)
-    if view != "xy":
-        plotter.backend.ax.legend().remove()
-
-    plt.savefig(f"fig/static/borisov/direct-optimum-transfer-{view}.png", bbox_inches="tight")
+# Sample the planets, the transfer and 2I/Borisov once for all the views
+plotter = MultiViewPlotter(plane=Planes.EARTH_ECLIPTIC, length_scale_units=u.AU)
+plotter.plot_solar_system(epoch=at_launch, outer=False)
+plotter.plot_arcs(transfer, label="Transfer orbit", color="red")
+plotter.plot_coordinates(borisov_ephem.sample(epochs), position=borisov_ephem.rv(at_arrival)[0],
+                         label="2I/Borisov at arrival", color="black", linestyle="--")
+plotter.savefig("fig/static/borisov/direct-optimum-transfer-{view}.png", view_and_limits)
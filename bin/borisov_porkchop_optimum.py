@@ -2,15 +2,18 @@ from astropy import units as u
 from matplotlib import pyplot as plt
 import numpy as np
 
-from poliastro.ephem import Ephem
 from poliastro.frames import Planes
-from poliastro.plotting.porkchop import PorkchopPlotter
 from poliastro.util import time_range
 from poliastro.twobody import Orbit
-from poliastro.plotting.misc import plot_solar_system
 from poliastro.maneuver import Maneuver
 from poliastro.bodies import Sun
-from poliastro.twobody.sampling import EpochsArray
+
+from tfm.cache import PorkchopCache
+from tfm.ephem import load_ephem, load_ephem_window
+from tfm.kepler import transfer_arcs
+from tfm.porkchop import PorkchopPlotter
+from tfm.views import MultiViewPlotter
+from tfm.writer import FigureWriter
 
 
 def solve_porkchop(prograde=True):
@@ -20,18 +23,22 @@ def solve_porkchop(prograde=True):
     arrival_span = time_range("2019-09-01", end="2020-01-01", num_values=N, scale="tdb")
 
     # Load the ephemerides for the Earth and 'Oumuamua
-    earth = Ephem.from_csv("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
-    borisov = Ephem.from_csv("bin/ephem/borisov.csv", plane=Planes.EARTH_ECLIPTIC)
+    earth = load_ephem_window("bin/ephem/earth.csv", launch_span, plane=Planes.EARTH_ECLIPTIC)
+    borisov = load_ephem_window("bin/ephem/borisov.csv", arrival_span, plane=Planes.EARTH_ECLIPTIC)
 
     # Compute the escape velocity
     escape_velocity = 11.2 * u.km / u.s
 
-    # Compute the porkchop plot
+    # Compute the porkchop plot, reusing the grids of previous runs
     return PorkchopPlotter(
-        earth, borisov, launch_span, arrival_span, prograde=prograde, escape_velocity=escape_velocity
+        earth, borisov, launch_span, arrival_span, prograde=prograde, escape_velocity=escape_velocity,
+        cache=PorkchopCache(),
     )
 
 def main():
+    # Save the figures in the background while the next ones are computed
+    writer = FigureWriter()
+
     # Compute the porkchop plot
     porkchop = solve_porkchop(prograde=True)
 
@@ -61,7 +68,7 @@ def main():
             porkchop.arrival_date_at_c3_launch_min.to_datetime(),
             color="red", marker="x", mew=2, label="Lowest energy transfer"
     )
-    plt.savefig(f"fig/static/borisov/direct-detailed-porkchop-tof.png", bbox_inches="tight")
+    writer.savefig(f"fig/static/borisov/direct-detailed-porkchop-tof.png", bbox_inches="tight")
 
     # Get launch energy and arrival velocity
     _, ax = plt.subplots(1, 1, figsize=(16, 8))
@@ -85,12 +92,12 @@ def main():
             porkchop.arrival_date_at_c3_launch_min.to_datetime(),
             color="red", marker="x", mew=2, label="Lowest energy transfer"
     )
-    plt.savefig(f"fig/static/borisov/direct-detailed-porkchop-avl.png", bbox_inches="tight")
+    writer.savefig(f"fig/static/borisov/direct-detailed-porkchop-avl.png", bbox_inches="tight")
 
 
     # Build the ephemerides
-    earth_ephem = Ephem.from_csv("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
-    borisov_ephem = Ephem.from_csv("bin/ephem/borisov.csv", plane=Planes.EARTH_ECLIPTIC)
+    earth_ephem = load_ephem("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
+    borisov_ephem = load_ephem("bin/ephem/borisov.csv", plane=Planes.EARTH_ECLIPTIC)
 
     # Define the desired times
     at_launch = porkchop.launch_date_at_c3_launch_min
@@ -108,10 +115,9 @@ def main():
     for _, dv in lambert.impulses:
         print(f"Impulses: {dv.to(u.km / u.s)}")
         print(f"Cost: {(sum(impulse ** 2 for impulse in dv) ** 0.5).to(u.km/u.s)}")
-    transfer, _ = earth.apply_maneuver(lambert, intermediate=True)
 
-    # Model the transfer orbit as an ephem
-    transfer_ephem = transfer.to_ephem(strategy=EpochsArray(epochs))
+    # Sample the transfer orbit at the same epochs as the target
+    transfer = transfer_arcs(earth_ephem, borisov_ephem, at_launch, at_arrival, num=len(epochs))
 
     view_and_limits = {
         "xy": [[-3, 3], [-3, 3]],
@@ -119,23 +125,16 @@ def main():
         "yz": [[-1.6, 1.7], [-0.2, 1]],
     }
 
-    for view, (xlim, ylim) in view_and_limits.items():
-        plotter = plot_solar_system(epoch=at_launch, outer=False,
-                                    length_scale_units=u.AU,
-                                    plane=Planes.EARTH_ECLIPTIC, view=view)
-        plotter.plot_ephem(transfer_ephem, label="Transfer orbit", color="red")
-        oumuamua_lines, _ = plotter.plot_coordinates(borisov_ephem.sample(epochs),
-                                                     position=borisov_ephem.rv(at_arrival)[0],
-                                                     label="2I/Borisov at arrival", color="black")
-        oumuamua_lines.set_linestyle("--")
-
-        plotter.backend.ax.set_xlim(xlim)
-        plotter.backend.ax.set_ylim(ylim)
-        if view != "xy":
-            plotter.backend.ax.legend().remove()
+    # Sample the planets, the transfer and 2I/Borisov once for all the views
+    plotter = MultiViewPlotter(plane=Planes.EARTH_ECLIPTIC, length_scale_units=u.AU)
+    plotter.plot_solar_system(epoch=at_launch, outer=False)
+    plotter.plot_arcs(transfer, label="Transfer orbit", color="red")
+    plotter.plot_coordinates(borisov_ephem.sample(epochs), position=borisov_ephem.rv(at_arrival)[0],
+                             label="2I/Borisov at arrival", color="black", linestyle="--")
+    plotter.savefig("fig/static/borisov/direct-optimum-transfer-{view}.png", view_and_limits, writer=writer)
 
-        plt.savefig(f"fig/static/borisov/direct-optimum-transfer-{view}.png", bbox_inches="tight")
 
+    writer.close()
 
 if __name__ == "__main__":
     main()
@@ -2,11 +2,14 @@ from astropy import units as u
 from matplotlib import pyplot as plt
 import numpy as np
 
-from poliastro.ephem import Ephem
 from poliastro.frames import Planes
-from poliastro.plotting.porkchop import PorkchopPlotter
 from poliastro.util import time_range
 
+from tfm.cache import PorkchopCache
+from tfm.ephem import load_ephem_window
+from tfm.porkchop import PorkchopPlotter
+from tfm.writer import FigureWriter
+
 
 def solve_porkchop(prograde=True):
     # Declare the launch and arrival spans
@@ -15,15 +18,19 @@ def solve_porkchop(prograde=True):
     arrival_span = time_range("2017-09-12", end="2018-04-01", num_values=N, scale="tdb")
 
     # Load the ephemerides for the Earth and 'Oumuamua
-    l2 = Ephem.from_csv("bin/ephem/semb-l4.csv", plane=Planes.EARTH_ECLIPTIC)
-    oumuamua = Ephem.from_csv("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
+    l2 = load_ephem_window("bin/ephem/semb-l4.csv", launch_span, plane=Planes.EARTH_ECLIPTIC)
+    oumuamua = load_ephem_window("bin/ephem/oumuamua.csv", arrival_span, plane=Planes.EARTH_ECLIPTIC)
 
-    # Compute the porkchop plot
+    # Compute the porkchop plot, reusing the grids of previous runs
     return PorkchopPlotter(
-        l2, oumuamua, launch_span, arrival_span, prograde=prograde
+        l2, oumuamua, launch_span, arrival_span, prograde=prograde,
+        cache=PorkchopCache(),
     )
 
 def main():
+    # Save the figures in the background while the next ones are computed
+    writer = FigureWriter()
+
     # Compute the porkchop plot
     porkchop = solve_porkchop(prograde=True)
 
@@ -59,7 +66,7 @@ def main():
                                          color='black', linewidth=3,
                                          label="Discovery of Oumuamua")
     labelLines([discovery_line], align=True, fontsize=14, backgroundcolor="white")
-    plt.savefig(f"fig/static/oumuamua/direct-detailed-porkchop-tof.png", bbox_inches="tight")
+    writer.savefig(f"fig/static/oumuamua/direct-detailed-porkchop-tof.png", bbox_inches="tight")
 
     # Get launch energy and arrival velocity
     _, ax = plt.subplots(1, 1, figsize=(16, 8))
@@ -85,6 +92,7 @@ def main():
     )
     #plt.savefig(f"fig/static/oumuamua/direct-detailed-porkchop-avl.png", bbox_inches="tight")
     plt.show()
+    writer.close()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,7 @@
 from astropy.coordinates import CartesianRepresentation
-import numpy as np
 from astropy import units as u
 from astropy.time import Time
 
-from poliastro.ephem import Ephem
 from poliastro.frames import Planes
 from poliastro.bodies import Sun, Earth
 from poliastro.plotting.misc import plot_solar_system
@@ -11,42 +9,32 @@ from poliastro.plotting import OrbitPlotter
 from poliastro.util import time_range
 from poliastro.core.iod import izzo
 
-from poliastro.threebody.restricted import lagrange_points_vec
+from tfm.ephem import load_ephem, load_table
+from tfm.lagrange import generate_lagrange_tables
 
 
-sun = Ephem.from_csv("bin/ephem/sun.csv", plane=Planes.EARTH_ECLIPTIC)
-earth = Ephem.from_csv("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
-moon = Ephem.from_csv("bin/ephem/moon.csv", plane=Planes.EARTH_ECLIPTIC)
+earth = load_ephem("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
 
 start = Time("2034-01-01", scale="tdb")
 end = Time("2035-01-01", scale="tdb")
 epochs = time_range(start, end=end, num_values=1000, scale="tdb")
 
+# Regenerate the Sun - EMB Lagrange points for the whole span at once
+delta_time = 1 * u.day
+tables = generate_lagrange_tables(start, end, step=delta_time)
+l2_table = load_table(tables["L2"])
+
 coordinates = {
-    "x": [],
-    "y": [],
-    "z": [],
+    "x": l2_table.r[:, 0] * u.km,
+    "y": l2_table.r[:, 1] * u.km,
+    "z": l2_table.r[:, 2] * u.km,
 }
 velocities = {
     "vx": [],
     "vy": [],
     "vz": [],
 }
-
-epoch = start
-delta_time = 1 * u.day
-while epoch <= end:
-
-    sun_r, _ = sun.rv(epoch)
-    earth_r, earth_v = earth.rv(epoch)
-    n = np.cross(earth_r, earth_v) / np.linalg.norm(np.dot(earth_r, earth_v))
-
-    _, l2, *_ = lagrange_points_vec(Sun.mass, sun_r, Earth.mass, earth_r, n)
-    coordinates["x"].append(l2[0])
-    coordinates["y"].append(l2[1])
-    coordinates["z"].append(l2[2])
-    units = l2.unit
-    epoch += delta_time
+units = u.km
 
 """
 for ith_state in range(1, len(coordinates)):
@@ -1 +1,59 @@
-"""Main python file."""
+"""Main python file.
+
+Regenerates the porkchop figures described in ``bin/scenarios.json``. Every
+distinct grid is solved once and the independent jobs run on a process pool.
+Figures whose code, ephemerides and parameters did not change since they were
+last drawn are skipped, see :mod:`tfm.manifest`. Scenarios can be selected by
+name::
+
+    python bin/main.py                          # every scenario
+    python bin/main.py oumuamua-optimum --workers 4
+    python bin/main.py --list                   # print the job graph
+    python bin/main.py --force                  # redraw up to date figures
+
+"""
+import argparse
+import sys
+
+import matplotlib
+
+# Figures are only saved, and workers must never open windows
+matplotlib.use("Agg")
+
+from tfm.manifest import FigureManifest
+from tfm.scenarios import build_graph, load_scenarios, run_graph
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate the porkchop figures of some scenarios.")
+    parser.add_argument("names", nargs="*", help="scenarios to be run, all of them by default")
+    parser.add_argument("--file", default="bin/scenarios.json", help="JSON file of scenarios")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes")
+    parser.add_argument("--list", action="store_true", help="print the jobs without running them")
+    parser.add_argument("--force", action="store_true", help="redraw the figures which are up to date")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.file)
+    if args.names:
+        unknown = set(args.names) - {scenario["name"] for scenario in scenarios}
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in scenarios if scenario["name"] in args.names]
+
+    ephemerides, grids = build_graph(scenarios)
+    if args.list:
+        for path in ephemerides:
+            print(f"Ephemeris {path}")
+        for job in grids:
+            print(job)
+        return 0
+
+    outputs = run_graph(
+        ephemerides, grids, workers=args.workers, manifest=FigureManifest(), force=args.force
+    )
+    print(f"{len(outputs)} figures from {len(grids)} grids of {len(scenarios)} scenarios")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
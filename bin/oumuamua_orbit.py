@@ -1,14 +1,12 @@
 from astropy import units as u
 from astropy.time import Time
 
-from matplotlib import pyplot as plt
-
 from poliastro.frames import Planes
-from poliastro.ephem import Ephem
-from poliastro.plotting.misc import plot_solar_system
-from poliastro.plotting.orbit.backends import Matplotlib2D
 
-oumuamua = Ephem.from_csv("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
+from tfm.ephem import load_ephem
+from tfm.views import MultiViewPlotter
+
+oumuamua = load_ephem("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
 discovery = Time("2017-10-19", scale="tdb")
 
 view_and_limits = {
@@ -17,19 +15,8 @@ view_and_limits = {
     "yz": [[-1.5, 1.5], [-0.5, 1]],
 }
 
-_, ax = plt.subplots(figsize=(10, 7), dpi=300)
-backend = Matplotlib2D(ax=ax)
-for view, (xlim, ylim) in view_and_limits.items():
-    plotter = plot_solar_system(epoch=discovery, outer=False,
-                                length_scale_units=u.AU,
-                                plane=Planes.EARTH_ECLIPTIC, view=view)
-    borisov_orbit_lines, _ = plotter.plot_ephem(oumuamua, epoch=discovery,
-                                                color="black",
-                                                label="1I/'Oumuamua at its discovery")
-    borisov_orbit_lines.set_linestyle("--")
-
-    plotter.backend.ax.set_xlim(xlim)
-    plotter.backend.ax.set_ylim(ylim)
-    if view != "xy":
-        plotter.backend.ax.legend().remove()
-    plt.savefig(f"fig/static/oumuamua/orbit_{view}.png", bbox_inches="tight")
+# Sample the planets and the whole track of 1I/'Oumuamua once for all the views
+plotter = MultiViewPlotter(plane=Planes.EARTH_ECLIPTIC, length_scale_units=u.AU)
+plotter.plot_solar_system(epoch=discovery, outer=False)
+plotter.plot_ephem(oumuamua, epoch=discovery, color="black", label="1I/'Oumuamua at its discovery", linestyle="--")
+plotter.savefig("fig/static/oumuamua/orbit_{view}.png", view_and_limits, figsize=(10, 7), dpi=300)
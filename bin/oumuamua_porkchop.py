@@ -3,35 +3,46 @@ from astropy.time import Time
 from matplotlib import pyplot as plt
 import numpy as np
 
-from poliastro.ephem import Ephem
 from poliastro.frames import Planes
-from poliastro.plotting.porkchop import PorkchopPlotter
 from poliastro.util import time_range
 
+from tfm.cache import PorkchopCache
+from tfm.ephem import load_ephem
+from tfm.lambert import IterationCounter
+from tfm.parallel import print_progress
+from tfm.porkchop import PorkchopPlotter
 
-def solve_porkchop(prograde=True):
+
+def solve_porkchops():
     # Declare the launch and arrival spans
     N = 250
     launch_span = time_range("2016-01-01", end="2028-01-01", num_values=N, scale="tdb")
     arrival_span = time_range("2017-01-01", end="2035-01-01", num_values=N, scale="tdb")
 
     # Load the ephemerides for the Earth and 'Oumuamua
-    earth = Ephem.from_csv("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
-    oumuamua = Ephem.from_csv("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
+    earth = load_ephem("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
+    oumuamua = load_ephem("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
 
-    # Compute the porkchop plot
-    return PorkchopPlotter(
-        earth, oumuamua, launch_span, arrival_span, prograde=prograde
+    # Compute the prograde and retrograde porkchop plots in a single pass
+    # using all the available cores, reusing the grids of previous runs and
+    # warm starting the Lambert iterations from the neighbouring cells
+    counter = IterationCounter()
+    porkchops = PorkchopPlotter.branches(
+        earth, oumuamua, launch_span, arrival_span, directions=(True, False),
+        workers=None, progress=print_progress, cache=PorkchopCache(),
+        warm_start=True, counter=counter,
     )
+    if counter.problems:
+        print(f"Lambert iterations per cell: {counter.mean_iterations:.2f}")
+    return porkchops
 
 def solve_launch_energy(porkchop, inclination):
-    porkchop = solve_porkchop(prograde)
-    inclination = "prograde" if prograde else "retrograde"
     _, ax = plt.subplots(1, 1, figsize=(16, 8))
     porkchop.plot_launch_energy(
         levels=np.linspace(0, 10e3, int(1001)) * u.km ** 2 / u.s ** 2,
         plot_contour_lines=False,
         ax=ax,
+        rasterized=True,
     )
     porkchop.c3_colorbar.set_ticks(np.linspace(0, 10e3, 11).astype(int))
     porkchop.c3_colorbar.set_ticklabels(np.linspace(0, 10e3, 11).astype(int))
@@ -49,6 +60,7 @@ def solve_arrival_velocity(porkchop, inclination):
         levels=np.linspace(0, 10e3, int(1001)) * u.km ** 2 / u.s ** 2,
         plot_contour_lines=False,
         ax=ax,
+        rasterized=True,
     )
     porkchop.c3_colorbar.set_ticks(np.linspace(0, 10e3, 11).astype(int))
     porkchop.c3_colorbar.set_ticklabels(np.linspace(0, 10e3, 11).astype(int))
@@ -62,8 +74,7 @@ def solve_arrival_velocity(porkchop, inclination):
 
 
 if __name__ == "__main__":
-    for prograde in [True, False]:
-        porkchop = solve_porkchop(prograde)
+    for prograde, porkchop in solve_porkchops().items():
         inclination = "prograde" if prograde else "retrograde"
         solve_launch_energy(porkchop, inclination)
         solve_arrival_velocity(porkchop, inclination)
@@ -6,14 +6,17 @@ import numpy as np
 
 from poliastro.bodies import Sun
 from poliastro.frames import Planes
-from poliastro.ephem import Ephem
 from poliastro.twobody import Orbit
 from poliastro.frames import Planes
-from poliastro.twobody.sampling import EpochsArray
-from poliastro.plotting.porkchop import PorkchopPlotter
 from poliastro.util import time_range
 from poliastro.maneuver import Maneuver
-from poliastro.plotting.misc import plot_solar_system
+
+from tfm.cache import PorkchopCache
+from tfm.ephem import load_ephem, load_ephem_window
+from tfm.kepler import transfer_arcs
+from tfm.porkchop import PorkchopPlotter
+from tfm.views import MultiViewPlotter
+from tfm.writer import FigureWriter
 
 
 def solve_porkchop(prograde=True):
@@ -23,18 +26,22 @@ def solve_porkchop(prograde=True):
     arrival_span = time_range("2017-09-12", end="2019-01-01", num_values=N, scale="tdb")
 
     # Load the ephemerides for the L2 and 'Oumuamua
-    l2 = Ephem.from_csv("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
-    oumuamua = Ephem.from_csv("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
+    l2 = load_ephem_window("bin/ephem/semb-l2.csv", launch_span, plane=Planes.EARTH_ECLIPTIC)
+    oumuamua = load_ephem_window("bin/ephem/oumuamua.csv", arrival_span, plane=Planes.EARTH_ECLIPTIC)
 
     # Compute the escape velocity
     escape_velocity = 0.73 * u.km / u.s
 
-    # Compute the porkchop plot
+    # Compute the porkchop plot, reusing the grids of previous runs
     return PorkchopPlotter(
-        l2, oumuamua, launch_span, arrival_span, prograde=prograde, escape_velocity=escape_velocity
+        l2, oumuamua, launch_span, arrival_span, prograde=prograde, escape_velocity=escape_velocity,
+        cache=PorkchopCache(),
     )
 
 def main():
+    # Save the figures in the background while the next ones are computed
+    writer = FigureWriter()
+
     # Compute the porkchop plot
     porkchop = solve_porkchop(prograde=True)
 
@@ -70,7 +77,7 @@ def main():
                                          color='black', linewidth=3,
                                          label="Discovery of Oumuamua")
     labelLines([discovery_line], align=True, fontsize=14, backgroundcolor="white")
-    plt.savefig(f"fig/static/oumuamua/l2-direct-detailed-porkchop-tof.png", bbox_inches="tight")
+    writer.savefig(f"fig/static/oumuamua/l2-direct-detailed-porkchop-tof.png", bbox_inches="tight")
 
     # Get launch energy and arrival velocity
     _, ax = plt.subplots(1, 1, figsize=(16, 8))
@@ -98,11 +105,11 @@ def main():
                                          color='black', linewidth=3,
                                          label="Discovery of Oumuamua")
     labelLines([discovery_line], align=True, fontsize=14, backgroundcolor="white")
-    plt.savefig(f"fig/static/oumuamua/l2-direct-detailed-porkchop-avl.png", bbox_inches="tight")
+    writer.savefig(f"fig/static/oumuamua/l2-direct-detailed-porkchop-avl.png", bbox_inches="tight")
 
     # Compute optimum transfer orbit
-    l2_ephem = Ephem.from_csv("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
-    oumuamua_ephem = Ephem.from_csv("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
+    l2_ephem = load_ephem("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
+    oumuamua_ephem = load_ephem("bin/ephem/oumuamua.csv", plane=Planes.EARTH_ECLIPTIC)
 
     # Define the desired times
     at_launch = porkchop.launch_date_at_c3_launch_min
@@ -120,10 +127,9 @@ def main():
     for _, dv in lambert.impulses:
         print(f"Impulses: {dv.to(u.km / u.s)}")
         print(f"Cost: {(sum(impulse ** 2 for impulse in dv) ** 0.5).to(u.km/u.s):.2f}")
-    transfer, _ = l2.apply_maneuver(lambert, intermediate=True)
 
-    # Model the transfer orbit as an ephem
-    transfer_ephem = transfer.to_ephem(strategy=EpochsArray(epochs))
+    # Sample the transfer orbit at the same epochs as the target
+    transfer = transfer_arcs(l2_ephem, oumuamua_ephem, at_launch, at_arrival, num=len(epochs))
 
     view_and_limits = {
         "xy": [[-2, 2], [-2, 2]],
@@ -131,20 +137,16 @@ def main():
         "yz": [[-1.5, 1.5], [-0.5, 1]],
     }
 
-    for view, (xlim, ylim) in view_and_limits.items():
-        plotter = plot_solar_system(epoch=at_launch, outer=False,
-                                    length_scale_units=u.AU,
-                                    plane=Planes.EARTH_ECLIPTIC, view=view)
-        plotter.plot_ephem(transfer_ephem, label="Transfer orbit", color="red")
-        oumuamua_lines, _ = plotter.plot_coordinates(oumuamua_ephem.sample(epochs), position=oumuamua_ephem.rv(at_arrival)[0], label="1I/'Oumuamua at arrival", color="black")
-        oumuamua_lines.set_linestyle("--")
-
-        plotter.backend.ax.set_xlim(xlim)
-        plotter.backend.ax.set_ylim(ylim)
-        if view != "xy":
-            plotter.backend.ax.legend().remove()
-        plt.savefig(f"fig/static/oumuamua/l2-direct-optimum-transfer-{view}.png", bbox_inches="tight")
-        plt.show()
+    # Sample the planets, the transfer and 1I/'Oumuamua once for all the views
+    plotter = MultiViewPlotter(plane=Planes.EARTH_ECLIPTIC, length_scale_units=u.AU)
+    plotter.plot_solar_system(epoch=at_launch, outer=False)
+    plotter.plot_arcs(transfer, label="Transfer orbit", color="red")
+    plotter.plot_coordinates(oumuamua_ephem.sample(epochs), position=oumuamua_ephem.rv(at_arrival)[0],
+                             label="1I/'Oumuamua at arrival", color="black", linestyle="--")
+    plotter.savefig("fig/static/oumuamua/l2-direct-optimum-transfer-{view}.png", view_and_limits, writer=writer)
+    plotter.show(view_and_limits)
+
+    writer.close()
 
 if __name__ == "__main__":
     main()
@@ -2,21 +2,22 @@ from astropy import units as u
 from astropy.time import Time
 import matplotlib.pyplot as plt
 
-from poliastro.ephem import Ephem
 from poliastro.frames import Planes
 from poliastro.bodies import Sun, Earth
 from poliastro.plotting import OrbitPlotter
 from poliastro.plotting.orbit.backends import Matplotlib2D
 from poliastro.util import time_range
 
+from tfm.ephem import load_ephem
 
 
-earth = Ephem.from_csv("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
-moon = Ephem.from_csv("bin/ephem/moon.csv", plane=Planes.EARTH_ECLIPTIC)
-l1 = Ephem.from_csv("bin/ephem/semb-l1.csv", plane=Planes.EARTH_ECLIPTIC)
-l2 = Ephem.from_csv("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
-l4 = Ephem.from_csv("bin/ephem/semb-l4.csv", plane=Planes.EARTH_ECLIPTIC)
-l5 = Ephem.from_csv("bin/ephem/semb-l5.csv", plane=Planes.EARTH_ECLIPTIC)
+
+earth = load_ephem("bin/ephem/earth.csv", plane=Planes.EARTH_ECLIPTIC)
+moon = load_ephem("bin/ephem/moon.csv", plane=Planes.EARTH_ECLIPTIC)
+l1 = load_ephem("bin/ephem/semb-l1.csv", plane=Planes.EARTH_ECLIPTIC)
+l2 = load_ephem("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
+l4 = load_ephem("bin/ephem/semb-l4.csv", plane=Planes.EARTH_ECLIPTIC)
+l5 = load_ephem("bin/ephem/semb-l5.csv", plane=Planes.EARTH_ECLIPTIC)
 
 points_and_labels = {
     l1: ["L1", (0.972, -0.00475)],
@@ -0,0 +1,72 @@
+"""Interactive porkchop explorer.
+
+Serves the tiles of a porkchop pyramid, see :mod:`tfm.tiles`, to a browser.
+Tiles are only solved when the viewer first shows them and are kept under
+dat/tiles, so zooming into a window costs the tiles on screen::
+
+    python bin/porkchop_explorer.py bin/ephem/earth.csv bin/ephem/oumuamua.csv
+    python bin/porkchop_explorer.py bin/ephem/earth.csv bin/ephem/borisov.csv \\
+        --launch 2016-01-01 2035-01-01 --escape-velocity 11.2 --retrograde
+
+From a notebook, the same tiles are assembled into a plain porkchop with::
+
+    pyramid = TilePyramid("bin/ephem/earth.csv", "bin/ephem/oumuamua.csv")
+    porkchop = pyramid.porkchop(launch_start, launch_end, arrival_start, arrival_end)
+
+"""
+import argparse
+import sys
+
+import matplotlib
+
+# Tiles are rendered to PNG images from the server threads
+matplotlib.use("Agg")
+
+from astropy import units as u
+from astropy.time import Time
+
+from tfm.tiles import TilePyramid, TileServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a porkchop tile pyramid to a browser.")
+    parser.add_argument("departure", help="ephemeris CSV of the departure body")
+    parser.add_argument("target", help="ephemeris CSV of the target body")
+    parser.add_argument("--launch", nargs=2, metavar=("START", "END"), help="launch domain")
+    parser.add_argument("--arrival", nargs=2, metavar=("START", "END"), help="arrival domain")
+    parser.add_argument("--retrograde", action="store_true", help="solve retrograde transfers")
+    parser.add_argument("--escape-velocity", type=float, default=0.0, help="escape velocity in km / s")
+    parser.add_argument("--tile-size", type=int, default=128, help="nodes per axis of each tile")
+    parser.add_argument("--max-level", type=int, default=12, help="deepest zoom level")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    def span(dates):
+        return None if dates is None else [Time(date, scale="tdb") for date in dates]
+
+    try:
+        pyramid = TilePyramid(
+            args.departure,
+            args.target,
+            launch=span(args.launch),
+            arrival=span(args.arrival),
+            prograde=not args.retrograde,
+            escape_velocity=args.escape_velocity * u.km / u.s,
+            tile_size=args.tile_size,
+            max_level=args.max_level,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+
+    with TileServer(pyramid, (args.host, args.port)) as server:
+        print(f"Serving tiles of {pyramid.directory} on http://{args.host}:{args.port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
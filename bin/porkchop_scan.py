@@ -0,0 +1,99 @@
+"""Daily porkchop scan over the whole span of the ephemerides.
+
+Solves the porkchop out of core, see :mod:`tfm.chunked`, so that scans of
+thousands of epochs per axis never hold the grids in memory. Interrupting the
+scan and running it again resumes from the last finished block::
+
+    python bin/porkchop_scan.py bin/ephem/earth.csv bin/ephem/oumuamua.csv \\
+        --escape-velocity 11.2 --workers 8 --figure fig/static/oumuamua/daily-scan.png
+
+"""
+import argparse
+import sys
+
+import matplotlib
+
+# Figures are only saved
+matplotlib.use("Agg")
+
+from astropy import units as u
+from astropy.time import Time
+from matplotlib import pyplot as plt
+import numpy as np
+
+from poliastro.util import time_range
+
+from tfm.chunked import solve_chunked_porkchop
+from tfm.interpolation import HermiteEphem
+from tfm.parallel import print_progress
+from tfm.porkchop import PorkchopPlotter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a daily porkchop scan out of core.")
+    parser.add_argument("departure", help="ephemeris CSV of the departure body")
+    parser.add_argument("target", help="ephemeris CSV of the target body")
+    parser.add_argument("--launch", nargs=2, metavar=("START", "END"), help="launch span")
+    parser.add_argument("--arrival", nargs=2, metavar=("START", "END"), help="arrival span")
+    parser.add_argument("--step", type=float, default=1.0, help="days between epochs")
+    parser.add_argument("--retrograde", action="store_true", help="solve retrograde transfers")
+    parser.add_argument("--escape-velocity", type=float, default=0.0, help="escape velocity in km / s")
+    parser.add_argument("--block-rows", type=int, default=256, help="launch epochs per block")
+    parser.add_argument("--workers", type=int, default=1, help="processes solving each block")
+    parser.add_argument("--figure", help="path of an overview figure of the launch energy")
+    parser.add_argument("--c3-max", type=float, default=1000.0, help="top level of the figure in km2 / s2")
+    args = parser.parse_args(argv)
+
+    departure = HermiteEphem.from_csv(args.departure)
+    target = HermiteEphem.from_csv(args.target)
+
+    def span(dates, ephem):
+        # Whole span of the ephemeris by default
+        start, end = (
+            (Time(date, scale="tdb") for date in dates)
+            if dates is not None
+            else (Time(jd, format="jd", scale="tdb") for jd in (ephem.jd0, ephem.jd_end))
+        )
+        num = int((end - start).to_value(u.day) // args.step) + 1
+        return time_range(start, end=start + (num - 1) * args.step * u.day, num_values=num, scale="tdb")
+
+    launch_span, arrival_span = span(args.launch, departure), span(args.arrival, target)
+    print(f"Scanning {len(launch_span)} x {len(arrival_span)} transfers")
+    porkchop = solve_chunked_porkchop(
+        departure,
+        target,
+        launch_span,
+        arrival_span,
+        prograde=not args.retrograde,
+        escape_velocity=args.escape_velocity * u.km / u.s,
+        block_rows=args.block_rows,
+        warm_start=True,
+        workers=args.workers,
+        progress=print_progress,
+    )
+
+    c3, launch, arrival = porkchop.minimum("c3_launch")
+    print(f"Stored in {porkchop.directory}")
+    print(f"Minimum energy: {c3:.2f}")
+    print(f"Launch date: {launch.iso}")
+    print(f"Arrival date: {arrival.iso}")
+
+    if args.figure:
+        # About a thousand epochs per axis are plenty for an overview
+        stride = max(1, max(porkchop.shape) // 1000)
+        plotter = PorkchopPlotter.from_porkchop(porkchop.subsample(stride))
+        figure, ax = plt.subplots(1, 1, figsize=(16, 8))
+        plotter.plot_launch_energy(
+            levels=np.linspace(0, args.c3_max, 51) * u.km**2 / u.s**2,
+            plot_contour_lines=False,
+            ax=ax,
+            rasterized=True,
+        )
+        plotter.plot_time_of_flight(levels=[1, 2, 5, 10] * u.year, ax=ax, use_years=True)
+        ax.plot(launch.to_datetime(), arrival.to_datetime(), color="red", marker="x", mew=2)
+        figure.savefig(args.figure, bbox_inches="tight")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared helpers for the analysis scripts living in the bin/ directory."""
@@ -0,0 +1,258 @@
+"""Adaptive mesh refinement of porkchops.
+
+Instead of solving a dense uniform grid, the porkchop starts from a coarse
+lattice and only splits the cells worth a closer look: those holding a local
+minimum of the refined field and those crossed by one of the requested contour
+levels. Cells are split in four until the date resolution is reached, so the
+features of interest end up as finely resolved as in a dense grid for a small
+fraction of its Lambert solves.
+
+Nodes live on a dyadic lattice whose finest spacing matches the requested
+resolution. Each node is identified by its integer lattice coordinates, which
+allows sharing the corners between neighbouring cells of any level.
+
+"""
+from astropy import units as u
+from astropy.time import Time
+from matplotlib.dates import date2num
+from matplotlib.tri import Triangulation
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.porkchop import UNITS, sample_states, transfer_costs
+
+
+_NEIGHBOURS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+
+class AdaptivePorkchop:
+    """Porkchop sampled at the nodes of an adaptive lattice.
+
+    Parameters
+    ----------
+    jd_launch, jd_arrival : numpy.ndarray
+        Julian dates (TDB) of each one of the solved nodes.
+    values : dict
+        Node values for each one of the grids listed in
+        :data:`tfm.porkchop.UNITS`, in those units.
+    uniform_size : tuple
+        Shape of the uniform grid achieving the same finest resolution.
+
+    """
+
+    def __init__(self, jd_launch, jd_arrival, values, uniform_size):
+        self.jd_launch = jd_launch
+        self.jd_arrival = jd_arrival
+        self.values = values
+        self.uniform_size = uniform_size
+
+    @property
+    def solves(self):
+        """Number of Lambert problems solved."""
+        return self.jd_launch.size
+
+    @property
+    def uniform_solves(self):
+        """Number of Lambert problems of the equivalent uniform grid."""
+        return self.uniform_size[0] * self.uniform_size[1]
+
+    def __getitem__(self, name):
+        return self.values[name] << UNITS[name]
+
+    def minimum(self, name="c3_launch"):
+        """Lowest value of a field with its launch and arrival dates."""
+        index = np.nanargmin(self.values[name])
+        return (
+            self[name][index],
+            Time(self.jd_launch[index], format="jd", scale="tdb"),
+            Time(self.jd_arrival[index], format="jd", scale="tdb"),
+        )
+
+    def triangulation(self):
+        """Triangulation of the nodes in matplotlib date units.
+
+        Use it with ``tricontour`` and ``tricontourf`` to draw the fields.
+
+        """
+        launch = date2num(Time(self.jd_launch, format="jd", scale="tdb").to_datetime())
+        arrival = date2num(Time(self.jd_arrival, format="jd", scale="tdb").to_datetime())
+        return Triangulation(launch, arrival)
+
+
+class _Lattice:
+    """Solved nodes of the adaptive lattice, sorted by their integer key."""
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = {name: np.empty(0) for name in UNITS}
+
+    def key(self, i, j):
+        return np.asarray(i, dtype=np.int64) * self.shape[1] + j
+
+    def missing(self, keys):
+        keys = np.unique(keys)
+        return keys[~np.isin(keys, self.keys)]
+
+    def add(self, keys, values):
+        self.keys = np.concatenate([self.keys, keys])
+        order = np.argsort(self.keys)
+        self.keys = self.keys[order]
+        self.values = {
+            name: np.concatenate([self.values[name], values[name]])[order]
+            for name in UNITS
+        }
+
+    def lookup(self, name, keys):
+        """Values at some keys, NaN for the ones not solved yet."""
+        index = np.clip(np.searchsorted(self.keys, keys), 0, self.keys.size - 1)
+        found = self.keys[index] == keys
+        return np.where(found, self.values[name][index], np.nan), found
+
+
+def _local_minima(lattice, name, i, j, step):
+    """Flag the nodes lower than all their neighbours at a given spacing.
+
+    Nodes lacking a neighbour inside the domain are never flagged, so the
+    borders of refined patches do not spread the refinement around.
+
+    """
+    value, _ = lattice.lookup(name, lattice.key(i, j))
+    is_minimum = np.isfinite(value)
+    for di, dj in _NEIGHBOURS:
+        ni, nj = i + di * step, j + dj * step
+        inside = (ni >= 0) & (ni < lattice.shape[0]) & (nj >= 0) & (nj < lattice.shape[1])
+        neighbour, found = lattice.lookup(name, lattice.key(ni, nj))
+        is_minimum &= ~inside | (found & ~(neighbour < value))
+    return is_minimum
+
+
+def adaptive_porkchop(
+    departure_body,
+    target_body,
+    launch_start,
+    launch_end,
+    arrival_start,
+    arrival_end,
+    resolution=1 * u.day,
+    initial_size=33,
+    field="c3_launch",
+    levels=None,
+    refine_minima=True,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+):
+    """Compute a porkchop refining only around minima and contour levels.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies.
+    launch_start, launch_end : ~astropy.time.Time
+        Launch window.
+    arrival_start, arrival_end : ~astropy.time.Time
+        Arrival window.
+    resolution : ~astropy.units.Quantity
+        Date resolution at which the refinement stops.
+    initial_size : int
+        Number of nodes per axis of the initial uniform lattice.
+    field : str
+        Grid driving the refinement, one of :data:`tfm.porkchop.UNITS`.
+    levels : ~astropy.units.Quantity
+        Contour levels of ``field`` to be resolved, for instance the ones
+        passed to ``plot_launch_energy``.
+    refine_minima : bool
+        Whether to refine the cells around local minima of ``field``.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+
+    Returns
+    -------
+    AdaptivePorkchop
+        The values at all the solved nodes.
+
+    """
+    jd_launch0, jd_arrival0 = launch_start.tdb.jd, arrival_start.tdb.jd
+    launch_length = launch_end.tdb.jd - jd_launch0
+    arrival_length = arrival_end.tdb.jd - jd_arrival0
+    coarse_step = max(launch_length, arrival_length) / (initial_size - 1)
+    depth = max(0, int(np.ceil(np.log2(coarse_step / resolution.to_value(u.day)))))
+
+    # Finest lattice, whose spacing is the requested resolution or below
+    step = 2**depth
+    shape = ((initial_size - 1) * step + 1,) * 2
+    launch_spacing = launch_length / (shape[0] - 1)
+    arrival_spacing = arrival_length / (shape[1] - 1)
+
+    k = attractor.k.to_value(u.km**3 / u.s**2)
+    escape_velocity = escape_velocity.to_value(u.km / u.s)
+    levels = [] if levels is None else levels.to_value(UNITS[field])
+    lattice = _Lattice(shape)
+
+    def solve(keys):
+        i, j = np.divmod(keys, shape[1])
+        jd_launch = jd_launch0 + i * launch_spacing
+        jd_arrival = jd_arrival0 + j * arrival_spacing
+        r_departure, v_departure = sample_states(
+            departure_body, Time(jd_launch, format="jd", scale="tdb")
+        )
+        r_target, v_target = sample_states(
+            target_body, Time(jd_arrival, format="jd", scale="tdb")
+        )
+        return transfer_costs(
+            k,
+            jd_launch,
+            r_departure,
+            v_departure,
+            jd_arrival,
+            r_target,
+            v_target,
+            prograde=prograde,
+            escape_velocity=escape_velocity,
+        )
+
+    # Lower left corners of the cells at the current level
+    i0, j0 = np.meshgrid(
+        np.arange(initial_size - 1) * step, np.arange(initial_size - 1) * step, indexing="ij"
+    )
+    i0, j0 = i0.ravel(), j0.ravel()
+
+    while True:
+        corners_i = np.stack([i0, i0 + step, i0, i0 + step])
+        corners_j = np.stack([j0, j0, j0 + step, j0 + step])
+        corners = lattice.key(corners_i, corners_j)
+
+        missing = lattice.missing(corners)
+        if missing.size:
+            lattice.add(missing, solve(missing))
+        if step == 1 or i0.size == 0:
+            break
+
+        values, _ = lattice.lookup(field, corners)
+        lowest, highest = np.fmin.reduce(values, axis=0), np.fmax.reduce(values, axis=0)
+        refine = np.zeros(i0.size, dtype=bool)
+        for level in levels:
+            refine |= (lowest < level) & (highest > level)
+        if refine_minima:
+            minima = _local_minima(lattice, field, corners_i, corners_j, step)
+            refine |= minima.any(axis=0)
+
+        # Split the flagged cells in four
+        step //= 2
+        i0, j0 = i0[refine], j0[refine]
+        i0 = np.concatenate([i0, i0 + step, i0, i0 + step])
+        j0 = np.concatenate([j0, j0, j0 + step, j0 + step])
+
+    i, j = np.divmod(lattice.keys, shape[1])
+    return AdaptivePorkchop(
+        jd_launch0 + i * launch_spacing,
+        jd_arrival0 + j * arrival_spacing,
+        lattice.values,
+        shape,
+    )
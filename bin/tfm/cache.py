@@ -0,0 +1,139 @@
+"""Persistent cache of porkchop grids.
+
+Solving the Lambert problems is by far the most expensive step of the porkchop
+scripts, while adjusting contour levels or titles requires running them again
+and again over the very same grid. Solved grids are therefore kept under
+dat/porkchop, named after a hash of everything they depend on: the sampled
+states of both bodies, the epochs, the attractor, the direction of the
+transfers and the escape velocity. Any change in the ephemerides or the spans
+leads to a different file, so entries never need to be invalidated.
+
+The cache is bounded in size. Each hit refreshes the modification time of the
+entry, and the least recently used entries are dropped whenever a new one
+exceeds the bound.
+
+"""
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from tfm.ephem import _write_atomic
+from tfm.porkchop import check_outputs
+
+
+PORKCHOP_CACHE_DIR = Path("dat/porkchop")
+"""Directory holding the cached porkchop grids."""
+
+CACHE_VERSION = b"porkchop-v1"
+"""Salt of the keys, to be bumped whenever the stored grids change meaning."""
+
+
+class PorkchopCache:
+    """On-disk LRU cache of porkchop grids.
+
+    Parameters
+    ----------
+    directory : str
+        Directory holding the cached grids.
+    max_size : int
+        Maximum size of the cache in bytes.
+
+    """
+
+    def __init__(self, directory=PORKCHOP_CACHE_DIR, max_size=512 * 1024**2):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    @staticmethod
+    def key(
+        k,
+        jd_launch,
+        r_departure,
+        v_departure,
+        jd_arrival,
+        r_target,
+        v_target,
+        prograde=True,
+        escape_velocity=0.0,
+        dtype=np.float64,
+    ):
+        """Hash the inputs of :func:`tfm.porkchop.porkchop_grids`.
+
+        The requested outputs are not part of the key, an entry holding every
+        grid solved so far, see :meth:`put`. Grids stored in double precision keep the keys
+        they had before other types were supported.
+
+        """
+        digest = hashlib.sha256(CACHE_VERSION)
+        for array in (k, jd_launch, r_departure, v_departure, jd_arrival, r_target, v_target):
+            array = np.ascontiguousarray(array, dtype=np.float64)
+            digest.update(repr(array.shape).encode())
+            digest.update(array.tobytes())
+        digest.update(repr((bool(prograde), float(escape_velocity))).encode())
+        if np.dtype(dtype) != np.float64:
+            digest.update(np.dtype(dtype).str.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def get(self, key, outputs=None, partial=False):
+        """Return the grids stored under a key, or None if any is missing.
+
+        Only the requested ``outputs`` are read, all the grids listed in
+        :data:`tfm.porkchop.UNITS` when None. With ``partial``, the requested
+        grids found in the entry are returned even if some others are
+        missing, None only meaning that none of them is stored.
+
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                names = [
+                    name for name in check_outputs(outputs) if not partial or name in data.files
+                ]
+                grids = {name: data[name] for name in names}
+        except (OSError, KeyError, ValueError):
+            return None
+        if not grids:
+            return None
+        path.touch()
+        return grids
+
+    def put(self, key, grids):
+        """Store some grids and evict the least recently used entries.
+
+        The grids are merged into those already stored under the key, so that
+        runs requesting different outputs of the same porkchop add up.
+
+        """
+        stored = self.get(key, partial=True) or {}
+        grids = {**stored, **grids}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._path(key), lambda file: np.savez(file, **grids))
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """Drop the least recently used entries until the size bound is met."""
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            if path.stem == keep:
+                continue
+            path.unlink(missing_ok=True)
+            size -= entry_size
+
+    def clear(self):
+        """Remove every cached grid."""
+        for path in self.directory.glob("*.npz"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,351 @@
+"""Out-of-core porkchops stored as memory-mapped row blocks.
+
+A daily scan over the whole span of the ephemerides holds about 12 000 x 12 000
+cells per grid, far beyond what the dense arrays of :mod:`tfm.porkchop` can
+keep in memory. :func:`solve_chunked_porkchop` instead solves the grid in
+blocks of launch epochs and streams each one to memory-mapped ``.npy`` files,
+one per requested grid, so only a single block ever lives in memory.
+
+Each finished block is checkpointed in a JSON file together with its
+statistics: the minimum, maximum, position of the minimum and number of valid
+cells of every grid. An interrupted run thus resumes with the first missing
+block, and :class:`ChunkedPorkchop` answers the usual queries from the stored
+result: minima straight from the statistics, contours block by block skipping
+the blocks no level crosses, and subsampled or windowed porkchops small enough
+to be drawn with :class:`tfm.porkchop.PorkchopPlotter`.
+
+"""
+import json
+from pathlib import Path
+
+from astropy import units as u
+from astropy.time import Time
+from contourpy import LineType, contour_generator
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.cache import PorkchopCache
+from tfm.ephem import _write_atomic
+from tfm.porkchop import UNITS, Porkchop, branch_grids, check_outputs, sample_states
+
+
+CHUNKED_DIR = Path("dat/chunked")
+"""Directory holding the out-of-core porkchops, one per set of inputs."""
+
+META_FILE = "meta.json"
+"""Checkpoint of the finished blocks and their statistics."""
+
+
+def _block_stats(grid, i0):
+    valid = np.isfinite(grid)
+    if not valid.any():
+        return {"min": None, "max": None, "argmin": None, "valid": 0}
+    i, j = np.unravel_index(np.nanargmin(grid), grid.shape)
+    return {
+        "min": float(grid[i, j]),
+        "max": float(np.nanmax(grid)),
+        "argmin": [int(i0 + i), int(j)],
+        "valid": int(np.count_nonzero(valid)),
+    }
+
+
+class ChunkedPorkchop:
+    """Porkchop stored on disk in blocks of launch epochs.
+
+    Parameters
+    ----------
+    directory : str
+        Directory written by :func:`solve_chunked_porkchop`.
+    mode : str
+        Mode in which the grids are memory-mapped, ``"r+"`` to keep solving
+        the missing blocks.
+
+    """
+
+    def __init__(self, directory, mode="r"):
+        self.directory = Path(directory)
+        self.meta = json.loads((self.directory / META_FILE).read_text())
+        with np.load(self.directory / "axes.npz") as axes:
+            self.jd_launch = axes["jd_launch"]
+            self.jd_arrival = axes["jd_arrival"]
+        self.outputs = tuple(self.meta["outputs"])
+        self.grids = {
+            name: np.load(self.directory / f"{name}.npy", mmap_mode=mode) for name in self.outputs
+        }
+
+    @property
+    def shape(self):
+        return len(self.jd_launch), len(self.jd_arrival)
+
+    @property
+    def blocks(self):
+        """The ``(start, stop)`` launch rows of each block."""
+        rows = self.meta["block_rows"]
+        return [(i, min(i + rows, self.shape[0])) for i in range(0, self.shape[0], rows)]
+
+    @property
+    def done(self):
+        """Indices of the finished blocks."""
+        return sorted(int(index) for index in self.meta["stats"])
+
+    @property
+    def complete(self):
+        """Whether every block has been solved."""
+        return len(self.meta["stats"]) == len(self.blocks)
+
+    @property
+    def launch_span(self):
+        return Time(self.jd_launch, format="jd", scale="tdb")
+
+    @property
+    def arrival_span(self):
+        return Time(self.jd_arrival, format="jd", scale="tdb")
+
+    def _check(self, name):
+        if name not in self.grids:
+            raise KeyError(f"The {name} grid was not solved, add it to the outputs of the porkchop")
+
+    def __getitem__(self, name):
+        """Memory-mapped grid, in the units listed in :data:`tfm.porkchop.UNITS`."""
+        self._check(name)
+        return self.grids[name]
+
+    def stats(self, name):
+        """Statistics of a grid for each finished block, keyed by block index."""
+        self._check(name)
+        return {int(index): stats[name] for index, stats in self.meta["stats"].items()}
+
+    def iter_blocks(self, name):
+        """Yield the ``(start, stop)`` rows and the values of each finished block."""
+        grid = self[name]
+        for index in self.done:
+            i0, i1 = self.blocks[index]
+            yield (i0, i1), np.asarray(grid[i0:i1])
+
+    def minimum(self, name="c3_launch"):
+        """Lowest value of a grid over the finished blocks.
+
+        Returns
+        -------
+        value : ~astropy.units.Quantity
+            The minimum, or None if no block holds a valid cell.
+        launch, arrival : ~astropy.time.Time
+            Launch and arrival dates of the minimum.
+
+        """
+        stats = [stats for stats in self.stats(name).values() if stats["valid"]]
+        if not stats:
+            return None, None, None
+        best = min(stats, key=lambda stats: stats["min"])
+        i, j = best["argmin"]
+        return (
+            best["min"] << UNITS[name],
+            Time(self.jd_launch[i], format="jd", scale="tdb"),
+            Time(self.jd_arrival[j], format="jd", scale="tdb"),
+        )
+
+    def contours(self, name, levels):
+        """Contour lines of a grid traced block by block.
+
+        Consecutive blocks share their boundary row so that the lines run
+        across them, and blocks whose range of values does not hold any of the
+        ``levels`` are never read.
+
+        Parameters
+        ----------
+        name : str
+            Grid to be contoured.
+        levels : ~astropy.units.Quantity
+            Contour levels.
+
+        Returns
+        -------
+        dict
+            The lines of each level value, as a list of (K, 2) arrays of
+            ``(jd_launch, jd_arrival)`` points.
+
+        """
+        grid, stats = self[name], self.stats(name)
+        levels = [float(level) for level in levels.to_value(UNITS[name])]
+        lines = {level: [] for level in levels}
+        for index in self.done:
+            i0, i1 = self.blocks[index]
+            ranges = [stats[index]]
+            if i1 < self.shape[0] and index + 1 in stats:
+                i1 += 1
+                ranges.append(stats[index + 1])
+            ranges = [(block["min"], block["max"]) for block in ranges if block["valid"]]
+            crossed = [
+                level
+                for level in levels
+                if any(low <= level <= high for low, high in ranges)
+            ]
+            if not crossed:
+                continue
+
+            generator = contour_generator(
+                self.jd_arrival,
+                self.jd_launch[i0:i1],
+                np.ma.masked_invalid(np.asarray(grid[i0:i1], dtype=np.float64)),
+                line_type=LineType.Separate,
+            )
+            for level in crossed:
+                lines[level].extend(line[:, ::-1] for line in generator.lines(level))
+        return lines
+
+    def subsample(self, stride):
+        """Porkchop over every ``stride``-th launch and arrival epoch."""
+        return Porkchop(
+            self.launch_span[::stride],
+            self.arrival_span[::stride],
+            {name: np.array(grid[::stride, ::stride]) for name, grid in self.grids.items()},
+        )
+
+    def window(self, launch_start, launch_end, arrival_start, arrival_end):
+        """Porkchop of the cells within some launch and arrival dates."""
+        i0 = np.searchsorted(self.jd_launch, launch_start.tdb.jd, "left")
+        i1 = np.searchsorted(self.jd_launch, launch_end.tdb.jd, "right")
+        j0 = np.searchsorted(self.jd_arrival, arrival_start.tdb.jd, "left")
+        j1 = np.searchsorted(self.jd_arrival, arrival_end.tdb.jd, "right")
+        return Porkchop(
+            self.launch_span[i0:i1],
+            self.arrival_span[j0:j1],
+            {name: np.array(grid[i0:i1, j0:j1]) for name, grid in self.grids.items()},
+        )
+
+    def _checkpoint(self, index, stats):
+        # The blocks are flushed before being recorded, so that a recorded
+        # block is always on disk
+        for grid in self.grids.values():
+            grid.flush()
+        self.meta["stats"][str(index)] = stats
+        text = json.dumps(self.meta, indent=4)
+        _write_atomic(self.directory / META_FILE, lambda file: file.write(text.encode()))
+
+
+def solve_chunked_porkchop(
+    departure_body,
+    target_body,
+    launch_span,
+    arrival_span,
+    directory=None,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    outputs=("c3_launch", "tof"),
+    dtype=np.float32,
+    block_rows=256,
+    warm_start=False,
+    workers=1,
+    progress=None,
+):
+    """Solve a porkchop block by block into memory-mapped files.
+
+    Running it again over the same inputs resumes from the last checkpoint,
+    only solving the blocks not yet recorded.
+
+    Parameters
+    ----------
+    directory : str
+        Directory in which the grids are stored, one under
+        :data:`CHUNKED_DIR` named after a hash of the inputs when None.
+    outputs : iterable
+        Names of the grids to be stored.
+    dtype : numpy.dtype
+        Type in which the grids are stored.
+    block_rows : int
+        Number of launch epochs per block.
+    workers : int
+        Number of processes solving each block, see
+        :func:`tfm.parallel.branch_grids_parallel`.
+    progress : callable
+        Called as ``progress(done, total, block)`` after each block, with the
+        block given as a ``(i0, i1, j0, j1)`` tile, for instance
+        :func:`tfm.parallel.print_progress`.
+
+    See :func:`tfm.porkchop.solve_porkchop` for the rest of parameters.
+
+    Returns
+    -------
+    ChunkedPorkchop
+        The stored porkchop.
+
+    """
+    r_departure, v_departure = sample_states(departure_body, launch_span)
+    r_target, v_target = sample_states(target_body, arrival_span)
+    args = (
+        attractor.k.to_value(u.km**3 / u.s**2),
+        launch_span.tdb.jd,
+        r_departure,
+        v_departure,
+        arrival_span.tdb.jd,
+        r_target,
+        v_target,
+    )
+    escape_velocity = escape_velocity.to_value(u.km / u.s)
+    outputs = check_outputs(outputs)
+    dtype = np.dtype(dtype)
+
+    key = PorkchopCache.key(*args, prograde=prograde, escape_velocity=escape_velocity, dtype=dtype)
+    directory = Path(directory) if directory is not None else CHUNKED_DIR / key[:16]
+    meta = {
+        "key": key,
+        "outputs": list(outputs),
+        "dtype": dtype.str,
+        "block_rows": block_rows,
+        "stats": {},
+    }
+
+    meta_path = directory / META_FILE
+    if meta_path.exists():
+        stored = json.loads(meta_path.read_text())
+        if {name: value for name, value in stored.items() if name != "stats"} != {
+            name: value for name, value in meta.items() if name != "stats"
+        }:
+            raise ValueError(f"{directory} holds a porkchop of other inputs, remove it first")
+    else:
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            directory / "axes.npz",
+            lambda file: np.savez(file, jd_launch=args[1], jd_arrival=args[4]),
+        )
+        shape = (len(args[1]), len(args[4]))
+        for name in outputs:
+            np.lib.format.open_memmap(directory / f"{name}.npy", mode="w+", dtype=dtype, shape=shape)
+        text = json.dumps(meta, indent=4)
+        _write_atomic(meta_path, lambda file: file.write(text.encode()))
+
+    porkchop = ChunkedPorkchop(directory, mode="r+")
+    blocks = porkchop.blocks
+    kwargs = dict(
+        directions=(prograde,),
+        escape_velocity=escape_velocity,
+        warm_start=warm_start,
+        outputs=outputs,
+        dtype=dtype,
+    )
+    for index, (i0, i1) in enumerate(blocks):
+        if str(index) in porkchop.meta["stats"]:
+            continue
+
+        rows = slice(i0, i1)
+        block_args = (args[0], args[1][rows], args[2][rows], args[3][rows]) + args[4:]
+        if workers == 1:
+            (grids,) = branch_grids(*block_args, **kwargs)
+        else:
+            # Imported here as the parallel module builds on the porkchop one
+            from tfm.parallel import branch_grids_parallel
+
+            (grids,) = branch_grids_parallel(*block_args, **kwargs, workers=workers)
+
+        stats = {}
+        for name, grid in grids.items():
+            porkchop.grids[name][rows] = grid
+            stats[name] = _block_stats(grid, i0)
+        porkchop._checkpoint(index, stats)
+
+        if progress is not None:
+            progress(len(porkchop.meta["stats"]), len(blocks), (i0, i1, 0, porkchop.shape[1]))
+
+    return porkchop
@@ -0,0 +1,297 @@
+"""Fast loaders for the state-vector tables stored under bin/ephem.
+
+Each CSV row holds a Julian date (TDB) followed by the position (km) and the
+velocity (km / s) of the body. Parsing these text files dominates the start-up
+time of the scripts, so every table is converted once into a columnar binary
+file under dat/ephem and memory-mapped on later runs. When only a narrow time
+window is required, a sparse index of row offsets allows reading just the
+bytes covering that window.
+
+"""
+from functools import lru_cache
+import hashlib
+import os
+from pathlib import Path
+
+from astropy import units as u
+from astropy.coordinates import CartesianDifferential, CartesianRepresentation
+from astropy.time import Time
+import numpy as np
+
+from poliastro.ephem import Ephem
+from poliastro.frames import Planes
+
+
+CACHE_DIR = Path("dat/ephem")
+"""Directory holding the binary copies of the ephemeris tables."""
+
+COLUMNS = ("jd", "x", "y", "z", "vx", "vy", "vz")
+"""Name of the columns stored in each table, in storage order."""
+
+INDEX_STRIDE = 64
+"""Number of rows between two consecutive entries of the sidecar index."""
+
+
+class EphemTable:
+    """Columnar state-vector table.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        A (7, N) array holding the Julian date (TDB), the position in km and
+        the velocity in km / s of the body for each one of the N epochs.
+
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    @property
+    def jd(self):
+        """Julian dates (TDB) of the table rows."""
+        return self.data[0]
+
+    @property
+    def r(self):
+        """A (N, 3) view of the positions in km."""
+        return self.data[1:4].T
+
+    @property
+    def v(self):
+        """A (N, 3) view of the velocities in km / s."""
+        return self.data[4:7].T
+
+    def to_ephem(self, plane=Planes.EARTH_ECLIPTIC):
+        """Build a poliastro ephemeris out of the table."""
+        epochs = Time(self.jd, format="jd", scale="tdb")
+        coordinates = CartesianRepresentation(
+            *(self.data[1:4] << u.km),
+            differentials=CartesianDifferential(
+                *(self.data[4:7] << (u.km / u.s)), copy=False
+            ),
+            copy=False,
+        )
+        return Ephem(coordinates, epochs, plane)
+
+
+def file_hash(path):
+    """Return the SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_csv(path):
+    """Parse a state-vector CSV into a (7, N) columnar array."""
+    return np.ascontiguousarray(np.loadtxt(path, delimiter=",", ndmin=2).T)
+
+
+def _cache_paths(path, cache_dir):
+    stem = Path(path).stem
+    return Path(cache_dir) / f"{stem}.npy", Path(cache_dir) / f"{stem}.sha256"
+
+
+def _write_atomic(path, write):
+    # Scripts may run concurrently, so never expose half-written files
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as file:
+        write(file)
+    os.replace(tmp_path, path)
+
+
+def build_cache(path, cache_dir=CACHE_DIR):
+    """Convert a CSV table into its binary columnar copy.
+
+    Returns the path to the binary file, which is only rewritten when the
+    hash of the CSV differs from the one recorded next to it.
+
+    """
+    data_path, hash_path = _cache_paths(path, cache_dir)
+    csv_hash = file_hash(path)
+    if data_path.exists() and hash_path.exists():
+        if hash_path.read_text().strip() == csv_hash:
+            return data_path
+
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    data = read_csv(path)
+    _write_atomic(data_path, lambda file: np.save(file, data))
+    _write_atomic(hash_path, lambda file: file.write(csv_hash.encode()))
+    return data_path
+
+
+def write_table(path, jd, r, v):
+    """Store some states directly in the binary columnar format.
+
+    Parameters
+    ----------
+    path : str
+        Destination of the table, which should use the ``.npy`` extension.
+    jd : numpy.ndarray
+        Julian dates (TDB) of the states.
+    r : numpy.ndarray
+        A (N, 3) array of positions in km.
+    v : numpy.ndarray
+        A (N, 3) array of velocities in km / s.
+
+    """
+    path = Path(path)
+    data = np.ascontiguousarray(np.vstack([jd, np.transpose(r), np.transpose(v)]))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(path, lambda file: np.save(file, data))
+    return path
+
+
+@lru_cache(maxsize=None)
+def _load_table(path, cache_dir):
+    if Path(path).suffix == ".npy":
+        return EphemTable(np.load(path, mmap_mode="r"))
+    data_path = build_cache(path, cache_dir)
+    return EphemTable(np.load(data_path, mmap_mode="r"))
+
+
+def load_table(path, cache_dir=CACHE_DIR):
+    """Return the memory-mapped columnar table of a state-vector file.
+
+    Both the CSV tables and the binary ``.npy`` tables written by
+    :func:`write_table` are accepted.
+
+    """
+    return _load_table(os.path.abspath(path), os.path.abspath(cache_dir))
+
+
+@lru_cache(maxsize=None)
+def _load_ephem(path, plane, cache_dir):
+    return _load_table(path, cache_dir).to_ephem(plane)
+
+
+def load_ephem(path, plane=Planes.EARTH_ECLIPTIC, cache_dir=CACHE_DIR):
+    """Drop-in replacement for ``Ephem.from_csv`` backed by the binary cache.
+
+    Loading the same table twice within a process returns the very same
+    ephemeris object.
+
+    """
+    return _load_ephem(os.path.abspath(path), plane, os.path.abspath(cache_dir))
+
+
+def _index_path(path, cache_dir):
+    return Path(cache_dir) / f"{Path(path).stem}.idx.npz"
+
+
+def build_index(path, cache_dir=CACHE_DIR, stride=INDEX_STRIDE):
+    """Build the sidecar index of a uniformly spaced state-vector CSV.
+
+    The index stores the byte offset of every ``stride``-th row together with
+    the first Julian date and the spacing of the table. It is validated
+    against the size and modification time of the CSV, so that opening it
+    never requires reading the whole file.
+
+    """
+    index_path = _index_path(path, cache_dir)
+    stat = os.stat(path)
+    if index_path.exists():
+        index = np.load(index_path)
+        if tuple(index["stat"][:2]) == (stat.st_size, stat.st_mtime_ns):
+            return index
+
+    with open(path, "rb") as file:
+        raw = np.frombuffer(file.read(), dtype=np.uint8)
+    newlines = np.flatnonzero(raw == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    starts = starts[starts < raw.size]
+    # Blank trailing lines would break the offsets arithmetic
+    starts = starts[raw[starts] != ord("\n")]
+
+    offsets = starts[::stride]
+    nrows = starts.size
+    jd = np.array(
+        [float(bytes(raw[start:start + 32]).split(b",", 1)[0]) for start in offsets]
+    )
+    step = (jd[-1] - jd[0]) / ((offsets.size - 1) * stride) if offsets.size > 1 else 1.0
+    expected = jd[0] + step * stride * np.arange(offsets.size)
+    if not np.allclose(jd, expected, rtol=0, atol=1e-6):
+        raise ValueError(f"Table {path} is not uniformly spaced in time")
+
+    index = {
+        "offsets": offsets.astype(np.int64),
+        "stat": np.array([stat.st_size, stat.st_mtime_ns, nrows, stride], dtype=np.int64),
+        "jd": np.array([jd[0], step]),
+    }
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(index_path, lambda file: np.savez(file, **index))
+    return index
+
+
+def read_window(path, jd_start, jd_end, cache_dir=CACHE_DIR):
+    """Read the rows of a state-vector CSV covering a Julian date window.
+
+    Only the bytes holding the requested rows are read from disk, so both the
+    memory usage and the load time grow with the window and not with the
+    file.
+
+    Raises
+    ------
+    ValueError
+        If the table does not cover the whole window.
+
+    """
+    index = build_index(path, cache_dir)
+    offsets = index["offsets"]
+    jd0, step = index["jd"]
+    size, _, nrows, stride = index["stat"]
+    jd_last = jd0 + (nrows - 1) * step
+    if not jd0 - 1e-6 <= jd_start <= jd_end <= jd_last + 1e-6:
+        raise ValueError(
+            f"Window JD {jd_start} - {jd_end} is not within the table span JD {jd0} - {jd_last}"
+        )
+
+    first = int(np.clip(np.floor((jd_start - jd0) / step), 0, nrows - 1))
+    last = int(np.clip(np.ceil((jd_end - jd0) / step), first, nrows - 1))
+
+    block, skip = divmod(first, stride)
+    end_block = last // stride + 1
+    end_offset = offsets[end_block] if end_block < offsets.size else size
+    with open(path, "rb") as file:
+        file.seek(offsets[block])
+        raw = file.read(end_offset - offsets[block])
+
+    lines = raw.splitlines()[skip:skip + last - first + 1]
+    return EphemTable(np.ascontiguousarray(np.loadtxt(lines, delimiter=",", ndmin=2).T))
+
+
+def load_ephem_window(
+    path, *spans, plane=Planes.EARTH_ECLIPTIC, margin=10 * u.day, cache_dir=CACHE_DIR
+):
+    """Load the part of an ephemeris covering some epochs.
+
+    Parameters
+    ----------
+    path : str
+        Path to the state-vector CSV.
+    *spans : ~astropy.time.Time
+        Epochs which must be covered by the returned ephemeris, usually the
+        launch and arrival spans of a porkchop.
+    plane : ~poliastro.frames.Planes
+        Reference plane of the ephemeris.
+    margin : ~astropy.units.Quantity
+        Extra time added at both ends of the window so the interpolation is
+        not degraded near its edges.
+
+    """
+    jd = np.concatenate([np.atleast_1d(span.tdb.jd) for span in spans])
+    margin = margin.to_value(u.day)
+
+    # The margin is cut at the ends of the table, the epochs themselves must
+    # be covered by it
+    index = build_index(path, cache_dir)
+    jd0, step = index["jd"]
+    jd_last = jd0 + (index["stat"][2] - 1) * step
+    start = min(jd.min(), max(jd.min() - margin, jd0))
+    end = max(jd.max(), min(jd.max() + margin, jd_last))
+    table = read_window(path, start, end, cache_dir)
+    return table.to_ephem(plane)
@@ -0,0 +1,139 @@
+"""Constant-time interpolation of the uniformly spaced ephemeris tables.
+
+Every table row stores both the position and the velocity of the body, which
+is all a piecewise cubic Hermite interpolant needs. Because the rows are evenly
+spaced in time, the segment holding an epoch is found with a single division
+instead of a search over the whole table.
+
+"""
+from astropy import units as u
+import numpy as np
+
+from tfm.ephem import load_table
+
+
+DAY_TO_SECONDS = 86400.0
+
+
+class HermiteEphem:
+    """Piecewise cubic Hermite ephemeris.
+
+    Parameters
+    ----------
+    jd : numpy.ndarray
+        Julian dates (TDB) of the nodes, evenly spaced in time.
+    r : numpy.ndarray
+        A (N, 3) array of positions in km.
+    v : numpy.ndarray
+        A (N, 3) array of velocities in km / s.
+
+    """
+
+    def __init__(self, jd, r, v):
+        jd, r, v = np.asarray(jd), np.asarray(r), np.asarray(v)
+        if jd.size < 2:
+            raise ValueError("At least two nodes are required")
+
+        self.jd0 = jd[0]
+        self.step = (jd[-1] - jd[0]) / (jd.size - 1)
+        if not np.allclose(np.diff(jd), self.step, rtol=0, atol=1e-6):
+            raise ValueError("Nodes must be evenly spaced in time")
+        self.num_segments = jd.size - 1
+
+        # Polynomial coefficients of each segment in the normalized time
+        # s = (jd - jd_i) / step, stored as a (N - 1, 4, 3) array
+        h = self.step * DAY_TO_SECONDS
+        p0, p1 = r[:-1], r[1:]
+        m0, m1 = h * v[:-1], h * v[1:]
+        self.coefficients = np.ascontiguousarray(
+            np.stack(
+                [
+                    p0,
+                    m0,
+                    3 * (p1 - p0) - 2 * m0 - m1,
+                    2 * (p0 - p1) + m0 + m1,
+                ],
+                axis=1,
+            )
+        )
+
+        # The interpolation error of a cubic Hermite segment is bounded by
+        # h^4 / 384 * max|r|. Estimating r from the third differences
+        # of the velocity nodes only gives the order of magnitude of the error
+        # of each segment in km, which the actual error can exceed several
+        # times, so only max_error() and coarsest() guarantee a tolerance
+        jerk = np.zeros(self.num_segments)
+        if jd.size >= 4:
+            third = np.linalg.norm(np.diff(v, n=3, axis=0), axis=1)
+            jerk[1:-1] = third
+            jerk[0], jerk[-1] = third[0], third[-1]
+        self.error_estimate = h * jerk / 384
+
+    @classmethod
+    def from_table(cls, table, stride=1):
+        """Build the interpolant keeping one every ``stride`` table rows."""
+        return cls(table.jd[::stride], table.r[::stride], table.v[::stride])
+
+    @classmethod
+    def from_csv(cls, path, stride=1):
+        """Build the interpolant of a state-vector CSV under bin/ephem."""
+        return cls.from_table(load_table(path), stride=stride)
+
+    @classmethod
+    def coarsest(cls, table, tolerance=1 * u.km, max_stride=64):
+        """Build the interpolant with the widest spacing meeting a tolerance.
+
+        The error is measured against the table rows skipped by the coarser
+        spacing, so the returned interpolant is known to reproduce the full
+        table within ``tolerance``.
+
+        """
+        tolerance = tolerance.to_value(u.km)
+        best = cls.from_table(table)
+        for stride in range(2, max_stride + 1):
+            candidate = cls.from_table(table, stride=stride)
+            if candidate.max_error(table) > tolerance:
+                break
+            best = candidate
+        return best
+
+    @property
+    def jd_end(self):
+        """Julian date of the last node."""
+        return self.jd0 + self.num_segments * self.step
+
+    def _locate(self, jd1, jd2=0.0):
+        # Splitting the date in two parts keeps sub-millisecond precision
+        x = ((np.asarray(jd1) - self.jd0) + np.asarray(jd2)) / self.step
+        if np.any((x < -1e-9) | (x > self.num_segments + 1e-9)):
+            raise ValueError(
+                f"Epochs outside the ephemeris span JD {self.jd0} - {self.jd_end}"
+            )
+        index = np.clip(np.floor(x).astype(np.intp), 0, self.num_segments - 1)
+        return index, x - index
+
+    def rv_jd(self, jd1, jd2=0.0):
+        """Position (km) and velocity (km / s) at some Julian dates (TDB).
+
+        Accepts scalars or arrays and returns arrays with a trailing axis of
+        size three.
+
+        """
+        index, s = self._locate(jd1, jd2)
+        a, b, c, d = np.moveaxis(self.coefficients[index], -2, 0)
+        s = s[..., np.newaxis]
+        r = a + s * (b + s * (c + s * d))
+        v = (b + s * (2 * c + s * 3 * d)) / (self.step * DAY_TO_SECONDS)
+        return r, v
+
+    def rv(self, epochs):
+        """Position and velocity at some epochs, mirroring ``Ephem.rv``."""
+        epochs = epochs.tdb
+        r, v = self.rv_jd(epochs.jd1, epochs.jd2)
+        return r << u.km, v << (u.km / u.s)
+
+    def max_error(self, table):
+        """Largest position error (km) with respect to the rows of a table."""
+        inside = (table.jd >= self.jd0) & (table.jd <= self.jd_end)
+        r, _ = self.rv_jd(table.jd[inside])
+        return np.linalg.norm(r - table.r[inside], axis=1).max()
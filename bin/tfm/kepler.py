@@ -0,0 +1,202 @@
+"""Universal-variable Kepler propagation, vectorized over many orbits and epochs.
+
+Drawing a transfer used to mean applying its Lambert maneuver to a poliastro
+orbit and sampling the resulting orbit as an ephemeris, one transfer at a
+time. :func:`propagate` instead solves the universal Kepler equation for any
+number of initial states and times of flight at once, so that
+:func:`transfer_arcs` samples a whole family of Lambert arcs, for instance the
+best windows of a porkchop, in a single batch of array operations.
+
+The universal anomaly is found with the Laguerre-Conway iteration, which
+converges from a rough initial guess for elliptic and hyperbolic orbits alike.
+As in :mod:`tfm.lambert`, a per-problem mask drops the converged problems from
+the following iterations.
+
+"""
+from astropy import units as u
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.lambert import izzo_branches
+from tfm.porkchop import sample_states
+
+
+def _stumpff(z):
+    """Stumpff functions c2(z) and c3(z), with series close to zero."""
+    c2, c3 = np.empty_like(z), np.empty_like(z)
+    elliptic, hyperbolic = z > 1e-6, z < -1e-6
+    near = ~(elliptic | hyperbolic)
+
+    s = np.sqrt(z[elliptic])
+    c2[elliptic] = (1 - np.cos(s)) / z[elliptic]
+    c3[elliptic] = (s - np.sin(s)) / s**3
+
+    s = np.sqrt(-z[hyperbolic])
+    c2[hyperbolic] = (np.cosh(s) - 1) / -z[hyperbolic]
+    c3[hyperbolic] = (np.sinh(s) - s) / s**3
+
+    zn = z[near]
+    c2[near] = 1 / 2 - zn / 24 + zn**2 / 720
+    c3[near] = 1 / 6 - zn / 120 + zn**2 / 5040
+    return c2, c3
+
+
+def _initial_guess(sqrt_k, r0, sigma0, alpha, dt):
+    # Elliptic guess, see [Vallado], bounded to keep the hyperbolic
+    # functions finite on the first iteration
+    chi = sqrt_k * dt * alpha
+    hyperbolic = alpha < 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = 1 / alpha
+        chi_hyperbolic = (
+            np.sign(dt)
+            * np.sqrt(-a)
+            * np.log(
+                -2 * sqrt_k**2 * alpha * dt
+                / (sigma0 * sqrt_k + np.sign(dt) * np.sqrt(-sqrt_k**2 * a) * (1 - r0 * alpha))
+            )
+        )
+    chi = np.where(hyperbolic & np.isfinite(chi_hyperbolic), chi_hyperbolic, chi)
+    # Near parabolic orbits start from the circular guess
+    return np.where(np.abs(alpha) < 1e-12, sqrt_k * dt / r0, chi)
+
+
+def propagate(k, r0, v0, dt, numiter=50, rtol=1e-12):
+    """Propagate many two-body states at once.
+
+    Parameters
+    ----------
+    k : float
+        Gravitational parameter of the attractor, in km3 / s2.
+    r0, v0 : numpy.ndarray
+        Initial positions and velocities, in km and km / s, with a trailing
+        axis of size three.
+    dt : numpy.ndarray
+        Times of flight in seconds, broadcastable with the initial states.
+    numiter : int
+        Maximum number of iterations.
+    rtol : float
+        Relative tolerance on the universal anomaly.
+
+    Returns
+    -------
+    r, v : numpy.ndarray
+        Positions and velocities with the broadcast shape of the inputs and a
+        trailing axis of size three. Problems which do not converge are NaN.
+
+    """
+    dt = np.asarray(dt, dtype=float)
+    shape = np.broadcast_shapes(np.shape(r0)[:-1], np.shape(v0)[:-1], dt.shape)
+    r0 = np.broadcast_to(r0, shape + (3,)).reshape(-1, 3)
+    v0 = np.broadcast_to(v0, shape + (3,)).reshape(-1, 3)
+    dt = np.broadcast_to(dt, shape).ravel()
+
+    sqrt_k = np.sqrt(k)
+    r0_norm = np.linalg.norm(r0, axis=-1)
+    sigma0 = np.einsum("ij,ij->i", r0, v0) / sqrt_k
+    alpha = 2 / r0_norm - np.einsum("ij,ij->i", v0, v0) / k
+
+    chi = _initial_guess(sqrt_k, r0_norm, sigma0, alpha, dt)
+    converged = dt == 0
+    chi[converged] = 0.0
+    active = np.flatnonzero(~converged)
+
+    # Laguerre-Conway iterations of the universal Kepler equation F(chi) = 0
+    n = 5
+    for _ in range(numiter):
+        if active.size == 0:
+            break
+        x, a, s0, r0a = chi[active], alpha[active], sigma0[active], r0_norm[active]
+        z = a * x**2
+        c2, c3 = _stumpff(z)
+        F = x**3 * c3 + s0 * x**2 * c2 + r0a * x * (1 - z * c3) - sqrt_k * dt[active]
+        dF = x**2 * c2 + s0 * x * (1 - z * c3) + r0a * (1 - z * c2)
+        ddF = s0 * (1 - z * c2) + (1 - a * r0a) * x * (1 - z * c3)
+        with np.errstate(invalid="ignore"):
+            root = np.sqrt(np.abs((n - 1) ** 2 * dF**2 - n * (n - 1) * F * ddF))
+        step = n * F / (dF + np.sign(dF) * root)
+
+        chi[active] = x - step
+        done = np.abs(step) <= rtol * np.maximum(1.0, np.abs(x))
+        converged[active[done]] = True
+        active = active[~done & np.isfinite(step)]
+
+    # Lagrange coefficients
+    chi = np.where(converged, chi, np.nan)
+    z = alpha * chi**2
+    c2, c3 = _stumpff(np.nan_to_num(z))
+    f = 1 - chi**2 / r0_norm * c2
+    g = dt - chi**3 / sqrt_k * c3
+    r = f[:, np.newaxis] * r0 + g[:, np.newaxis] * v0
+    r_norm = np.linalg.norm(r, axis=-1)
+    fdot = sqrt_k / (r_norm * r0_norm) * chi * (z * c3 - 1)
+    gdot = 1 - chi**2 / r_norm * c2
+    v = fdot[:, np.newaxis] * r0 + gdot[:, np.newaxis] * v0
+    return r.reshape(shape + (3,)), v.reshape(shape + (3,))
+
+
+def sample_arcs(k, r1, v1, tof, num=1000):
+    """Positions along many arcs at evenly spaced times of flight.
+
+    Parameters
+    ----------
+    k : float
+        Gravitational parameter of the attractor, in km3 / s2.
+    r1, v1 : numpy.ndarray
+        (M, 3) initial states of the arcs, in km and km / s.
+    tof : numpy.ndarray
+        (M,) times of flight of the arcs, in seconds.
+    num : int
+        Number of samples per arc, both ends included.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (M, num, 3) array of positions in km.
+
+    """
+    fractions = np.linspace(0, 1, num)
+    dt = np.asarray(tof, dtype=float)[:, np.newaxis] * fractions
+    r, _ = propagate(k, r1[:, np.newaxis, :], v1[:, np.newaxis, :], dt)
+    return r
+
+
+def transfer_arcs(
+    departure_body, target_body, launch, arrival, num=1000, prograde=True, attractor=Sun
+):
+    """Sample the direct transfers between pairs of launch and arrival epochs.
+
+    Every arc is sampled at the same epochs as ``time_range(launch,
+    end=arrival, num_values=num)``, which replaces applying each Lambert
+    maneuver to an orbit and sampling it with ``to_ephem``.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies, or any object with an
+        ``rv(epochs)`` method.
+    launch, arrival : ~astropy.time.Time
+        Launch and arrival epochs of the M transfers, for instance those of
+        the windows found by :func:`tfm.windows.best_windows`.
+    num : int
+        Number of samples per arc.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+
+    Returns
+    -------
+    ~astropy.units.Quantity
+        A (M, num, 3) array of positions.
+
+    """
+    launch, arrival = launch.reshape(-1), arrival.reshape(-1)
+    r_departure, _ = sample_states(departure_body, launch)
+    r_target, _ = sample_states(target_body, arrival)
+    k = attractor.k.to_value(u.km**3 / u.s**2)
+    tof = (arrival.tdb.jd1 - launch.tdb.jd1 + arrival.tdb.jd2 - launch.tdb.jd2) * 86400
+
+    ((v1, _),) = izzo_branches(k, r_departure, r_target, tof, (prograde,))
+    return sample_arcs(k, r_departure, v1, tof, num) << u.km
@@ -0,0 +1,168 @@
+"""Ephemerides of the Sun - (Earth + Moon barycenter) Lagrange points.
+
+The points are computed from the Sun, Earth and Moon tables under bin/ephem
+assuming the instantaneous geometry of the circular restricted three-body
+problem: the collinear points lie along the Sun - EMB line and the triangular
+ones sixty degrees ahead and behind the EMB, all of them scaled with the actual
+Sun - EMB distance. Everything is vectorized over the epochs, so the tables
+can be regenerated at any cadence in a fraction of a second.
+
+"""
+from pathlib import Path
+
+from astropy import units as u
+import numpy as np
+
+from poliastro.bodies import Earth, Moon, Sun
+
+from tfm.ephem import write_table
+from tfm.interpolation import HermiteEphem
+
+
+LAGRANGE_DIR = Path("dat/lagrange")
+"""Directory where the generated Lagrange point tables are written."""
+
+LABELS = ("L1", "L2", "L3", "L4", "L5")
+
+
+def mass_parameter(k_primary, k_secondary):
+    """Mass parameter of the restricted three-body problem."""
+    return k_secondary / (k_primary + k_secondary)
+
+
+def collinear_points(mu):
+    """Position of L1, L2 and L3 along the primaries axis.
+
+    Positions are measured from the barycenter in units of the distance
+    between primaries, with the secondary body located at ``1 - mu``.
+
+    """
+    quintics = {
+        "L1": [1, -(3 - mu), 3 - 2 * mu, -mu, 2 * mu, -mu],
+        "L2": [1, 3 - mu, 3 - 2 * mu, -mu, -2 * mu, -mu],
+        "L3": [1, 2 + mu, 1 + 2 * mu, -(1 - mu), -2 * (1 - mu), -(1 - mu)],
+    }
+    gammas = {}
+    for label, coefficients in quintics.items():
+        roots = np.roots(coefficients)
+        real = roots[(np.abs(roots.imag) < 1e-12) & (roots.real > 0)].real
+        gammas[label] = real.min()
+
+    return np.array(
+        [
+            1 - mu - gammas["L1"],
+            1 - mu + gammas["L2"],
+            -mu - gammas["L3"],
+        ]
+    )
+
+
+def lagrange_points(primary_r, primary_v, secondary_r, secondary_v, mu):
+    """Positions and velocities of the five Lagrange points.
+
+    Parameters
+    ----------
+    primary_r, primary_v : numpy.ndarray
+        (N, 3) states of the primary body in km and km / s.
+    secondary_r, secondary_v : numpy.ndarray
+        (N, 3) states of the secondary body in km and km / s.
+    mu : float
+        Mass parameter of the system.
+
+    Returns
+    -------
+    r, v : numpy.ndarray
+        Arrays of shape (5, N, 3) holding the states of L1 to L5.
+
+    """
+    r_rel = secondary_r - primary_r
+    v_rel = secondary_v - primary_v
+    h = np.cross(r_rel, v_rel)
+    h_hat = h / np.linalg.norm(h, axis=-1, keepdims=True)
+
+    # In-plane directions scaled with the actual distance between primaries
+    x_axis = r_rel
+    y_axis = np.cross(h_hat, r_rel)
+
+    # Neglecting the rotation of the orbital plane, the time derivative of
+    # the scaled y-axis is h_hat x v_rel
+    x_axis_dot = v_rel
+    y_axis_dot = np.cross(h_hat, v_rel)
+
+    x_coordinates = np.append(collinear_points(mu), [0.5 - mu, 0.5 - mu])
+    y_coordinates = np.array([0, 0, 0, np.sqrt(3) / 2, -np.sqrt(3) / 2])
+
+    barycenter_r = primary_r + mu * r_rel
+    barycenter_v = primary_v + mu * v_rel
+
+    x = x_coordinates[:, np.newaxis, np.newaxis]
+    y = y_coordinates[:, np.newaxis, np.newaxis]
+    r = barycenter_r + x * x_axis + y * y_axis
+    v = barycenter_v + x * x_axis_dot + y * y_axis_dot
+    return r, v
+
+
+def sun_emb_lagrange_points(
+    jd,
+    sun_path="bin/ephem/sun.csv",
+    earth_path="bin/ephem/earth.csv",
+    moon_path="bin/ephem/moon.csv",
+):
+    """States of the Sun - (Earth + Moon barycenter) Lagrange points.
+
+    Parameters
+    ----------
+    jd : numpy.ndarray
+        Julian dates (TDB) at which the points are computed. Any cadence is
+        allowed, the body states are interpolated when required.
+
+    Returns
+    -------
+    r, v : numpy.ndarray
+        Arrays of shape (5, N, 3) holding the states of L1 to L5 in km and
+        km / s.
+
+    """
+    (sun_r, sun_v), (earth_r, earth_v), (moon_r, moon_v) = (
+        HermiteEphem.from_csv(path).rv_jd(jd)
+        for path in (sun_path, earth_path, moon_path)
+    )
+
+    k_earth = Earth.k.to_value(u.km**3 / u.s**2)
+    k_moon = Moon.k.to_value(u.km**3 / u.s**2)
+    k_sun = Sun.k.to_value(u.km**3 / u.s**2)
+
+    emb_r = (k_earth * earth_r + k_moon * moon_r) / (k_earth + k_moon)
+    emb_v = (k_earth * earth_v + k_moon * moon_v) / (k_earth + k_moon)
+    mu = mass_parameter(k_sun, k_earth + k_moon)
+    return lagrange_points(sun_r, sun_v, emb_r, emb_v, mu)
+
+
+def generate_lagrange_tables(start, end, step=1 * u.day, directory=LAGRANGE_DIR):
+    """Write the Sun - EMB Lagrange point tables for a time span.
+
+    Parameters
+    ----------
+    start, end : ~astropy.time.Time
+        Time span covered by the tables.
+    step : ~astropy.units.Quantity
+        Cadence of the tables.
+    directory : str
+        Destination of the ``semb-l1.npy`` to ``semb-l5.npy`` binary tables,
+        which can be loaded back with :func:`tfm.ephem.load_ephem`.
+
+    Returns
+    -------
+    dict
+        Path of the table written for each one of the points.
+
+    """
+    step = step.to_value(u.day)
+    jd_start, jd_end = start.tdb.jd, end.tdb.jd
+    jd = jd_start + step * np.arange(int(np.floor((jd_end - jd_start) / step + 1e-9)) + 1)
+
+    r, v = sun_emb_lagrange_points(jd)
+    return {
+        label: write_table(Path(directory) / f"semb-{label.lower()}.npy", jd, r_i, v_i)
+        for label, r_i, v_i in zip(LABELS, r, v)
+    }
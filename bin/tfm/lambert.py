@@ -0,0 +1,421 @@
+"""Izzo's algorithm for the Lambert problem, vectorized over many problems.
+
+This is an array translation of ``poliastro.core.iod.izzo`` restricted to
+single-revolution transfers, which are the only ones drawn in the porkchops.
+Every input may hold any number of independent problems: the Householder
+iterations run on all of them at once, while a per-problem convergence mask
+drops the solved ones from the following iterations.
+
+"""
+import numpy as np
+
+
+def _norm(vector):
+    return np.linalg.norm(vector, axis=-1)
+
+
+def _hyp2f1b(x):
+    """Hypergeometric function 2F1(3, 1, 5/2, x), see [Battin]."""
+    res = np.ones_like(x)
+    term = np.ones_like(x)
+    ii = 0
+    while True:
+        term = term * (3 + ii) * (1 + ii) / (5 / 2 + ii) * x / (ii + 1)
+        res_old = res
+        res = res + term
+        if np.all(res_old == res):
+            break
+        ii += 1
+    return np.where(x >= 1.0, np.inf, res)
+
+
+def _compute_y(x, ll):
+    return np.sqrt(1 - ll**2 * (1 - x**2))
+
+
+def _compute_psi(x, y, ll):
+    elliptic = (-1 <= x) & (x < 1)
+    hyperbolic = x > 1
+    with np.errstate(invalid="ignore"):
+        psi_elliptic = np.arccos(np.clip(x * y + ll * (1 - x**2), -1, 1))
+        psi_hyperbolic = np.arcsinh((y - x * ll) * np.sqrt(x**2 - 1))
+    return np.where(elliptic, psi_elliptic, np.where(hyperbolic, psi_hyperbolic, 0.0))
+
+
+def _tof_equation_y(x, y, T0, ll):
+    # Battin's series is used close to the parabolic case
+    near_parabolic = (np.sqrt(0.6) < x) & (x < np.sqrt(1.4))
+
+    T_ = np.empty_like(x)
+    if np.any(near_parabolic):
+        xs, ys, lls = x[near_parabolic], y[near_parabolic], ll[near_parabolic]
+        eta = ys - lls * xs
+        S_1 = (1 - lls - xs * eta) * 0.5
+        Q = 4 / 3 * _hyp2f1b(S_1)
+        T_[near_parabolic] = (eta**3 * Q + 4 * lls * eta) * 0.5
+
+    far = ~near_parabolic
+    if np.any(far):
+        xs, ys, lls = x[far], y[far], ll[far]
+        psi = _compute_psi(xs, ys, lls)
+        T_[far] = (psi / np.sqrt(np.abs(1 - xs**2)) - xs + lls * ys) / (1 - xs**2)
+
+    return T_ - T0
+
+
+def _tof_equation_p(x, y, T, ll):
+    return (3 * T * x - 2 + 2 * ll**3 * x / y) / (1 - x**2)
+
+
+def _tof_equation_p2(x, y, T, dT, ll):
+    return (3 * T + 5 * x * dT + 2 * (1 - ll**2) * ll**3 / y**3) / (1 - x**2)
+
+
+def _tof_equation_p3(x, y, _, dT, ddT, ll):
+    return (7 * x * ddT + 8 * dT - 6 * (1 - ll**2) * ll**5 * x / y**5) / (1 - x**2)
+
+
+def _initial_guess(T, ll):
+    """Single revolution initial guess, see [Izzo 2015]."""
+    T_0 = np.arccos(ll) + ll * np.sqrt(1 - ll**2)  # Equation 19
+    T_1 = 2 * (1 - ll**3) / 3  # Equation 21
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_long = (T_0 / T) ** (2 / 3) - 1
+        x_short = 5 / 2 * T_1 / T * (T_1 - T) / (1 - ll**5) + 1
+        x_mid = np.exp(np.log(2) * np.log(T / T_0) / np.log(T_1 / T_0)) - 1
+    return np.where(T >= T_0, x_long, np.where(T < T_1, x_short, x_mid))
+
+
+def _householder(x0, T0, ll, rtol, numiter):
+    """Batched Householder iterations with a per-problem convergence mask.
+
+    Returns the solution, the number of iterations used by each problem and
+    whether each problem converged. Problems which do not converge within
+    ``numiter`` iterations are reported through the mask instead of raising.
+
+    """
+    x = x0.copy()
+    iterations = np.zeros(x.shape, dtype=np.int32)
+    converged = np.zeros(x.shape, dtype=bool)
+    active = np.flatnonzero(np.isfinite(x))
+
+    for _ in range(numiter):
+        if active.size == 0:
+            break
+        p0, T, lla = x[active], T0[active], ll[active]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y = _compute_y(p0, lla)
+            fval = _tof_equation_y(p0, y, T, lla)
+            T_ = fval + T
+            fder = _tof_equation_p(p0, y, T_, lla)
+            fder2 = _tof_equation_p2(p0, y, T_, fder, lla)
+            fder3 = _tof_equation_p3(p0, y, T_, fder, fder2, lla)
+
+            # Householder step (quartic)
+            p = p0 - fval * (
+                (fder**2 - fval * fder2 / 2)
+                / (fder * (fder**2 - fval * fder2) + fder3 * fval**2 / 6)
+            )
+
+        x[active] = p
+        iterations[active] += 1
+        done = np.abs(p - p0) < rtol
+        converged[active[done]] = True
+        # Diverging problems are dropped as well, they stay unconverged
+        active = active[~done & np.isfinite(p)]
+
+    return x, iterations, converged
+
+
+def _reconstruct(x, y, r1, r2, ll, gamma, rho, sigma):
+    """Reconstruct the radial and tangential velocity components."""
+    V_r1 = gamma * ((ll * y - x) - rho * (ll * y + x)) / r1
+    V_r2 = -gamma * ((ll * y - x) + rho * (ll * y + x)) / r2
+    V_t1 = gamma * sigma * (y + ll * x) / r1
+    V_t2 = gamma * sigma * (y + ll * x) / r2
+    return V_r1, V_r2, V_t1, V_t2
+
+
+def _geometry(k, r1, r2, tof):
+    """Direction independent part of the Lambert problems setup."""
+    r1, r2 = np.broadcast_arrays(np.asarray(r1, dtype=float), np.asarray(r2, dtype=float))
+    shape = np.broadcast_shapes(r1.shape[:-1], np.shape(tof))
+    r1 = np.broadcast_to(r1, shape + (3,)).reshape(-1, 3)
+    r2 = np.broadcast_to(r2, shape + (3,)).reshape(-1, 3)
+    tof = np.broadcast_to(np.asarray(tof, dtype=float), shape).ravel()
+
+    # Chord
+    c = r2 - r1
+    c_norm, r1_norm, r2_norm = _norm(c), _norm(r1), _norm(r2)
+
+    # Semiperimeter
+    s = (r1_norm + r2_norm + c_norm) * 0.5
+
+    # Versors
+    i_r1, i_r2 = r1 / r1_norm[:, None], r2 / r2_norm[:, None]
+    i_h = np.cross(i_r1, i_r2)
+    i_h_norm = _norm(i_h)
+    valid = (tof > 0) & (i_h_norm > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        i_h = i_h / i_h_norm[:, None]
+
+    # Geometry of the problem
+    ll = np.sqrt(1 - np.minimum(1.0, c_norm / s))
+
+    # Compute the fundamental tangential directions
+    retrograde_plane = i_h[:, 2] < 0
+    ll = np.where(retrograde_plane, -ll, ll)
+    sign = np.where(retrograde_plane, 1.0, -1.0)[:, None]
+    i_t1 = sign * np.cross(i_r1, i_h)
+    i_t2 = sign * np.cross(i_r2, i_h)
+
+    # Non dimensional time of flight
+    with np.errstate(invalid="ignore"):
+        T = np.sqrt(2 * k / s**3) * tof
+
+    # Reconstruction constants
+    gamma = np.sqrt(k * s / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = (r1_norm - r2_norm) / c_norm
+    sigma = np.sqrt(1 - rho**2)
+
+    return dict(
+        shape=shape,
+        r1_norm=r1_norm,
+        r2_norm=r2_norm,
+        i_r1=i_r1,
+        i_r2=i_r2,
+        i_t1=i_t1,
+        i_t2=i_t2,
+        ll=ll,
+        T=T,
+        valid=valid,
+        gamma=gamma,
+        rho=rho,
+        sigma=sigma,
+    )
+
+
+class IterationCounter:
+    """Tally of the Householder iterations spent on Lambert problems.
+
+    Only the valid problems are counted, those with a positive time of flight
+    and non-collinear position vectors.
+
+    """
+
+    def __init__(self):
+        self.problems = 0
+        self.iterations = 0
+        self.warm_starts = 0
+
+    def add(self, iterations, warm):
+        """Count a batch of problems and whether each one was warm started."""
+        self.problems += iterations.size
+        self.iterations += int(iterations.sum())
+        self.warm_starts += int(np.count_nonzero(warm))
+
+    def merge(self, other):
+        """Add the tally of another counter to this one."""
+        self.problems += other.problems
+        self.iterations += other.iterations
+        self.warm_starts += other.warm_starts
+
+    @property
+    def cold_starts(self):
+        """Number of problems started from the default initial guess."""
+        return self.problems - self.warm_starts
+
+    @property
+    def mean_iterations(self):
+        """Average number of iterations per problem."""
+        return self.iterations / self.problems if self.problems else 0.0
+
+    def __repr__(self):
+        return (
+            f"IterationCounter(problems={self.problems}, "
+            f"mean_iterations={self.mean_iterations:.2f}, "
+            f"warm_starts={self.warm_starts}, cold_starts={self.cold_starts})"
+        )
+
+
+def _solve(g, directions, numiter, rtol, guess=None, counter=None):
+    """Solve a set up batch of problems in several directions.
+
+    Returns the ``(v1, v2)`` velocities of each direction together with the
+    ``(x, ll)`` parameters reached, which can seed a neighbouring batch
+    through ``guess``. Seeds are only used when the sign of ``ll`` matches,
+    as a flip means that the transfer angle crossed 180 degrees.
+
+    """
+    size = g["ll"].size
+
+    # Correct transfer angle parameter and tangential vectors if required
+    flips = np.array([1.0 if prograde else -1.0 for prograde in directions])
+    ll = (flips[:, None] * g["ll"]).ravel()
+    T = np.tile(g["T"], len(directions))
+    valid = np.tile(g["valid"], len(directions))
+
+    # Find solutions
+    x_cold = np.where(valid, _initial_guess(T, ll), np.nan)
+    warm = np.zeros(x_cold.shape, dtype=bool)
+    if guess is not None:
+        x_guess, ll_guess = guess
+        warm = valid & np.isfinite(x_guess) & (np.sign(ll_guess) == np.sign(ll))
+    x, iterations, converged = _householder(
+        np.where(warm, x_guess if guess is not None else x_cold, x_cold), T, ll, rtol, numiter
+    )
+
+    # Fall back to a cold start when a seed did not converge
+    retry = np.flatnonzero(warm & ~converged)
+    if retry.size:
+        x[retry], extra, converged[retry] = _householder(
+            x_cold[retry], T[retry], ll[retry], rtol, numiter
+        )
+        iterations[retry] += extra
+    if counter is not None:
+        counter.add(iterations[valid], warm[valid])
+    y = _compute_y(x, ll)
+
+    solutions = []
+    for index, flip in enumerate(flips):
+        branch = slice(index * size, (index + 1) * size)
+        xb, yb, llb = x[branch], y[branch], ll[branch]
+
+        # Compute the radial and tangential components at r0 and r
+        V_r1, V_r2, V_t1, V_t2 = _reconstruct(
+            xb, yb, g["r1_norm"], g["r2_norm"], llb, g["gamma"], g["rho"], g["sigma"]
+        )
+
+        # Solve for the initial and final velocity
+        v1 = V_r1[:, None] * g["i_r1"] + V_t1[:, None] * flip * g["i_t1"]
+        v2 = V_r2[:, None] * g["i_r2"] + V_t2[:, None] * flip * g["i_t2"]
+
+        ok = (valid[branch] & converged[branch])[:, None]
+        v1 = np.where(ok, v1, np.nan)
+        v2 = np.where(ok, v2, np.nan)
+        solutions.append((v1.reshape(g["shape"] + (3,)), v2.reshape(g["shape"] + (3,))))
+
+    return solutions, (np.where(valid & converged, x, np.nan), ll)
+
+
+def izzo_branches(
+    k, r1, r2, tof, directions=(True, False), numiter=35, rtol=1e-8, counter=None
+):
+    """Solve many Lambert problems for several transfer directions at once.
+
+    The geometry of the problems, which does not depend on the direction of
+    the transfer, is set up only once. The Householder iterations of all the
+    directions then run as a single batch.
+
+    Parameters
+    ----------
+    directions : tuple
+        Directions to be solved, ``True`` standing for prograde transfers and
+        ``False`` for retrograde ones.
+    counter : IterationCounter
+        Optional counter of the iterations spent.
+
+    See :func:`izzo` for the rest of parameters.
+
+    Returns
+    -------
+    list
+        The ``(v1, v2)`` velocities of each one of the directions, in order.
+
+    """
+    solutions, _ = _solve(_geometry(k, r1, r2, tof), directions, numiter, rtol, counter=counter)
+    return solutions
+
+
+def izzo_continuation(
+    k, r1, r2, tof, directions=(True, False), numiter=35, rtol=1e-8, counter=None
+):
+    """Solve a grid of Lambert problems by continuation along its last axis.
+
+    Neighbouring problems along a porkchop row are almost identical, so their
+    solutions are good initial guesses for each other. Instead of sweeping the
+    row one cell at a time, which would serialize the whole grid, the slices
+    of the last axis are solved by successive halving: a few slices are
+    solved from the default initial guess, and each following batch of
+    slices, halfway between already solved ones, starts from the mean of its
+    two neighbours. Problems whose transfer angle crossed 180 degrees with
+    respect to their neighbours, or whose seed does not converge, fall back
+    to the default initial guess.
+
+    Parameters and returns are the same as in :func:`izzo_branches`.
+
+    """
+    r1, r2 = np.broadcast_arrays(np.asarray(r1, dtype=float), np.asarray(r2, dtype=float))
+    shape = np.broadcast_shapes(r1.shape[:-1], np.shape(tof))
+    r1 = np.broadcast_to(r1, shape + (3,))
+    r2 = np.broadcast_to(r2, shape + (3,))
+    tof = np.broadcast_to(np.asarray(tof, dtype=float), shape)
+
+    size = shape[-1]
+    x = np.full((len(directions),) + shape, np.nan)
+    ll = np.zeros((len(directions),) + shape)
+    v1 = np.empty((len(directions),) + shape + (3,))
+    v2 = np.empty((len(directions),) + shape + (3,))
+
+    def solve(columns, guess=None):
+        g = _geometry(k, r1[..., columns, :], r2[..., columns, :], tof[..., columns])
+        solutions, (x_solved, ll_solved) = _solve(g, directions, numiter, rtol, guess, counter)
+        x[..., columns] = x_solved.reshape(x[..., columns].shape)
+        ll[..., columns] = ll_solved.reshape(ll[..., columns].shape)
+        for index, (v1_solved, v2_solved) in enumerate(solutions):
+            v1[index][..., columns, :] = v1_solved
+            v2[index][..., columns, :] = v2_solved
+
+    # Coarsest slices, from the default initial guess
+    step = 1 << max((size - 1).bit_length() - 1, 0)
+    solve(np.unique([0, min(step, size - 1)]))
+
+    while step > 1:
+        step //= 2
+        columns = np.arange(step, size, 2 * step)
+        if columns.size == 0:
+            continue
+        right = np.minimum(columns + step, size - 1)
+        x_left, ll_left = x[..., columns - step], ll[..., columns - step]
+        x_right = np.where(columns + step < size, x[..., right], np.nan)
+        ll_right = ll[..., right]
+
+        both = np.isfinite(x_left) & np.isfinite(x_right) & (np.sign(ll_left) == np.sign(ll_right))
+        x_guess = np.where(both, (x_left + x_right) / 2, np.where(np.isfinite(x_left), x_left, x_right))
+        ll_guess = np.where(np.isfinite(x_left), ll_left, ll_right)
+        solve(columns, (x_guess.ravel(), ll_guess.ravel()))
+
+    return list(zip(v1, v2))
+
+
+def izzo(k, r1, r2, tof, prograde=True, numiter=35, rtol=1e-8):
+    """Solve many single-revolution Lambert problems at once.
+
+    Parameters
+    ----------
+    k : float
+        Gravitational parameter of the attractor, in km3 / s2.
+    r1 : numpy.ndarray
+        Initial position vectors in km, with shape (..., 3).
+    r2 : numpy.ndarray
+        Final position vectors in km, broadcastable against ``r1``.
+    tof : numpy.ndarray
+        Times of flight in seconds, broadcastable against ``r1[..., 0]``.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    numiter : int
+        Maximum number of Householder iterations.
+    rtol : float
+        Tolerance on the Lambert ``x`` parameter.
+
+    Returns
+    -------
+    v1, v2 : numpy.ndarray
+        Initial and final velocities in km / s, with shape (..., 3). Problems
+        with a non-positive time of flight, collinear position vectors or not
+        converging are filled with NaN.
+
+    """
+    (v1, v2), = izzo_branches(k, r1, r2, tof, (prograde,), numiter=numiter, rtol=rtol)
+    return v1, v2
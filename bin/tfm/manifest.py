@@ -0,0 +1,72 @@
+"""Manifest of the generated figures and the inputs they were built from.
+
+Every saved figure is recorded under dat/figures.json together with a
+fingerprint hashing the source code of the pipeline that drew it, its
+ephemeris files and its parameters. A figure whose output still exists and
+whose fingerprint did not change is up to date and does not need to be drawn
+again, so rebuilds only run the jobs whose inputs changed.
+
+"""
+import hashlib
+from importlib import import_module
+import json
+from pathlib import Path
+
+from tfm.ephem import _write_atomic, file_hash
+
+
+MANIFEST_PATH = Path("dat/figures.json")
+"""File recording the fingerprint of each generated figure."""
+
+
+def source_hash(modules):
+    """Hash the source files of some modules, given by their names."""
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        digest.update(name.encode())
+        digest.update(file_hash(import_module(name).__file__).encode())
+    return digest.hexdigest()
+
+
+def fingerprint(**inputs):
+    """Hash some JSON serializable inputs, regardless of the order of keys."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+class FigureManifest:
+    """Fingerprints of the figures generated so far.
+
+    Parameters
+    ----------
+    path : str
+        JSON file holding the manifest, created on the first save.
+
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+        self._hashes = {}
+
+    def input_hash(self, path):
+        """Hash of an input file, computed once per manifest."""
+        if path not in self._hashes:
+            self._hashes[path] = file_hash(path)
+        return self._hashes[path]
+
+    def is_fresh(self, output, fingerprint):
+        """Whether an output exists and was built from the same inputs."""
+        return Path(output).exists() and self.entries.get(str(output)) == fingerprint
+
+    def record(self, output, fingerprint):
+        """Store the fingerprint of a saved output and write the manifest."""
+        self.entries[str(output)] = fingerprint
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(self.entries, indent=4, sort_keys=True)
+        _write_atomic(self.path, lambda file: file.write(text.encode()))
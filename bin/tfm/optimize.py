@@ -0,0 +1,226 @@
+"""Continuous optimization of direct transfers.
+
+A porkchop only locates the optimum transfer up to the size of its cells.
+Rather than refining the whole grid, the best cells of a coarse porkchop seed
+a bounded local optimizer over the launch and arrival epochs, which reaches
+sub-hour precision within a few tens of Lambert solves.
+
+"""
+from astropy import units as u
+from astropy.time import Time
+import numpy as np
+from scipy.optimize import minimize
+
+from poliastro.bodies import Sun
+
+from tfm.porkchop import UNITS, sample_states, transfer_costs
+
+
+OBJECTIVES = {
+    "c3_launch": (lambda costs: costs["c3_launch"], UNITS["c3_launch"]),
+    "dv_total": (lambda costs: costs["dv_launch"] + costs["dv_arrival"], u.km / u.s),
+    "avl": (lambda costs: costs["avl"], UNITS["avl"]),
+}
+"""Functions of the transfer costs which can be minimized, with their units."""
+
+
+class OptimalTransfer:
+    """Locally optimal direct transfer.
+
+    Parameters
+    ----------
+    launch, arrival : ~astropy.time.Time
+        Launch and arrival epochs.
+    costs : dict
+        Costs of the transfer in the units of :data:`tfm.porkchop.UNITS`.
+    objective : str
+        Name of the minimized objective.
+    evaluations : int
+        Number of Lambert problems solved by the optimizer.
+
+    """
+
+    def __init__(self, launch, arrival, costs, objective, evaluations):
+        self.launch = launch
+        self.arrival = arrival
+        self.costs = costs
+        self.objective = objective
+        self.evaluations = evaluations
+
+    @property
+    def value(self):
+        """Value of the minimized objective."""
+        function, unit = OBJECTIVES[self.objective]
+        return function(self.costs) << unit
+
+    @property
+    def tof(self):
+        """Time of flight of the transfer."""
+        return (self.arrival - self.launch).to(u.day)
+
+    def __repr__(self):
+        return (
+            f"OptimalTransfer({self.objective}={self.value:.4f}, "
+            f"launch={self.launch.iso}, arrival={self.arrival.iso})"
+        )
+
+
+def grid_seeds(porkchop, objective="c3_launch", count=1):
+    """Indices of the best local minima of a porkchop grid.
+
+    Parameters
+    ----------
+    porkchop : ~tfm.porkchop.Porkchop
+        Coarse porkchop to be searched.
+    objective : str
+        One of :data:`OBJECTIVES`.
+    count : int
+        Maximum number of seeds.
+
+    Returns
+    -------
+    list
+        The ``(i, j)`` launch and arrival indices of the seeds, best first.
+
+    """
+    function, _ = OBJECTIVES[objective]
+    values = function(porkchop.grids)
+    padded = np.pad(values, 1, constant_values=np.inf)
+
+    # Cells no worse than any of their eight neighbours
+    is_minimum = np.isfinite(values)
+    rows, columns = values.shape
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            if di or dj:
+                neighbour = padded[1 + di : 1 + di + rows, 1 + dj : 1 + dj + columns]
+                is_minimum &= ~(neighbour < values)
+
+    i, j = np.nonzero(is_minimum)
+    order = np.argsort(values[i, j])[:count]
+    return list(zip(i[order], j[order]))
+
+
+def optimize_transfer(
+    departure_body,
+    target_body,
+    porkchop,
+    objective="c3_launch",
+    count=1,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    maxiter=100,
+):
+    """Refine the best cells of a porkchop into locally optimal transfers.
+
+    Each seed is refined with a quasi-Newton search (L-BFGS-B) bounded by the
+    spans of the porkchop. The optimum usually lies at the bottom of a narrow
+    and slanted valley, which may leave the cells around the seed and along
+    which simplex searches tend to stall before reaching sub-hour precision.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies.
+    porkchop : ~tfm.porkchop.Porkchop
+        Coarse porkchop providing the seeds, solved with the same
+        ``prograde`` and ``escape_velocity``.
+    objective : str
+        One of :data:`OBJECTIVES`.
+    count : int
+        Maximum number of seeds to be refined.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+    maxiter : int
+        Maximum number of iterations per seed.
+
+    Returns
+    -------
+    list
+        The distinct :class:`OptimalTransfer` found from the seeds, best
+        first.
+
+    """
+    function, _ = OBJECTIVES[objective]
+    k = attractor.k.to_value(u.km**3 / u.s**2)
+    escape_velocity = escape_velocity.to_value(u.km / u.s)
+    jd_launch, jd_arrival = porkchop.launch_span.tdb.jd, porkchop.arrival_span.tdb.jd
+    lower = np.array([jd_launch.min(), jd_arrival.min()])
+    upper = np.array([jd_launch.max(), jd_arrival.max()])
+
+    # Steps are measured in grid cells
+    scale = np.array(
+        [np.ptp(jd_launch) / max(len(jd_launch) - 1, 1), np.ptp(jd_arrival) / max(len(jd_arrival) - 1, 1)]
+    )
+    scale = np.where(scale > 0, scale, 1.0)
+
+    # Transfers without a solution cost more than any cell of the porkchop,
+    # and more the farther they are from the seed, so that the finite
+    # differences stay finite and lead back to the valid region
+    values = function(porkchop.grids)
+    values = values[np.isfinite(values)]
+    penalty = 10 * (np.abs(values).max() if values.size else 1.0) + 1.0
+
+    def evaluate(x):
+        epochs = Time(x, format="jd", scale="tdb")
+        r_departure, v_departure = sample_states(departure_body, epochs[:1])
+        r_target, v_target = sample_states(target_body, epochs[1:])
+        costs = transfer_costs(
+            k,
+            x[0],
+            r_departure[0],
+            v_departure[0],
+            x[1],
+            r_target[0],
+            v_target[0],
+            prograde=prograde,
+            escape_velocity=escape_velocity,
+        )
+        return {name: float(value) for name, value in costs.items()}
+
+    transfers = []
+    for i, j in grid_seeds(porkchop, objective, count):
+        origin = np.array([jd_launch[i], jd_arrival[j]])
+        evaluations = 0
+
+        def cost(z):
+            nonlocal evaluations
+            evaluations += 1
+            value = function(evaluate(origin + z * scale))
+            return value if np.isfinite(value) else penalty * (1 + np.sum(z**2))
+
+        # Finite differences are taken well above the noise left by the
+        # tolerance of the Lambert solver
+        result = minimize(
+            cost,
+            np.zeros(2),
+            method="L-BFGS-B",
+            bounds=list(zip((lower - origin) / scale, (upper - origin) / scale)),
+            options=dict(eps=1e-6, ftol=1e-13, gtol=1e-9, maxiter=maxiter),
+        )
+        x = origin + result.x * scale
+        transfers.append(
+            OptimalTransfer(
+                Time(x[0], format="jd", scale="tdb"),
+                Time(x[1], format="jd", scale="tdb"),
+                evaluate(x),
+                objective,
+                evaluations,
+            )
+        )
+
+    # Seeds in the same valley end up at the same transfer
+    unique = []
+    for transfer in sorted(transfers, key=lambda transfer: function(transfer.costs)):
+        if all(
+            abs((transfer.launch - other.launch).to_value(u.h)) > 1
+            or abs((transfer.arrival - other.arrival).to_value(u.h)) > 1
+            for other in unique
+        ):
+            unique.append(transfer)
+    return unique
@@ -0,0 +1,197 @@
+"""Multi-core porkchop computation.
+
+The launch x arrival grid is split into rectangular tiles solved by a pool of
+worker processes. Results are written by the workers straight into
+shared-memory arrays, so no grid is ever pickled back to the parent process.
+Every cell goes through exactly the same computation as in a serial run,
+hence both produce identical results.
+
+"""
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+import os
+import sys
+
+import numpy as np
+
+from tfm.lambert import IterationCounter
+from tfm.porkchop import branch_grids, check_outputs
+
+
+_worker = {}
+
+
+def tiles(shape, tile_size):
+    """Split a grid into tiles of at most ``tile_size`` x ``tile_size`` cells."""
+    rows, columns = shape
+    return [
+        (i, min(i + tile_size, rows), j, min(j + tile_size, columns))
+        for i in range(0, rows, tile_size)
+        for j in range(0, columns, tile_size)
+    ]
+
+
+def print_progress(done, total, tile):
+    """Report the progress of a parallel porkchop in the standard error."""
+    i0, i1, j0, j1 = tile
+    print(
+        f"\rPorkchop tile [{i0}:{i1}, {j0}:{j1}] done ({done}/{total})",
+        end="\n" if done == total else "",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def _init_worker(
+    shm_name, shape, dtype, k, launch, target, directions, escape_velocity, warm_start, outputs
+):
+    shm = SharedMemory(name=shm_name)
+    _worker.update(
+        shm=shm,
+        out=np.ndarray(shape, dtype=dtype, buffer=shm.buf),
+        k=k,
+        launch=launch,
+        target=target,
+        directions=directions,
+        escape_velocity=escape_velocity,
+        warm_start=warm_start,
+        outputs=outputs,
+    )
+
+
+def _solve_tile(tile):
+    i0, i1, j0, j1 = tile
+    jd_launch, r_departure, v_departure = _worker["launch"]
+    jd_arrival, r_target, v_target = _worker["target"]
+    counter = IterationCounter()
+    branches = branch_grids(
+        _worker["k"],
+        jd_launch[i0:i1],
+        r_departure[i0:i1],
+        v_departure[i0:i1],
+        jd_arrival[j0:j1],
+        r_target[j0:j1],
+        v_target[j0:j1],
+        directions=_worker["directions"],
+        escape_velocity=_worker["escape_velocity"],
+        warm_start=_worker["warm_start"],
+        counter=counter,
+        outputs=_worker["outputs"],
+    )
+    for out, grids in zip(_worker["out"], branches):
+        for out_grid, name in zip(out, _worker["outputs"]):
+            out_grid[i0:i1, j0:j1] = grids[name]
+    return tile, counter
+
+
+def branch_grids_parallel(
+    k,
+    jd_launch,
+    r_departure,
+    v_departure,
+    jd_arrival,
+    r_target,
+    v_target,
+    directions=(True, False),
+    escape_velocity=0.0,
+    warm_start=False,
+    counter=None,
+    outputs=None,
+    dtype=np.float64,
+    workers=None,
+    tile_size=64,
+    progress=None,
+):
+    """Parallel version of :func:`tfm.porkchop.branch_grids`.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes, all the available cores by default.
+    tile_size : int
+        Number of launch and arrival epochs per tile side.
+    progress : callable
+        Called as ``progress(done, total, tile)`` each time a tile finishes,
+        for instance :func:`print_progress`.
+
+    See :func:`tfm.porkchop.branch_grids` for the rest of parameters.
+
+    """
+    workers = workers or os.cpu_count()
+    outputs = check_outputs(outputs)
+    dtype = np.dtype(dtype)
+    shape = (len(directions), len(outputs), len(jd_launch), len(jd_arrival))
+    grid_tiles = tiles(shape[2:], tile_size)
+
+    # Only the requested grids are shared, in the type they are stored with
+    shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        initargs = (
+            shm.name,
+            shape,
+            dtype,
+            k,
+            (jd_launch, r_departure, v_departure),
+            (jd_arrival, r_target, v_target),
+            tuple(directions),
+            escape_velocity,
+            warm_start,
+            outputs,
+        )
+        with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            results = pool.imap_unordered(_solve_tile, grid_tiles)
+            for done, (tile, tile_counter) in enumerate(results, 1):
+                if counter is not None:
+                    counter.merge(tile_counter)
+                if progress is not None:
+                    progress(done, len(grid_tiles), tile)
+        branches = [
+            {name: out[d, i].copy() for i, name in enumerate(outputs)}
+            for d in range(len(directions))
+        ]
+        del out
+    finally:
+        shm.close()
+        shm.unlink()
+    return branches
+
+
+def porkchop_grids_parallel(
+    k,
+    jd_launch,
+    r_departure,
+    v_departure,
+    jd_arrival,
+    r_target,
+    v_target,
+    prograde=True,
+    escape_velocity=0.0,
+    outputs=None,
+    dtype=np.float64,
+    workers=None,
+    tile_size=64,
+    progress=None,
+):
+    """Parallel version of :func:`tfm.porkchop.porkchop_grids`.
+
+    See :func:`branch_grids_parallel` for the parallelization parameters.
+
+    """
+    (grids,) = branch_grids_parallel(
+        k,
+        jd_launch,
+        r_departure,
+        v_departure,
+        jd_arrival,
+        r_target,
+        v_target,
+        directions=(prograde,),
+        escape_velocity=escape_velocity,
+        outputs=outputs,
+        dtype=dtype,
+        workers=workers,
+        tile_size=tile_size,
+        progress=progress,
+    )
+    return grids
@@ -0,0 +1,789 @@
+"""Porkchop grids solved as array operations.
+
+The whole launch x arrival grid is sampled and handed to the vectorized Lambert
+solver in a single call. Grids are stored as plain arrays in fixed units and
+only converted to quantities when accessed, while :class:`PorkchopPlotter`
+mirrors the interface of ``poliastro.plotting.porkchop.PorkchopPlotter`` so the
+scripts can swap one for the other.
+
+"""
+from astropy import units as u
+from contourpy import FillType, LineType, contour_generator
+import matplotlib as mpl
+from matplotlib import dates as mdates
+from matplotlib import patheffects
+from matplotlib import pyplot as plt
+from matplotlib.colors import BoundaryNorm, ListedColormap, Normalize
+from matplotlib.contour import ContourSet
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.lambert import izzo_branches, izzo_continuation
+from tfm.states import batch_rv
+
+
+UNITS = {
+    "c3_launch": u.km**2 / u.s**2,
+    "c3_arrival": u.km**2 / u.s**2,
+    "dv_launch": u.km / u.s,
+    "dv_arrival": u.km / u.s,
+    "avl": u.km / u.s,
+    "tof": u.day,
+}
+"""Units in which each one of the grids is stored."""
+
+CHUNK_SIZE = 2**18
+"""Number of cells solved at once when filling a grid."""
+
+
+def sample_states(body, span):
+    """Positions (km) and velocities (km / s) of a body along a time span."""
+    r, v = batch_rv(body, span)
+    return r.to_value(u.km), v.to_value(u.km / u.s)
+
+
+def check_outputs(outputs):
+    """Names of the requested grids in the order of :data:`UNITS`.
+
+    Parameters
+    ----------
+    outputs : iterable
+        Names of the grids, all of them when None.
+
+    """
+    if outputs is None:
+        return tuple(UNITS)
+    unknown = set(outputs) - set(UNITS)
+    if unknown:
+        raise ValueError(
+            f"Unknown outputs {', '.join(sorted(unknown))}, expected some of {', '.join(UNITS)}"
+        )
+    return tuple(name for name in UNITS if name in outputs)
+
+
+def _costs(tof, v1, v2, v_departure, v_target, escape_velocity, outputs=tuple(UNITS)):
+    costs = {}
+    if "c3_launch" in outputs or "dv_launch" in outputs:
+        # The launch impulse adds the escape from the departure body to the
+        # hyperbolic excess velocity, and the launch energy is its square
+        dv_launch = np.linalg.norm(v1 - v_departure, axis=-1) + escape_velocity
+        costs.update(c3_launch=dv_launch**2, dv_launch=dv_launch)
+    if {"c3_arrival", "dv_arrival", "avl"} & set(outputs):
+        avl = np.linalg.norm(v2 - v_target, axis=-1)
+        costs.update(c3_arrival=avl**2, dv_arrival=avl, avl=avl)
+    if "tof" in outputs:
+        costs["tof"] = np.where(np.isnan(v1[..., 0]), np.nan, tof)
+    return {name: costs[name] for name in outputs}
+
+
+def branch_costs(
+    k,
+    jd_launch,
+    r_departure,
+    v_departure,
+    jd_arrival,
+    r_target,
+    v_target,
+    directions=(True, False),
+    escape_velocity=0.0,
+    warm_start=False,
+    counter=None,
+    outputs=None,
+):
+    """Solve the direct transfers in several directions at once.
+
+    The geometry shared by all the directions is only set up once, see
+    :func:`tfm.lambert.izzo_branches`.
+
+    Parameters
+    ----------
+    directions : tuple
+        Directions to be solved, ``True`` standing for prograde transfers and
+        ``False`` for retrograde ones.
+    warm_start : bool
+        Whether to seed the Lambert iterations with the solutions of the
+        neighbouring transfers along the last axis, see
+        :func:`tfm.lambert.izzo_continuation`.
+    counter : tfm.lambert.IterationCounter
+        Optional counter of the Lambert iterations spent.
+    outputs : iterable
+        Names of the costs to be returned, all the ones listed in
+        :data:`UNITS` when None.
+
+    See :func:`transfer_costs` for the rest of parameters.
+
+    Returns
+    -------
+    list
+        The costs of each one of the directions, in order.
+
+    """
+    outputs = check_outputs(outputs)
+    tof = np.subtract(jd_arrival, jd_launch)
+    solve = izzo_continuation if warm_start else izzo_branches
+    solutions = solve(k, r_departure, r_target, tof * 86400, directions, counter=counter)
+    return [
+        _costs(tof, v1, v2, v_departure, v_target, escape_velocity, outputs)
+        for v1, v2 in solutions
+    ]
+
+
+def transfer_costs(
+    k,
+    jd_launch,
+    r_departure,
+    v_departure,
+    jd_arrival,
+    r_target,
+    v_target,
+    prograde=True,
+    escape_velocity=0.0,
+):
+    """Solve the direct transfers between pairs of launch and arrival states.
+
+    Parameters
+    ----------
+    k : float
+        Gravitational parameter of the attractor, in km3 / s2.
+    jd_launch, jd_arrival : numpy.ndarray
+        Julian dates (TDB) of launch and arrival, broadcastable together.
+    r_departure, v_departure : numpy.ndarray
+        States of the departure body at launch, in km and km / s, with a
+        trailing axis of size three.
+    r_target, v_target : numpy.ndarray
+        States of the target body at arrival, in km and km / s, with a
+        trailing axis of size three.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : float
+        Escape velocity from the departure body, in km / s.
+
+    Returns
+    -------
+    dict
+        The broadcast arrays listed in :data:`UNITS`, in those units.
+
+    """
+    (costs,) = branch_costs(
+        k,
+        jd_launch,
+        r_departure,
+        v_departure,
+        jd_arrival,
+        r_target,
+        v_target,
+        directions=(prograde,),
+        escape_velocity=escape_velocity,
+    )
+    return costs
+
+
+def branch_grids(
+    k,
+    jd_launch,
+    r_departure,
+    v_departure,
+    jd_arrival,
+    r_target,
+    v_target,
+    directions=(True, False),
+    escape_velocity=0.0,
+    warm_start=False,
+    counter=None,
+    outputs=None,
+    dtype=np.float64,
+):
+    """Solve a launch x arrival grid in several directions at once.
+
+    Same as :func:`porkchop_grids`, but returning the grids of each one of
+    the ``directions`` in a list. See :func:`branch_costs` for the
+    ``warm_start``, ``counter`` and ``outputs`` parameters, the continuation
+    running along the arrival axis.
+
+    The grid is solved in blocks of launch epochs holding about
+    :data:`CHUNK_SIZE` cells, so the intermediate arrays of the solver never
+    span the whole grid and only the requested grids are allocated, with the
+    ``dtype`` in which they are stored.
+
+    """
+    outputs = check_outputs(outputs)
+    shape = (len(jd_launch), len(jd_arrival))
+    branches = [{name: np.empty(shape, dtype=dtype) for name in outputs} for _ in directions]
+    rows = max(1, CHUNK_SIZE // max(1, shape[1]))
+    for i in range(0, shape[0], rows):
+        chunk = slice(i, i + rows)
+        solved = branch_costs(
+            k,
+            jd_launch[chunk, np.newaxis],
+            r_departure[chunk, np.newaxis, :],
+            v_departure[chunk, np.newaxis, :],
+            jd_arrival[np.newaxis, :],
+            r_target[np.newaxis, :, :],
+            v_target[np.newaxis, :, :],
+            directions=directions,
+            escape_velocity=escape_velocity,
+            warm_start=warm_start,
+            counter=counter,
+            outputs=outputs,
+        )
+        for grids, costs in zip(branches, solved):
+            for name, grid in grids.items():
+                grid[chunk] = costs[name]
+    return branches
+
+
+def porkchop_grids(
+    k,
+    jd_launch,
+    r_departure,
+    v_departure,
+    jd_arrival,
+    r_target,
+    v_target,
+    prograde=True,
+    escape_velocity=0.0,
+    outputs=None,
+    dtype=np.float64,
+):
+    """Solve a launch x arrival grid of Lambert problems.
+
+    Parameters
+    ----------
+    k : float
+        Gravitational parameter of the attractor, in km3 / s2.
+    jd_launch, jd_arrival : numpy.ndarray
+        Julian dates (TDB) of the launch and arrival axes.
+    r_departure, v_departure : numpy.ndarray
+        (N, 3) states of the departure body at launch, in km and km / s.
+    r_target, v_target : numpy.ndarray
+        (M, 3) states of the target body at arrival, in km and km / s.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : float
+        Escape velocity from the departure body, in km / s.
+    outputs : iterable
+        Names of the grids to be solved, all the ones listed in
+        :data:`UNITS` when None.
+    dtype : numpy.dtype
+        Type in which the grids are stored, for instance ``np.float32`` to
+        halve their memory.
+
+    Returns
+    -------
+    dict
+        The requested (N, M) grids listed in :data:`UNITS`, in those units.
+
+    """
+    (grids,) = branch_grids(
+        k,
+        jd_launch,
+        r_departure,
+        v_departure,
+        jd_arrival,
+        r_target,
+        v_target,
+        directions=(prograde,),
+        escape_velocity=escape_velocity,
+        outputs=outputs,
+        dtype=dtype,
+    )
+    return grids
+
+
+class Porkchop:
+    """Results of a porkchop computation.
+
+    Parameters
+    ----------
+    launch_span, arrival_span : ~astropy.time.Time
+        Axes of the grid.
+    grids : dict
+        Arrays with shape (len(launch_span), len(arrival_span)) stored in the
+        units listed in :data:`UNITS`, possibly only some of them.
+
+    """
+
+    def __init__(self, launch_span, arrival_span, grids):
+        self.launch_span = launch_span
+        self.arrival_span = arrival_span
+        self.grids = grids
+
+    def _quantity(self, name):
+        if name not in self.grids:
+            raise KeyError(f"The {name} grid was not solved, add it to the outputs of the porkchop")
+        # Views of the stored arrays, converted only when plotted
+        return self.grids[name] << UNITS[name]
+
+    @property
+    def c3_launch(self):
+        """Launch energy."""
+        return self._quantity("c3_launch")
+
+    @property
+    def c3_arrival(self):
+        """Arrival energy."""
+        return self._quantity("c3_arrival")
+
+    @property
+    def dv_launch(self):
+        """Launch impulse, escape from the departure body included."""
+        return self._quantity("dv_launch")
+
+    @property
+    def dv_arrival(self):
+        """Arrival impulse."""
+        return self._quantity("dv_arrival")
+
+    @property
+    def avl(self):
+        """Hyperbolic excess velocity at arrival."""
+        return self._quantity("avl")
+
+    @property
+    def tof(self):
+        """Time of flight."""
+        return self._quantity("tof")
+
+    def argmin(self, name):
+        """Launch and arrival indices of the minimum of a grid."""
+        return np.unravel_index(np.nanargmin(self.grids[name]), self.grids[name].shape)
+
+    @property
+    def c3_launch_min(self):
+        """Lowest launch energy of the grid."""
+        return self.c3_launch[self.argmin("c3_launch")]
+
+    @property
+    def launch_date_at_c3_launch_min(self):
+        """Launch date of the lowest launch energy transfer."""
+        return self.launch_span[self.argmin("c3_launch")[0]]
+
+    @property
+    def arrival_date_at_c3_launch_min(self):
+        """Arrival date of the lowest launch energy transfer."""
+        return self.arrival_span[self.argmin("c3_launch")[1]]
+
+
+def solve_porkchops(
+    departure_body,
+    target_body,
+    launch_span,
+    arrival_span,
+    directions=(True, False),
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    workers=1,
+    progress=None,
+    cache=None,
+    warm_start=False,
+    counter=None,
+    outputs=None,
+    dtype=np.float64,
+):
+    """Compute the porkchops of several transfer directions in a single pass.
+
+    The ephemerides are sampled and the geometry of the Lambert problems is
+    set up only once for all the directions.
+
+    Parameters
+    ----------
+    directions : tuple
+        Directions to be solved, ``True`` standing for prograde transfers and
+        ``False`` for retrograde ones.
+
+    See :func:`solve_porkchop` for the rest of parameters.
+
+    Returns
+    -------
+    dict
+        The :class:`Porkchop` of each direction, keyed by its ``prograde``
+        flag.
+
+    """
+    r_departure, v_departure = sample_states(departure_body, launch_span)
+    r_target, v_target = sample_states(target_body, arrival_span)
+    args = (
+        attractor.k.to_value(u.km**3 / u.s**2),
+        launch_span.tdb.jd,
+        r_departure,
+        v_departure,
+        arrival_span.tdb.jd,
+        r_target,
+        v_target,
+    )
+    escape_velocity = escape_velocity.to_value(u.km / u.s)
+    outputs = check_outputs(outputs)
+
+    # Grids already cached, each direction only solving the missing outputs
+    grids = {prograde: {} for prograde in directions}
+    if cache is not None:
+        keys = {
+            prograde: cache.key(
+                *args, prograde=prograde, escape_velocity=escape_velocity, dtype=dtype
+            )
+            for prograde in directions
+        }
+        for prograde, key in keys.items():
+            grids[prograde] = cache.get(key, outputs=outputs, partial=True) or {}
+
+    missing = tuple(
+        prograde for prograde in directions if any(name not in grids[prograde] for name in outputs)
+    )
+    if missing:
+        kwargs = dict(
+            directions=missing,
+            escape_velocity=escape_velocity,
+            warm_start=warm_start,
+            counter=counter,
+            outputs=check_outputs(
+                {name for prograde in missing for name in outputs if name not in grids[prograde]}
+            ),
+            dtype=dtype,
+        )
+        if workers == 1:
+            branches = branch_grids(*args, **kwargs)
+        else:
+            # Imported here as the parallel module builds on this one
+            from tfm.parallel import branch_grids_parallel
+
+            branches = branch_grids_parallel(*args, **kwargs, workers=workers, progress=progress)
+
+        for prograde, solved in zip(missing, branches):
+            grids[prograde] = {**solved, **grids[prograde]}
+            if cache is not None:
+                cache.put(keys[prograde], solved)
+
+    return {
+        prograde: Porkchop(launch_span, arrival_span, grids[prograde])
+        for prograde in directions
+    }
+
+
+def solve_porkchop(
+    departure_body,
+    target_body,
+    launch_span,
+    arrival_span,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    workers=1,
+    progress=None,
+    cache=None,
+    warm_start=False,
+    counter=None,
+    outputs=None,
+    dtype=np.float64,
+):
+    """Compute the porkchop of a direct transfer between two bodies.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies. Any object with an
+        ``rv(epochs)`` method, like :class:`tfm.interpolation.HermiteEphem`,
+        is accepted as well.
+    launch_span, arrival_span : ~astropy.time.Time
+        Launch and arrival epochs of the grid.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+    workers : int
+        Number of processes sharing the computation. Values other than one
+        split the grid into tiles solved by a process pool, ``None`` using all
+        the available cores.
+    progress : callable
+        Called as ``progress(done, total, tile)`` after each parallel tile.
+    cache : tfm.cache.PorkchopCache
+        Cache in which solved grids are looked up before solving them.
+    warm_start : bool
+        Whether to seed the Lambert iterations of each cell with the solutions
+        of its neighbours along the arrival axis.
+    counter : tfm.lambert.IterationCounter
+        Optional counter of the Lambert iterations spent, grids found in the
+        cache not being counted.
+    outputs : iterable
+        Names of the grids to be solved, for instance ``("c3_launch",
+        "tof")`` when only those are drawn. The others are never allocated.
+    dtype : numpy.dtype
+        Type in which the grids are stored. Cells are always solved in double
+        precision, ``np.float32`` only halving the memory of the results.
+
+    """
+    porkchops = solve_porkchops(
+        departure_body,
+        target_body,
+        launch_span,
+        arrival_span,
+        directions=(prograde,),
+        escape_velocity=escape_velocity,
+        attractor=attractor,
+        workers=workers,
+        progress=progress,
+        cache=cache,
+        warm_start=warm_start,
+        counter=counter,
+        outputs=outputs,
+        dtype=dtype,
+    )
+    return porkchops[prograde]
+
+
+class PorkchopPlotter(Porkchop):
+    """Porkchop plotter backed by the vectorized Lambert solver.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies.
+    launch_span, arrival_span : ~astropy.time.Time
+        Launch and arrival epochs of the grid.
+    ax : ~matplotlib.axes.Axes
+        Axes in which the figures are drawn.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    workers : int
+        Number of processes sharing the computation.
+    progress : callable
+        Called as ``progress(done, total, tile)`` after each parallel tile.
+    cache : tfm.cache.PorkchopCache
+        Cache in which solved grids are looked up before solving them.
+    warm_start : bool
+        Whether to warm start the Lambert iterations along the arrival axis.
+    counter : tfm.lambert.IterationCounter
+        Optional counter of the Lambert iterations spent.
+    outputs : iterable
+        Names of the grids to be solved, all of them when None.
+    dtype : numpy.dtype
+        Type in which the grids are stored.
+
+    """
+
+    def __init__(
+        self,
+        departure_body,
+        target_body,
+        launch_span,
+        arrival_span,
+        ax=None,
+        prograde=True,
+        escape_velocity=0 * u.km / u.s,
+        workers=1,
+        progress=None,
+        cache=None,
+        warm_start=False,
+        counter=None,
+        outputs=None,
+        dtype=np.float64,
+    ):
+        porkchop = solve_porkchop(
+            departure_body,
+            target_body,
+            launch_span,
+            arrival_span,
+            prograde=prograde,
+            escape_velocity=escape_velocity,
+            workers=workers,
+            progress=progress,
+            cache=cache,
+            warm_start=warm_start,
+            counter=counter,
+            outputs=outputs,
+            dtype=dtype,
+        )
+        super().__init__(porkchop.launch_span, porkchop.arrival_span, porkchop.grids)
+        self.ax = ax
+        self.c3_colorbar = None
+        self._dates = None
+        self._c3_contours = {}
+
+    @classmethod
+    def from_porkchop(cls, porkchop, ax=None):
+        """Plot an already computed porkchop."""
+        plotter = cls.__new__(cls)
+        Porkchop.__init__(plotter, porkchop.launch_span, porkchop.arrival_span, porkchop.grids)
+        plotter.ax = ax
+        plotter.c3_colorbar = None
+        plotter._dates = None
+        plotter._c3_contours = {}
+        return plotter
+
+    @classmethod
+    def branches(
+        cls,
+        departure_body,
+        target_body,
+        launch_span,
+        arrival_span,
+        directions=(True, False),
+        escape_velocity=0 * u.km / u.s,
+        workers=1,
+        progress=None,
+        cache=None,
+        warm_start=False,
+        counter=None,
+        outputs=None,
+        dtype=np.float64,
+    ):
+        """Plotters of several transfer directions solved in a single pass.
+
+        See :func:`solve_porkchops` for the parameters. Returns a dictionary
+        of plotters keyed by their ``prograde`` flag.
+
+        """
+        porkchops = solve_porkchops(
+            departure_body,
+            target_body,
+            launch_span,
+            arrival_span,
+            directions=directions,
+            escape_velocity=escape_velocity,
+            workers=workers,
+            progress=progress,
+            cache=cache,
+            warm_start=warm_start,
+            counter=counter,
+            outputs=outputs,
+            dtype=dtype,
+        )
+        return {prograde: cls.from_porkchop(porkchop) for prograde, porkchop in porkchops.items()}
+
+    def _setup_axes(self, ax):
+        self.ax = ax if ax is not None else (self.ax or plt.gca())
+        self.ax.set_xlabel("Launch date", fontweight="bold")
+        self.ax.set_ylabel("Arrival date", fontweight="bold")
+        return self.ax
+
+    def _axes_dates(self):
+        if self._dates is None:
+            self._dates = self.launch_span.to_datetime(), self.arrival_span.to_datetime()
+        return self._dates
+
+    def _c3_geometry(self, levels, filled):
+        """Contours of the launch energy, traced once per set of levels.
+
+        Figures overlaying the time of flight and the arrival velocity share
+        the very same launch energy contours, so their geometry is kept on the
+        porkchop and only turned into new artists for each axes.
+
+        """
+        key = (levels.unit.to_string(), tuple(levels.value), filled)
+        if key not in self._c3_contours:
+            launch, arrival = self._axes_dates()
+            generator = contour_generator(
+                mdates.date2num(launch),
+                mdates.date2num(arrival),
+                np.ma.masked_invalid(self.c3_launch.to_value(levels.unit).T),
+                name=mpl.rcParams["contour.algorithm"],
+                corner_mask=mpl.rcParams["contour.corner_mask"],
+                fill_type=FillType.OuterCode,
+                line_type=LineType.SeparateCode,
+            )
+            if filled:
+                contours = generator.multi_filled(levels.value)
+            else:
+                contours = generator.multi_lines(levels.value)
+            self._c3_contours[key] = [list(segments) for segments in zip(*contours)]
+        return self._c3_contours[key]
+
+    def _span_grid(self, ax, contours):
+        # Contours traced elsewhere only span their own segments, while the
+        # axes should stick to the whole grid as with contourf
+        x, y = (mdates.date2num(dates) for dates in self._axes_dates())
+        contours.sticky_edges.x[:] = [x.min(), x.max()]
+        contours.sticky_edges.y[:] = [y.min(), y.max()]
+        ax.update_datalim([(x.min(), y.min()), (x.max(), y.max())])
+        ax.autoscale_view(tight=True)
+
+    def plot_launch_energy(self, levels, plot_contour_lines=True, ax=None, rasterized=False):
+        """Draw the filled contours of the launch energy.
+
+        With ``rasterized``, the launch energy is drawn as an image colored by
+        the same levels instead of filled contours, which is much lighter to
+        save when there are hundreds of levels.
+
+        """
+        ax = self._setup_axes(ax)
+        launch, arrival = self._axes_dates()
+        ax.xaxis.update_units(launch)
+        ax.yaxis.update_units(arrival)
+
+        if rasterized:
+            # Each band takes the color filled contours give to its midpoint
+            midpoints = (levels.value[:-1] + levels.value[1:]) / 2
+            cmap = ListedColormap(
+                plt.get_cmap("viridis")(Normalize(levels.value[0], levels.value[-1])(midpoints))
+            )
+            c3 = np.ma.masked_outside(
+                np.ma.masked_invalid(self.c3_launch.to_value(levels.unit).T),
+                levels.value[0],
+                levels.value[-1],
+            )
+            contours = ax.pcolormesh(
+                launch,
+                arrival,
+                c3,
+                cmap=cmap,
+                norm=BoundaryNorm(levels.value, cmap.N),
+                shading="gouraud",
+                rasterized=True,
+            )
+        else:
+            segments, kinds = self._c3_geometry(levels, filled=True)
+            contours = ContourSet(ax, levels.value, segments, kinds, filled=True, cmap="viridis")
+            self._span_grid(ax, contours)
+        self.c3_colorbar = ax.figure.colorbar(contours, ax=ax)
+        self.c3_colorbar.set_label(levels.unit.to_string("latex"))
+        if rasterized:
+            # Colorbars of discrete colormaps tick every level otherwise
+            self.c3_colorbar.minorticks_off()
+
+        if plot_contour_lines:
+            segments, kinds = self._c3_geometry(levels, filled=False)
+            lines = ContourSet(ax, levels.value, segments, kinds, colors="black")
+            self._span_grid(ax, lines)
+            ax.clabel(lines, inline=True, fmt="%1.1f", colors="black", fontsize=10)
+        return contours
+
+    def plot_time_of_flight(self, levels, ax=None, use_years=False):
+        """Draw the time of flight contour lines."""
+        ax = self._setup_axes(ax)
+        launch, arrival = self._axes_dates()
+        unit, fmt = (u.year, "%1.0f years") if use_years else (u.day, "%1.0f days")
+        tof = self.tof.to_value(unit).T
+
+        lines = ax.contour(
+            launch,
+            arrival,
+            tof,
+            levels=levels.to_value(unit),
+            colors="red",
+            linestyles="dashed",
+            linewidths=3.5,
+        )
+        ax.clabel(lines, inline=True, fmt=fmt, colors="red", fontsize=14)
+        return lines
+
+    def plot_arrival_velocity(self, levels, ax=None):
+        """Draw the arrival velocity contour lines."""
+        ax = self._setup_axes(ax)
+        launch, arrival = self._axes_dates()
+        avl = self.avl.to_value(levels.unit).T
+
+        outline = [patheffects.withStroke(linewidth=6, foreground="white")]
+        lines = ax.contour(
+            launch, arrival, avl, levels=levels.value, colors="red", linewidths=3
+        )
+        lines.set(path_effects=outline)
+        labels = ax.clabel(
+            lines, inline=True, fmt=f"%1.1f {levels.unit.to_string().replace(' ', '')}", colors="red", fontsize=14
+        )
+        for label in labels:
+            label.set_path_effects(outline)
+        return lines
@@ -0,0 +1,182 @@
+"""Porkchops solved from a coarse lattice down to every cell.
+
+A dense porkchop shows nothing until every one of its Lambert problems is
+solved, so a badly chosen span only becomes obvious at the very end. Here the
+grid is instead solved in passes: first every ``stride``-th launch and arrival
+epoch, then the cells halving that stride, and so on down to every cell. Each
+pass only solves the cells missing from the previous ones, so the whole run
+costs the same Lambert solves as the dense grid, and every pass yields a
+coarse but complete porkchop which can be drawn right away::
+
+    _, ax = plt.subplots()
+    for stride, porkchop in progressive_porkchop(earth, oumuamua, launch_span, arrival_span):
+        ax.clear()
+        PorkchopPlotter.from_porkchop(porkchop, ax=ax).plot_launch_energy(levels)
+        plt.pause(0.01)
+
+The passes can also stop early, once the minimum of a grid no longer changes
+between two of them.
+
+"""
+from astropy import units as u
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.porkchop import Porkchop, branch_grids, check_outputs, sample_states
+
+
+def _passes(shape, stride):
+    # Each pass adds the rows halfway between the previous ones, over the
+    # columns of the current lattice, and the columns halfway between the
+    # previous ones, over the rows of the previous lattice
+    n, m = shape
+    yield stride, [(np.arange(0, n, stride), np.arange(0, m, stride))]
+    while stride > 1:
+        stride //= 2
+        yield stride, [
+            (np.arange(stride, n, 2 * stride), np.arange(0, m, stride)),
+            (np.arange(0, n, 2 * stride), np.arange(stride, m, 2 * stride)),
+        ]
+
+
+def progressive_porkchop(
+    departure_body,
+    target_body,
+    launch_span,
+    arrival_span,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    stride=16,
+    field="c3_launch",
+    rtol=None,
+    cache=None,
+    warm_start=False,
+    outputs=None,
+    dtype=np.float64,
+):
+    """Solve a porkchop in passes of decreasing stride.
+
+    Parameters
+    ----------
+    stride : int
+        Stride of the first pass, rounded up to a power of two.
+    field : str
+        Grid whose minimum is tracked, one of :data:`tfm.porkchop.UNITS`.
+    rtol : float
+        Relative change of the minimum of ``field`` between two passes below
+        which the remaining passes are skipped. Every pass is solved when
+        None.
+    cache : tfm.cache.PorkchopCache
+        Cache in which the whole grid is looked up before solving it, and
+        stored once every cell has been solved.
+    outputs : iterable
+        Names of the grids to be solved, ``field`` always among them, all of
+        them when None.
+    dtype : numpy.dtype
+        Type in which the grids are stored.
+
+    See :func:`tfm.porkchop.solve_porkchop` for the rest of parameters.
+
+    Yields
+    ------
+    stride : int
+        Stride of the pass, one for the last one.
+    porkchop : ~tfm.porkchop.Porkchop
+        Porkchop over every ``stride``-th launch and arrival epoch.
+
+    """
+    r_departure, v_departure = sample_states(departure_body, launch_span)
+    r_target, v_target = sample_states(target_body, arrival_span)
+    k = attractor.k.to_value(u.km**3 / u.s**2)
+    jd_launch, jd_arrival = launch_span.tdb.jd, arrival_span.tdb.jd
+    escape_velocity = escape_velocity.to_value(u.km / u.s)
+    outputs = check_outputs(None if outputs is None else {*outputs, field})
+
+    if cache is not None:
+        key = cache.key(
+            k,
+            jd_launch,
+            r_departure,
+            v_departure,
+            jd_arrival,
+            r_target,
+            v_target,
+            prograde=prograde,
+            escape_velocity=escape_velocity,
+            dtype=dtype,
+        )
+        cached = cache.get(key, outputs=outputs)
+        if cached is not None:
+            yield 1, Porkchop(launch_span, arrival_span, cached)
+            return
+
+    shape = (len(jd_launch), len(jd_arrival))
+    stride = 2 ** int(np.ceil(np.log2(max(stride, 1))))
+    grids = {name: np.full(shape, np.nan, dtype=dtype) for name in outputs}
+    minimum = None
+
+    for stride, blocks in _passes(shape, stride):
+        for rows, columns in blocks:
+            if rows.size == 0 or columns.size == 0:
+                continue
+            (block,) = branch_grids(
+                k,
+                jd_launch[rows],
+                r_departure[rows],
+                v_departure[rows],
+                jd_arrival[columns],
+                r_target[columns],
+                v_target[columns],
+                directions=(prograde,),
+                escape_velocity=escape_velocity,
+                warm_start=warm_start,
+                outputs=outputs,
+            )
+            cells = np.ix_(rows, columns)
+            for name, grid in block.items():
+                grids[name][cells] = grid
+
+        if stride == 1:
+            if cache is not None:
+                cache.put(key, grids)
+            yield 1, Porkchop(launch_span, arrival_span, grids)
+            return
+
+        # Views of the solved lattice, copied so that later passes do not
+        # modify the porkchops already yielded
+        lattice = (slice(None, None, stride),) * 2
+        yield stride, Porkchop(
+            launch_span[::stride],
+            arrival_span[::stride],
+            {name: grid[lattice].copy() for name, grid in grids.items()},
+        )
+
+        values = grids[field][lattice]
+        current = np.nanmin(values) if np.isfinite(values).any() else None
+        if rtol is not None and minimum is not None and current is not None:
+            if abs(current - minimum) <= rtol * abs(minimum):
+                return
+        minimum = current
+
+
+def solve_porkchop_progressive(*args, callback=None, **kwargs):
+    """Run all the passes of :func:`progressive_porkchop`.
+
+    Parameters
+    ----------
+    callback : callable
+        Called as ``callback(stride, porkchop)`` after each pass, for instance
+        to redraw a figure in place.
+
+    Returns
+    -------
+    ~tfm.porkchop.Porkchop
+        Porkchop of the last pass, the full grid unless stopped early.
+
+    """
+    for stride, porkchop in progressive_porkchop(*args, **kwargs):
+        if callback is not None:
+            callback(stride, porkchop)
+    return porkchop
@@ -0,0 +1,373 @@
+"""Declarative porkchop scenarios executed as a job graph.
+
+Most of the porkchop scripts only differ in their ephemerides, spans,
+direction, escape velocity and figures. Scenarios describe all of them as
+plain JSON entries, which are turned into a graph of three kinds of jobs:
+
+1. Ephemeris jobs convert each distinct CSV into its binary cache once.
+2. Grid jobs solve each distinct porkchop once, however many scenarios or
+   figures share it. Both directions of a grid are solved in a single pass.
+3. Figure jobs draw and save the plots of a grid as soon as it is solved.
+
+Independent grids and figures run concurrently on a process pool, and the
+solved grids are kept in the :mod:`tfm.cache` so that later runs only redraw
+the figures. Figures are recorded in a :mod:`tfm.manifest`, so that rebuilds
+skip the ones whose inputs did not change.
+
+A scenario reads like::
+
+    {
+        "name": "oumuamua-optimum",
+        "departure": "bin/ephem/earth.csv",
+        "target": "bin/ephem/oumuamua.csv",
+        "launch": {"start": "2016-10-01", "end": "2017-10-01", "num": 200},
+        "arrival": {"start": "2017-09-12", "end": "2018-01-15", "num": 200},
+        "directions": ["prograde"],
+        "escape_velocity": 11.2,
+        "plots": [{"output": "fig/...-{direction}.png", "c3_levels": [...]}]
+    }
+
+with the escape velocity in km / s. See :func:`draw_plot` for the keys of the
+plots, whose ``output`` and ``title`` may refer to ``{direction}``.
+
+Only the figures the porkchop scripts save are listed, so that running the
+scenarios never writes a figure which the scripts deliberately leave unsaved.
+
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from copy import copy
+import json
+import os
+from pathlib import Path
+
+from astropy import units as u
+from astropy.time import Time
+from matplotlib import pyplot as plt
+import numpy as np
+
+from poliastro.frames import Planes
+from poliastro.util import time_range
+
+from tfm.cache import PorkchopCache
+from tfm.ephem import build_cache, load_ephem
+from tfm.manifest import fingerprint, source_hash
+from tfm.porkchop import Porkchop, PorkchopPlotter, check_outputs, solve_porkchops
+
+
+DIRECTIONS = {"prograde": True, "retrograde": False}
+"""Names of the transfer directions accepted by the scenarios."""
+
+C3_UNIT = u.km**2 / u.s**2
+"""Unit of the launch energy levels of the plots."""
+
+PIPELINE = ("tfm.ephem", "tfm.states", "tfm.lambert", "tfm.porkchop", "tfm.cache", "tfm.scenarios")
+"""Modules whose source code takes part in drawing the figures."""
+
+
+def load_scenarios(path):
+    """Read the list of scenarios stored in a JSON file."""
+    with open(path) as file:
+        scenarios = json.load(file)
+    names = [scenario["name"] for scenario in scenarios]
+    duplicated = {name for name in names if names.count(name) > 1}
+    if duplicated:
+        raise ValueError(f"Duplicated scenarios: {', '.join(sorted(duplicated))}")
+    return scenarios
+
+
+def _values(spec):
+    """Explicit list of values or ``{"start", "stop", "num"}`` linear range."""
+    if isinstance(spec, dict):
+        return np.linspace(spec["start"], spec["stop"], spec["num"])
+    return np.asarray(spec, dtype=float)
+
+
+def _span(spec):
+    return time_range(spec["start"], end=spec["end"], num_values=spec["num"], scale="tdb")
+
+
+def output_path(prograde, plot):
+    """Path of the figure drawn for a plot of some direction."""
+    return Path(plot["output"].format(direction="prograde" if prograde else "retrograde"))
+
+
+class GridJob:
+    """Porkchop grid shared by one or more scenarios.
+
+    Parameters
+    ----------
+    departure, target : str
+        Paths to the ephemerides of the departure and target bodies.
+    launch, arrival : dict
+        Start, end and number of epochs of the spans.
+    escape_velocity : float
+        Escape velocity from the departure body in km / s.
+
+    """
+
+    def __init__(self, departure, target, launch, arrival, escape_velocity):
+        self.departure = departure
+        self.target = target
+        self.launch = launch
+        self.arrival = arrival
+        self.escape_velocity = escape_velocity
+        self.directions = set()
+        self.plots = []
+
+    @staticmethod
+    def key(scenario):
+        """Identity of the grid solved for a scenario."""
+        return (
+            os.path.normpath(scenario["departure"]),
+            os.path.normpath(scenario["target"]),
+            tuple(sorted(scenario["launch"].items())),
+            tuple(sorted(scenario["arrival"].items())),
+            float(scenario.get("escape_velocity", 0.0)),
+        )
+
+    @property
+    def outputs(self):
+        """Names of the grids drawn by the plots of the job."""
+        outputs = {"c3_launch"}
+        for _, plot in self.plots:
+            if "tof_levels" in plot:
+                outputs.add("tof")
+            if "avl_levels" in plot:
+                outputs.add("avl")
+        return check_outputs(outputs)
+
+    def __repr__(self):
+        return (
+            f"GridJob({Path(self.departure).stem} -> {Path(self.target).stem}, "
+            f"launch={self.launch['start']}..{self.launch['end']} ({self.launch['num']}), "
+            f"arrival={self.arrival['start']}..{self.arrival['end']} ({self.arrival['num']}), "
+            f"escape={self.escape_velocity} km / s, "
+            f"directions={[name for name, prograde in DIRECTIONS.items() if prograde in self.directions]}, "
+            f"figures={len(self.plots)})"
+        )
+
+
+def build_graph(scenarios):
+    """Gather the scenarios into their ephemeris and grid jobs.
+
+    Returns
+    -------
+    ephemerides : list
+        Paths to the distinct ephemerides used by the scenarios.
+    grids : list
+        The distinct :class:`GridJob`, each one holding its
+        ``(prograde, plot)`` figure jobs.
+
+    """
+    grids = {}
+    for scenario in scenarios:
+        key = GridJob.key(scenario)
+        if key not in grids:
+            grids[key] = GridJob(
+                key[0], key[1], scenario["launch"], scenario["arrival"], key[-1]
+            )
+        job = grids[key]
+        for name in scenario.get("directions", ["prograde"]):
+            prograde = DIRECTIONS[name]
+            job.directions.add(prograde)
+            job.plots.extend((prograde, plot) for plot in scenario.get("plots", []))
+
+    ephemerides = sorted({path for job in grids.values() for path in (job.departure, job.target)})
+    return ephemerides, list(grids.values())
+
+
+def solve_grid(job):
+    """Solve, or read from the cache, the grids drawn for every direction of a job."""
+    porkchops = solve_porkchops(
+        load_ephem(job.departure, plane=Planes.EARTH_ECLIPTIC),
+        load_ephem(job.target, plane=Planes.EARTH_ECLIPTIC),
+        _span(job.launch),
+        _span(job.arrival),
+        directions=tuple(sorted(job.directions, reverse=True)),
+        escape_velocity=job.escape_velocity * u.km / u.s,
+        cache=PorkchopCache(),
+        warm_start=True,
+        outputs=job.outputs,
+    )
+    return {prograde: porkchop.grids for prograde, porkchop in porkchops.items()}
+
+
+def draw_plot(job, prograde, grids, plot):
+    """Draw and save one figure of a solved grid.
+
+    The keys of a plot are:
+
+    - ``output``: path of the saved figure.
+    - ``title``: title of the figure.
+    - ``c3_levels``: launch energy levels in km2 / s2.
+    - ``contour_lines``: whether to draw the launch energy contour lines.
+    - ``rasterized``: whether to draw the launch energy as an image.
+    - ``colorbar_ticks``: optional ticks of the launch energy colorbar.
+    - ``tof_levels`` and ``tof_unit``: optional time of flight levels, in
+      days or years.
+    - ``avl_levels``: optional arrival velocity levels in km / s.
+    - ``mark_minimum``: whether to mark the lowest launch energy transfer.
+    - ``events``: optional ``{"date", "label"}`` launch dates to be marked.
+
+    Levels are either lists or ``{"start", "stop", "num"}`` linear ranges.
+
+    """
+    direction = "prograde" if prograde else "retrograde"
+    output = output_path(prograde, plot)
+    porkchop = PorkchopPlotter.from_porkchop(Porkchop(_span(job.launch), _span(job.arrival), grids))
+
+    figure, ax = plt.subplots(1, 1, figsize=(16, 8))
+    porkchop.plot_launch_energy(
+        levels=_values(plot["c3_levels"]) * C3_UNIT,
+        plot_contour_lines=plot.get("contour_lines", True),
+        ax=ax,
+        rasterized=plot.get("rasterized", False),
+    )
+    if "colorbar_ticks" in plot:
+        ticks = _values(plot["colorbar_ticks"]).astype(int)
+        porkchop.c3_colorbar.set_ticks(ticks)
+        porkchop.c3_colorbar.set_ticklabels(ticks)
+    if "tof_levels" in plot:
+        use_years = plot.get("tof_unit", "day") == "year"
+        porkchop.plot_time_of_flight(
+            levels=_values(plot["tof_levels"]) * (u.year if use_years else u.day),
+            ax=ax,
+            use_years=use_years,
+        )
+    if "avl_levels" in plot:
+        porkchop.plot_arrival_velocity(levels=_values(plot["avl_levels"]) * u.km / u.s, ax=ax)
+    if "title" in plot:
+        ax.set_title(plot["title"].format(direction=direction))
+
+    if plot.get("mark_minimum", False):
+        launch = porkchop.launch_date_at_c3_launch_min.to_datetime()
+        arrival = porkchop.arrival_date_at_c3_launch_min.to_datetime()
+        ax.plot(launch, arrival, "ko", markersize=15)
+        ax.plot(launch, arrival, color="red", marker="x", mew=2, label="Lowest energy transfer")
+
+    if plot.get("events"):
+        from labellines import labelLines
+
+        lines = [
+            ax.axvline(
+                x=Time(event["date"], scale="tdb").to_datetime(),
+                color="black",
+                linewidth=3,
+                label=event["label"],
+            )
+            for event in plot["events"]
+        ]
+        labelLines(lines, align=True, fontsize=14, backgroundcolor="white")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    figure.savefig(output, bbox_inches="tight")
+    plt.close(figure)
+    return output
+
+
+def prune_graph(grids, manifest, force=False):
+    """Drop the figures which are up to date with their inputs.
+
+    Parameters
+    ----------
+    grids : list
+        The :class:`GridJob` built by :func:`build_graph`.
+    manifest : tfm.manifest.FigureManifest
+        Manifest of the figures generated by previous runs.
+    force : bool
+        Whether to consider every figure out of date.
+
+    Returns
+    -------
+    stale : list
+        The :class:`GridJob` holding at least one figure to be drawn, with
+        their up to date figures removed.
+    fingerprints : dict
+        Fingerprint of each figure to be drawn, keyed by its path.
+
+    """
+    sources = source_hash(PIPELINE)
+    stale, fingerprints = [], {}
+    for job in grids:
+        plots = []
+        for prograde, plot in job.plots:
+            output = output_path(prograde, plot)
+            key = fingerprint(
+                sources=sources,
+                departure=manifest.input_hash(job.departure),
+                target=manifest.input_hash(job.target),
+                grid=[job.launch, job.arrival, job.escape_velocity],
+                prograde=prograde,
+                plot=plot,
+            )
+            if force or not manifest.is_fresh(output, key):
+                plots.append((prograde, plot))
+                fingerprints[str(output)] = key
+        if plots:
+            pruned = copy(job)
+            pruned.directions = {prograde for prograde, _ in plots}
+            pruned.plots = plots
+            stale.append(pruned)
+    return stale, fingerprints
+
+
+def run_graph(ephemerides, grids, workers=None, log=print, manifest=None, force=False):
+    """Execute the grid and figure jobs on a process pool.
+
+    Figure jobs are submitted as soon as their grid is solved, so drawing
+    overlaps with the solving of the remaining grids. When a manifest is
+    given, the figures which are up to date are skipped, and so are the grids
+    left without figures.
+
+    Parameters
+    ----------
+    ephemerides : list
+        Paths to the ephemerides converted before any grid is solved.
+    grids : list
+        The :class:`GridJob` to be executed.
+    workers : int
+        Number of processes, ``None`` using all the available cores.
+    log : callable
+        Called with a message after each finished job.
+    manifest : tfm.manifest.FigureManifest
+        Optional manifest in which the saved figures are recorded.
+    force : bool
+        Whether to draw again the figures which are up to date.
+
+    Returns
+    -------
+    list
+        Paths to the saved figures.
+
+    """
+    fingerprints = {}
+    if manifest is not None:
+        total = sum(len(job.plots) for job in grids)
+        grids, fingerprints = prune_graph(grids, manifest, force)
+        log(f"Skipped {total - len(fingerprints)} up to date figures")
+    if not grids:
+        return []
+
+    # Converting the tables up front keeps the workers from racing on them
+    for path in ephemerides:
+        build_cache(path)
+
+    outputs = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(solve_grid, job): job for job in grids}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                result = future.result()
+                if isinstance(job, GridJob):
+                    log(f"Solved {job!r}")
+                    for prograde, plot in job.plots:
+                        figure = pool.submit(draw_plot, job, prograde, result[prograde], plot)
+                        pending[figure] = plot["output"]
+                else:
+                    log(f"Saved {result}")
+                    outputs.append(result)
+                    if manifest is not None:
+                        manifest.record(result, fingerprints[str(result)])
+    return outputs
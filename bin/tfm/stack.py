@@ -0,0 +1,139 @@
+"""Porkchops of many departure bodies against many targets.
+
+Comparing departure sites means solving one porkchop per departure - target
+pair over the very same spans. All the departure states are instead stacked
+along the launch axis and all the target states along the arrival axis, so a
+single launch x arrival grid holds every pair. Each body is sampled only once
+and the whole comparison runs as one vectorized, or parallel, porkchop.
+
+"""
+from astropy import units as u
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.porkchop import UNITS, Porkchop, branch_grids, sample_states
+
+
+class PorkchopStack:
+    """Labelled stack of porkchops sharing their spans.
+
+    Parameters
+    ----------
+    launch_span, arrival_span : ~astropy.time.Time
+        Axes shared by all the porkchops.
+    departures, targets : tuple
+        Labels of the departure and target bodies.
+    grids : dict
+        Arrays with shape (len(departures), len(targets), len(launch_span),
+        len(arrival_span)) stored in the units of :data:`tfm.porkchop.UNITS`.
+
+    """
+
+    def __init__(self, launch_span, arrival_span, departures, targets, grids):
+        self.launch_span = launch_span
+        self.arrival_span = arrival_span
+        self.departures = tuple(departures)
+        self.targets = tuple(targets)
+        self.grids = grids
+
+    def __getitem__(self, labels):
+        """Porkchop of a ``(departure, target)`` pair of labels."""
+        departure, target = labels
+        d, t = self.departures.index(departure), self.targets.index(target)
+        return Porkchop(
+            self.launch_span,
+            self.arrival_span,
+            {name: grid[d, t] for name, grid in self.grids.items()},
+        )
+
+    def __iter__(self):
+        for departure in self.departures:
+            for target in self.targets:
+                yield (departure, target), self[departure, target]
+
+    def minima(self, name="c3_launch"):
+        """Lowest value of a grid for each pair, as a (departures, targets) array."""
+        grid = self.grids[name]
+        with np.errstate(invalid="ignore"):
+            minima = np.nanmin(grid.reshape(grid.shape[:2] + (-1,)), axis=-1)
+        return minima << UNITS[name]
+
+
+def solve_porkchop_stack(
+    departures,
+    targets,
+    launch_span,
+    arrival_span,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    workers=1,
+    progress=None,
+):
+    """Compute the porkchops of every departure - target pair in one pass.
+
+    Parameters
+    ----------
+    departures, targets : dict
+        Ephemerides of the departure and target bodies, keyed by their labels.
+    launch_span, arrival_span : ~astropy.time.Time
+        Launch and arrival epochs shared by all the porkchops.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity or dict
+        Escape velocity from the departure bodies, either shared by all of
+        them or keyed by their labels.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+    workers : int
+        Number of processes sharing the computation, see
+        :func:`tfm.porkchop.solve_porkchop`.
+    progress : callable
+        Called as ``progress(done, total, tile)`` after each parallel tile.
+
+    Returns
+    -------
+    PorkchopStack
+        The porkchops of all the pairs.
+
+    """
+    if not isinstance(escape_velocity, dict):
+        escape_velocity = {label: escape_velocity for label in departures}
+
+    # Stack the states of all the bodies along the launch and arrival axes
+    departure_states = [sample_states(body, launch_span) for body in departures.values()]
+    target_states = [sample_states(body, arrival_span) for body in targets.values()]
+    jd_launch, jd_arrival = launch_span.tdb.jd, arrival_span.tdb.jd
+    args = (
+        attractor.k.to_value(u.km**3 / u.s**2),
+        np.tile(jd_launch, len(departures)),
+        np.concatenate([r for r, _ in departure_states]),
+        np.concatenate([v for _, v in departure_states]),
+        np.tile(jd_arrival, len(targets)),
+        np.concatenate([r for r, _ in target_states]),
+        np.concatenate([v for _, v in target_states]),
+    )
+    kwargs = dict(directions=(prograde,))
+
+    if workers == 1:
+        (grids,) = branch_grids(*args, **kwargs)
+    else:
+        # Imported here as the parallel module builds on the porkchop one
+        from tfm.parallel import branch_grids_parallel
+
+        (grids,) = branch_grids_parallel(*args, **kwargs, workers=workers, progress=progress)
+
+    # Split the stacked axes into (departure, target, launch, arrival)
+    shape = (len(departures), len(jd_launch), len(targets), len(jd_arrival))
+    grids = {
+        name: np.ascontiguousarray(grid.reshape(shape).transpose(0, 2, 1, 3))
+        for name, grid in grids.items()
+    }
+
+    # Grids were solved without escape, which only shifts the launch impulse
+    escape = np.array([escape_velocity[label].to_value(u.km / u.s) for label in departures])
+    grids["dv_launch"] += escape[:, np.newaxis, np.newaxis, np.newaxis]
+    grids["c3_launch"] = grids["dv_launch"] ** 2
+
+    return PorkchopStack(launch_span, arrival_span, departures, targets, grids)
@@ -0,0 +1,68 @@
+"""Batched evaluation of body states over whole epoch arrays.
+
+These helpers replace the per-epoch ``rv`` loops of the scripts with a single
+call per body, returning (N, 3) arrays which can be combined into derived
+series using plain NumPy broadcasting.
+
+"""
+from astropy import units as u
+import numpy as np
+
+
+def batch_rv(bodies, epochs):
+    """Positions and velocities of one or more bodies at many epochs.
+
+    Parameters
+    ----------
+    bodies : ~tfm.interpolation.HermiteEphem, ~poliastro.ephem.Ephem or list
+        A single body or a list of them. Anything exposing an ``rv(epochs)``
+        method returning (N, 3) quantities is accepted.
+    epochs : ~astropy.time.Time
+        Epochs at which the states are evaluated, usually the output of
+        ``time_range``.
+
+    Returns
+    -------
+    r, v : ~astropy.units.Quantity
+        Positions and velocities with shape (N, 3) for a single body or
+        (B, N, 3) for a list of B bodies.
+
+    """
+    if not isinstance(bodies, (list, tuple)):
+        return _rv(bodies, epochs)
+
+    states = [_rv(body, epochs) for body in bodies]
+    r = u.Quantity([state[0].to(u.km) for state in states])
+    v = u.Quantity([state[1].to(u.km / u.s) for state in states])
+    return r, v
+
+
+def _rv(body, epochs):
+    r, v = body.rv(epochs)
+    return r.reshape(-1, 3), v.reshape(-1, 3)
+
+
+def relative(r, origin):
+    """Vectors of a series relative to another one."""
+    return r - origin
+
+
+def barycenter(positions, masses):
+    """Center of mass of several series of vectors.
+
+    Parameters
+    ----------
+    positions : list
+        Series of vectors with a common (N, 3) shape.
+    masses : list
+        Mass of each one of the bodies.
+
+    """
+    masses = u.Quantity(masses)
+    weighted = sum(mass * r for mass, r in zip(masses, positions))
+    return weighted / masses.sum()
+
+
+def distance(r, origin):
+    """Distance between the vectors of two (N, 3) series."""
+    return np.linalg.norm(r - origin, axis=-1)
@@ -0,0 +1,498 @@
+"""Porkchop tile pyramid computed on demand and served over HTTP.
+
+Exploring the launch opportunities of a new target used to mean editing the
+spans of a script, solving a whole dense grid and looking at a static figure.
+:class:`TilePyramid` instead splits the (launch, arrival) domain into a
+quadtree: level ``z`` holds ``2**z x 2**z`` tiles of ``tile_size`` nodes per
+axis, so every level doubles the date resolution of the previous one. A tile
+is only solved the first time it is requested and is then kept on disk under
+dat/tiles, in a directory named after a hash of everything it depends on.
+
+Zooming from a two decade overview into a two week window therefore costs the
+handful of tiles covering the screen, never a fresh dense grid. The pyramid
+can be queried from a notebook, see :meth:`TilePyramid.porkchop`, or from a
+browser through :class:`TileServer`.
+
+"""
+from collections import defaultdict
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+from pathlib import Path
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from astropy import units as u
+from astropy.time import Time
+import matplotlib as mpl
+from matplotlib import pyplot as plt
+from matplotlib.colors import Normalize
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.ephem import _write_atomic, file_hash
+from tfm.interpolation import HermiteEphem
+from tfm.porkchop import UNITS, Porkchop, branch_grids
+
+
+TILE_CACHE_DIR = Path("dat/tiles")
+"""Directory holding the solved tiles of every pyramid."""
+
+TILE_VERSION = b"tiles-v1"
+"""Salt of the pyramid keys, to be bumped whenever the stored tiles change."""
+
+
+class TilePyramid:
+    """Multi-resolution porkchop over a launch x arrival domain.
+
+    Tile ``(z, x, y)`` covers the ``x``-th launch and the ``y``-th arrival
+    interval out of the ``2**z`` ones each axis is split into at level ``z``.
+    Its nodes sit at the centers of ``tile_size`` equal cells, so that the
+    tiles of a level never share nodes.
+
+    Parameters
+    ----------
+    departure, target : str
+        State-vector CSV files of the departure and target bodies.
+    launch, arrival : tuple
+        The ``(start, end)`` epochs of each axis of the domain, the span of
+        the corresponding ephemeris when None.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    tile_size : int
+        Number of nodes per axis of each tile.
+    max_level : int
+        Deepest level of the pyramid.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+    cache_dir : str
+        Directory under which the tiles are stored.
+
+    """
+
+    def __init__(
+        self,
+        departure,
+        target,
+        launch=None,
+        arrival=None,
+        prograde=True,
+        escape_velocity=0 * u.km / u.s,
+        tile_size=128,
+        max_level=12,
+        attractor=Sun,
+        cache_dir=TILE_CACHE_DIR,
+    ):
+        self.departure = str(departure)
+        self.target = str(target)
+        self._departure = HermiteEphem.from_csv(departure)
+        self._target = HermiteEphem.from_csv(target)
+        self.launch = self._domain(self._departure, launch)
+        self.arrival = self._domain(self._target, arrival)
+        self.prograde = prograde
+        self.escape_velocity = escape_velocity.to_value(u.km / u.s)
+        self.tile_size = tile_size
+        self.max_level = max_level
+        self.k = attractor.k.to_value(u.km**3 / u.s**2)
+        self.directory = Path(cache_dir) / self.key()
+
+        # Concurrent requests of the same tile solve it only once
+        self._lock = threading.Lock()
+        self._tile_locks = defaultdict(threading.Lock)
+
+    @staticmethod
+    def _domain(ephem, span):
+        if span is None:
+            return ephem.jd0, ephem.jd_end
+        start, end = (epoch.tdb.jd for epoch in span)
+        if not ephem.jd0 <= start < end <= ephem.jd_end:
+            raise ValueError(
+                f"Domain JD {start} - {end} is not within the ephemeris span "
+                f"JD {ephem.jd0} - {ephem.jd_end}"
+            )
+        return start, end
+
+    def key(self):
+        """Hash of the ephemerides and parameters the tiles depend on."""
+        digest = hashlib.sha256(TILE_VERSION)
+        digest.update(file_hash(self.departure).encode())
+        digest.update(file_hash(self.target).encode())
+        parameters = (
+            self.launch,
+            self.arrival,
+            bool(self.prograde),
+            float(self.escape_velocity),
+            self.tile_size,
+            float(self.k),
+        )
+        digest.update(repr(parameters).encode())
+        return digest.hexdigest()[:16]
+
+    def _check(self, z, x, y):
+        if not 0 <= z <= self.max_level:
+            raise ValueError(f"Level {z} is not within 0 - {self.max_level}")
+        if not (0 <= x < 2**z and 0 <= y < 2**z):
+            raise ValueError(f"Tile ({x}, {y}) is not within level {z}")
+
+    def nodes(self, z, x, y):
+        """Julian dates (TDB) of the launch and arrival nodes of a tile."""
+        self._check(z, x, y)
+        centers = (np.arange(self.tile_size) + 0.5) / self.tile_size
+        (l0, l1), (a0, a1) = self.launch, self.arrival
+        launch_width, arrival_width = (l1 - l0) / 2**z, (a1 - a0) / 2**z
+        return (
+            l0 + (x + centers) * launch_width,
+            a0 + (y + centers) * arrival_width,
+        )
+
+    def _path(self, z, x, y):
+        return self.directory / str(z) / f"{x}-{y}.npz"
+
+    def _load(self, path):
+        try:
+            with np.load(path) as data:
+                return {name: data[name] for name in UNITS}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def tile(self, z, x, y):
+        """Grids of a tile, solved and stored on the first request.
+
+        Returns
+        -------
+        dict
+            The (tile_size, tile_size) grids listed in
+            :data:`tfm.porkchop.UNITS`, in those units.
+
+        """
+        self._check(z, x, y)
+        path = self._path(z, x, y)
+        grids = self._load(path)
+        if grids is not None:
+            return grids
+
+        with self._lock:
+            lock = self._tile_locks[z, x, y]
+        with lock:
+            grids = self._load(path)
+            if grids is None:
+                grids = self._solve(z, x, y)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _write_atomic(path, lambda file: np.savez(file, **grids))
+        return grids
+
+    def _solve(self, z, x, y):
+        jd_launch, jd_arrival = self.nodes(z, x, y)
+        r_departure, v_departure = self._departure.rv_jd(jd_launch)
+        r_target, v_target = self._target.rv_jd(jd_arrival)
+        (grids,) = branch_grids(
+            self.k,
+            jd_launch,
+            r_departure,
+            v_departure,
+            jd_arrival,
+            r_target,
+            v_target,
+            directions=(self.prograde,),
+            escape_velocity=self.escape_velocity,
+            warm_start=True,
+        )
+        return grids
+
+    def level(self, fraction, pixels=512):
+        """Shallowest level resolving a fraction of the domain with some nodes.
+
+        Parameters
+        ----------
+        fraction : float
+            Length of a window relative to the one of the domain.
+        pixels : int
+            Number of nodes wanted across that window.
+
+        """
+        tiles = pixels / (self.tile_size * fraction)
+        return int(np.clip(np.ceil(np.log2(max(tiles, 1))), 0, self.max_level))
+
+    def viewport(self, launch_start, launch_end, arrival_start, arrival_end, pixels=512):
+        """Level and tiles covering a window of the domain.
+
+        Parameters
+        ----------
+        launch_start, launch_end, arrival_start, arrival_end : ~astropy.time.Time
+            Bounds of the window.
+        pixels : int
+            Number of nodes wanted across the widest axis of the window,
+            relative to the domain.
+
+        Returns
+        -------
+        z : int
+            Level of the tiles.
+        tiles : list
+            The ``(x, y)`` indices of the tiles, launch major.
+
+        """
+        fraction = max(
+            (launch_end.tdb.jd - launch_start.tdb.jd) / (self.launch[1] - self.launch[0]),
+            (arrival_end.tdb.jd - arrival_start.tdb.jd) / (self.arrival[1] - self.arrival[0]),
+        )
+        z = self.level(fraction, pixels)
+        xs = self._indices(self.launch, launch_start, launch_end, z)
+        ys = self._indices(self.arrival, arrival_start, arrival_end, z)
+        return z, [(x, y) for x in xs for y in ys]
+
+    @staticmethod
+    def _indices(domain, start, end, z):
+        start, end = start.tdb.jd, end.tdb.jd
+        width = (domain[1] - domain[0]) / 2**z
+        first = int(np.clip(np.floor((start - domain[0]) / width), 0, 2**z - 1))
+        last = int(np.clip(np.ceil((end - domain[0]) / width) - 1, first, 2**z - 1))
+        return range(first, last + 1)
+
+    def porkchop(self, launch_start, launch_end, arrival_start, arrival_end, pixels=512):
+        """Porkchop of a window assembled from the tiles covering it.
+
+        Only the tiles of the window are solved, at the level matching the
+        requested resolution. See :meth:`viewport` for the parameters.
+
+        Returns
+        -------
+        ~tfm.porkchop.Porkchop
+            The grids at the nodes within the window, ready to be plotted with
+            :meth:`tfm.porkchop.PorkchopPlotter.from_porkchop`.
+
+        """
+        z, tiles = self.viewport(launch_start, launch_end, arrival_start, arrival_end, pixels)
+        xs = sorted({x for x, _ in tiles})
+        ys = sorted({y for _, y in tiles})
+        jd_launch = np.concatenate([self.nodes(z, x, ys[0])[0] for x in xs])
+        jd_arrival = np.concatenate([self.nodes(z, xs[0], y)[1] for y in ys])
+
+        size = self.tile_size
+        grids = {name: np.empty((jd_launch.size, jd_arrival.size)) for name in UNITS}
+        for x, y in tiles:
+            i, j = (x - xs[0]) * size, (y - ys[0]) * size
+            for name, grid in self.tile(z, x, y).items():
+                grids[name][i : i + size, j : j + size] = grid
+
+        # Crop the nodes outside the window
+        launch = (jd_launch >= launch_start.tdb.jd) & (jd_launch <= launch_end.tdb.jd)
+        arrival = (jd_arrival >= arrival_start.tdb.jd) & (jd_arrival <= arrival_end.tdb.jd)
+        return Porkchop(
+            Time(jd_launch[launch], format="jd", scale="tdb"),
+            Time(jd_arrival[arrival], format="jd", scale="tdb"),
+            {name: grid[np.ix_(launch, arrival)] for name, grid in grids.items()},
+        )
+
+    def render(self, z, x, y, field="c3_launch", vmin=0.0, vmax=None, cmap="viridis"):
+        """PNG image of a tile, launch growing rightwards and arrival upwards.
+
+        Nodes without a transfer or above ``vmax`` are left transparent, as
+        the porkchop figures leave them blank. Tiles only share their colors
+        when ``vmax`` is given, otherwise each one is scaled to its maximum.
+
+        """
+        if field not in UNITS:
+            raise ValueError(f"Unknown field {field!r}, expected one of {', '.join(UNITS)}")
+        grid = np.ma.masked_invalid(self.tile(z, x, y)[field].T[::-1])
+        colormap = mpl.colormaps[cmap].with_extremes(bad=(0, 0, 0, 0), over=(0, 0, 0, 0))
+        norm = Normalize(vmin, vmax)
+        norm.autoscale_None(grid)
+
+        buffer = io.BytesIO()
+        plt.imsave(buffer, colormap(norm(grid)), format="png")
+        return buffer.getvalue()
+
+    def info(self):
+        """JSON serializable description of the pyramid."""
+        return {
+            "departure": self.departure,
+            "target": self.target,
+            "launch": self.launch,
+            "arrival": self.arrival,
+            "prograde": self.prograde,
+            "escape_velocity": self.escape_velocity,
+            "tile_size": self.tile_size,
+            "max_level": self.max_level,
+            "units": {name: unit.to_string() for name, unit in UNITS.items()},
+        }
+
+
+class TileServer(ThreadingHTTPServer):
+    """Local HTTP server of the tiles of a pyramid.
+
+    Routes:
+
+    * ``/`` a minimal viewer, zoomed with the wheel and panned by dragging.
+    * ``/info`` the JSON description of the pyramid.
+    * ``/tiles/{z}/{x}/{y}.png`` a rendered tile, accepting the ``field``,
+      ``vmin`` and ``vmax`` query parameters.
+    * ``/tiles/{z}/{x}/{y}.npz`` the grids of a tile, for notebook clients.
+
+    Parameters
+    ----------
+    pyramid : TilePyramid
+        Pyramid whose tiles are served.
+    address : tuple
+        The ``(host, port)`` to listen on.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pyramid, address=("127.0.0.1", 8000)):
+        super().__init__(address, _TileRequestHandler)
+        self.pyramid = pyramid
+
+
+class _TileRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        pyramid = self.server.pyramid
+        try:
+            if url.path == "/":
+                self._send(_VIEWER.encode(), "text/html; charset=utf-8")
+            elif url.path == "/info":
+                self._send(json.dumps(pyramid.info()).encode(), "application/json")
+            elif len(parts) == 4 and parts[0] == "tiles":
+                name, _, extension = parts[3].partition(".")
+                z, x, y = int(parts[1]), int(parts[2]), int(name)
+                if extension == "png":
+                    vmin = float(query.get("vmin", 0.0))
+                    vmax = float(query["vmax"]) if "vmax" in query else None
+                    field = query.get("field", "c3_launch")
+                    self._send(pyramid.render(z, x, y, field, vmin, vmax), "image/png")
+                elif extension == "npz":
+                    buffer = io.BytesIO()
+                    np.savez(buffer, **pyramid.tile(z, x, y))
+                    self._send(buffer.getvalue(), "application/octet-stream")
+                else:
+                    self.send_error(404)
+            else:
+                self.send_error(404)
+        except ValueError as error:
+            self.send_error(400, str(error))
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=86400")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_VIEWER = """<!DOCTYPE html>
+<html>
+<head>
+<title>Porkchop explorer</title>
+<style>
+  body { font-family: sans-serif; margin: 1em; }
+  #view { position: relative; width: 1024px; height: 640px; overflow: hidden;
+          background: #eee; cursor: grab; }
+  #view img { position: absolute; width: 256px; height: 256px; user-select: none; }
+</style>
+</head>
+<body>
+<div>
+  <select id="field"></select>
+  vmin <input id="vmin" size="6" value="0"> vmax <input id="vmax" size="6" value="650">
+  <span id="status"></span>
+</div>
+<div id="view"></div>
+<p>Launch date rightwards, arrival date upwards. Wheel to zoom, drag to pan.</p>
+<script>
+const TILE = 256;
+const view = document.getElementById("view");
+const status = document.getElementById("status");
+let info, z = 0, cx = 0.5, cy = 0.5, images = new Map();
+
+function date(jd) {
+  return new Date((jd - 2440587.5) * 86400000).toISOString().slice(0, 10);
+}
+
+function query() {
+  const params = new URLSearchParams({field: document.getElementById("field").value});
+  for (const bound of ["vmin", "vmax"]) {
+    const value = document.getElementById(bound).value;
+    if (value) params.set(bound, value);
+  }
+  return params.toString();
+}
+
+function draw() {
+  const size = TILE * 2 ** z, width = view.clientWidth, height = view.clientHeight;
+  const left = cx * size - width / 2, top = (1 - cy) * size - height / 2;
+  const seen = new Set(), suffix = query();
+  for (let x = Math.max(0, Math.floor(left / TILE)); x * TILE < left + width && x < 2 ** z; x++) {
+    for (let row = Math.max(0, Math.floor(top / TILE)); row * TILE < top + height && row < 2 ** z; row++) {
+      const y = 2 ** z - 1 - row, src = `/tiles/${z}/${x}/${y}.png?${suffix}`;
+      let image = images.get(src);
+      if (!image) {
+        image = document.createElement("img");
+        image.src = src;
+        image.draggable = false;
+        images.set(src, image);
+      }
+      image.style.left = `${x * TILE - left}px`;
+      image.style.top = `${row * TILE - top}px`;
+      view.appendChild(image);
+      seen.add(src);
+    }
+  }
+  for (const [src, image] of images) {
+    if (!seen.has(src)) { image.remove(); images.delete(src); }
+  }
+}
+
+function position(event) {
+  const size = TILE * 2 ** z, rect = view.getBoundingClientRect();
+  const fx = cx + (event.clientX - rect.left - view.clientWidth / 2) / size;
+  const fy = cy - (event.clientY - rect.top - view.clientHeight / 2) / size;
+  const [l0, l1] = info.launch, [a0, a1] = info.arrival;
+  return [l0 + fx * (l1 - l0), a0 + fy * (a1 - a0)];
+}
+
+view.addEventListener("wheel", event => {
+  event.preventDefault();
+  z = Math.min(info.max_level, Math.max(0, z + (event.deltaY < 0 ? 1 : -1)));
+  draw();
+});
+view.addEventListener("mousedown", start => {
+  let last = start;
+  const move = event => {
+    const size = TILE * 2 ** z;
+    cx -= (event.clientX - last.clientX) / size;
+    cy += (event.clientY - last.clientY) / size;
+    last = event;
+    draw();
+  };
+  window.addEventListener("mousemove", move);
+  window.addEventListener("mouseup", () => window.removeEventListener("mousemove", move), {once: true});
+});
+view.addEventListener("mousemove", event => {
+  const [launch, arrival] = position(event);
+  status.textContent = `level ${z}, launch ${date(launch)}, arrival ${date(arrival)}`;
+});
+for (const id of ["field", "vmin", "vmax"]) {
+  document.getElementById(id).addEventListener("change", draw);
+}
+
+fetch("/info").then(response => response.json()).then(data => {
+  info = data;
+  const select = document.getElementById("field");
+  for (const [name, unit] of Object.entries(info.units)) {
+    select.add(new Option(`${name} (${unit})`, name));
+  }
+  draw();
+});
+</script>
+</body>
+</html>
+"""
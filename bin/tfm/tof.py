@@ -0,0 +1,193 @@
+"""Porkchops parameterized by launch date and time of flight.
+
+Launch and arrival windows usually overlap, so a good share of the cells of a
+launch x arrival grid arrive before launching or after a vanishing time of
+flight. Sampling the times of flight instead restricts the Lambert problems to
+physically meaningful transfers, further bounded by the arrival window when
+given. The results can be resampled onto launch x arrival axes afterwards, so
+they can be drawn with :class:`tfm.porkchop.PorkchopPlotter`.
+
+"""
+from astropy import units as u
+from astropy.time import Time
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.porkchop import UNITS, Porkchop, sample_states, transfer_costs
+
+
+def tof_range(launch_span, arrival_span, num_values, min_tof=None, max_tof=None):
+    """Times of flight joining a launch window with an arrival window.
+
+    Parameters
+    ----------
+    launch_span, arrival_span : ~astropy.time.Time
+        Launch and arrival windows.
+    num_values : int
+        Number of times of flight.
+    min_tof, max_tof : ~astropy.units.Quantity
+        Optional bounds on the times of flight.
+
+    Returns
+    -------
+    ~astropy.units.Quantity
+        Evenly spaced and strictly positive times of flight, in days.
+
+    """
+    jd_launch, jd_arrival = launch_span.tdb.jd, arrival_span.tdb.jd
+    shortest = jd_arrival.min() - jd_launch.max()
+    longest = jd_arrival.max() - jd_launch.min()
+    if min_tof is not None:
+        shortest = max(shortest, min_tof.to_value(u.day))
+    if max_tof is not None:
+        longest = min(longest, max_tof.to_value(u.day))
+    if longest <= 0 or longest < shortest:
+        raise ValueError("No positive time of flight joins both windows")
+
+    # Zero times of flight are degenerate, start one step away instead
+    if shortest <= 0:
+        step = longest / num_values
+        return np.linspace(step, longest, num_values) << u.day
+    return np.linspace(shortest, longest, num_values) << u.day
+
+
+class TofPorkchop:
+    """Results of a launch date x time of flight porkchop.
+
+    Parameters
+    ----------
+    launch_span : ~astropy.time.Time
+        Launch axis of the grid.
+    tof_span : ~astropy.units.Quantity
+        Increasing times of flight of the grid.
+    grids : dict
+        Arrays with shape (len(launch_span), len(tof_span)) stored in the
+        units listed in :data:`tfm.porkchop.UNITS`, NaN for the cells left
+        unsolved.
+    solves : int
+        Number of Lambert problems solved.
+
+    """
+
+    def __init__(self, launch_span, tof_span, grids, solves):
+        self.launch_span = launch_span
+        self.tof_span = tof_span
+        self.grids = grids
+        self.solves = solves
+
+    def __getitem__(self, name):
+        return self.grids[name] << UNITS[name]
+
+    @property
+    def arrival_epochs(self):
+        """Arrival epoch of each one of the cells."""
+        return self.launch_span[:, np.newaxis] + self.tof_span[np.newaxis, :]
+
+    def minimum(self, name="c3_launch"):
+        """Lowest value of a grid with its launch and arrival dates."""
+        i, j = np.unravel_index(np.nanargmin(self.grids[name]), self.grids[name].shape)
+        return self[name][i, j], self.launch_span[i], self.launch_span[i] + self.tof_span[j]
+
+    def resample(self, arrival_span):
+        """Interpolate the grids onto launch x arrival axes.
+
+        Each launch row is linearly interpolated along the times of flight.
+        Cells outside the solved times of flight are filled with NaN.
+
+        Parameters
+        ----------
+        arrival_span : ~astropy.time.Time
+            Arrival axis of the resampled grids.
+
+        Returns
+        -------
+        ~tfm.porkchop.Porkchop
+            The resampled porkchop.
+
+        """
+        tof_axis = self.tof_span.to_value(u.day)
+        tof = arrival_span.tdb.jd[np.newaxis, :] - self.launch_span.tdb.jd[:, np.newaxis]
+
+        index = np.clip(np.searchsorted(tof_axis, tof, side="right") - 1, 0, len(tof_axis) - 2)
+        weight = (tof - tof_axis[index]) / (tof_axis[index + 1] - tof_axis[index])
+        inside = (tof >= tof_axis[0]) & (tof <= tof_axis[-1])
+        rows = np.arange(len(self.launch_span))[:, np.newaxis]
+
+        grids = {}
+        for name, grid in self.grids.items():
+            values = (1 - weight) * grid[rows, index] + weight * grid[rows, index + 1]
+            grids[name] = np.where(inside, values, np.nan)
+        return Porkchop(self.launch_span, arrival_span, grids)
+
+
+def solve_tof_porkchop(
+    departure_body,
+    target_body,
+    launch_span,
+    tof_span,
+    arrival_window=None,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+):
+    """Compute a porkchop over launch dates and times of flight.
+
+    Only the cells with a positive time of flight, and arriving within
+    ``arrival_window`` when given, are solved.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies.
+    launch_span : ~astropy.time.Time
+        Launch epochs of the grid.
+    tof_span : ~astropy.units.Quantity
+        Increasing times of flight of the grid, see :func:`tof_range`.
+    arrival_window : tuple
+        Optional earliest and latest ``~astropy.time.Time`` of arrival.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+
+    Returns
+    -------
+    TofPorkchop
+        The launch date x time of flight porkchop.
+
+    """
+    jd_launch = launch_span.tdb.jd
+    tof = tof_span.to_value(u.day)
+    jd_arrival = jd_launch[:, np.newaxis] + tof[np.newaxis, :]
+
+    valid = np.broadcast_to(tof > 0, jd_arrival.shape)
+    if arrival_window is not None:
+        earliest, latest = arrival_window
+        valid = valid & (jd_arrival >= earliest.tdb.jd) & (jd_arrival <= latest.tdb.jd)
+    rows, _ = np.nonzero(valid)
+
+    # Cells sharing an arrival epoch share the target state as well
+    epochs, inverse = np.unique(jd_arrival[valid], return_inverse=True)
+    r_departure, v_departure = sample_states(departure_body, launch_span)
+    r_target, v_target = sample_states(target_body, Time(epochs, format="jd", scale="tdb"))
+
+    costs = transfer_costs(
+        attractor.k.to_value(u.km**3 / u.s**2),
+        jd_launch[rows],
+        r_departure[rows],
+        v_departure[rows],
+        jd_arrival[valid],
+        r_target[inverse],
+        v_target[inverse],
+        prograde=prograde,
+        escape_velocity=escape_velocity.to_value(u.km / u.s),
+    )
+
+    grids = {}
+    for name, values in costs.items():
+        grids[name] = np.full(jd_arrival.shape, np.nan)
+        grids[name][valid] = values
+    return TofPorkchop(launch_span, tof_span, grids, solves=rows.size)
@@ -0,0 +1,272 @@
+"""Solar system figures drawn from several points of view.
+
+The orbit figures show the same scene projected onto the xy, xz and yz planes.
+Drawing each view with its own ``plot_solar_system`` resamples the planets,
+the transfer and the interstellar object once per view. Instead, every track
+is sampled once in 3-D by :class:`MultiViewPlotter`, and each view only
+projects the stored samples, so that all the panels can even be rendered in
+parallel.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from astropy import units as u
+from matplotlib import pyplot as plt
+from matplotlib.patches import Circle
+import numpy as np
+
+from poliastro.bodies import Earth, Jupiter, Mars, Mercury, Neptune, Saturn, Sun, Uranus, Venus
+from poliastro.ephem import Ephem
+from poliastro.frames import Planes
+from poliastro.plotting.util import BODY_COLORS, generate_label
+from poliastro.twobody import Orbit
+from poliastro.twobody.sampling import TrueAnomalyBounds
+
+
+VIEWS = {"xy": (0, 1), "xz": (0, 2), "yz": (1, 2)}
+"""Components of the positions shown in each view."""
+
+INNER_PLANETS = (Mercury, Venus, Earth, Mars)
+OUTER_PLANETS = (Jupiter, Saturn, Uranus, Neptune)
+
+
+class Track:
+    """Sampled trajectory drawn in every view.
+
+    Parameters
+    ----------
+    positions : numpy.ndarray
+        A (N, 3) array of positions in the length units of the plotter.
+    position : numpy.ndarray
+        Optional (3,) position marked along the trajectory.
+    label : str
+        Legend entry of the track.
+    color : str
+        Color of the track, picked by matplotlib when None.
+    linestyle : str
+        Style of the trajectory line.
+
+    """
+
+    def __init__(self, positions, position=None, label=None, color=None, linestyle="-"):
+        self.positions = positions
+        self.position = position
+        self.label = label
+        self.color = color
+        self.linestyle = linestyle
+
+    def draw(self, ax, view):
+        """Draw the projection of the track onto a view."""
+        i, j = VIEWS[view]
+        (line,) = ax.plot(
+            self.positions[:, i],
+            self.positions[:, j],
+            color=self.color,
+            linestyle=self.linestyle,
+            linewidth=1.5,
+        )
+        if self.position is not None:
+            ax.plot(
+                self.position[i],
+                self.position[j],
+                "o",
+                color=line.get_color(),
+                markersize=6,
+                label=self.label,
+            )
+        else:
+            line.set_label(self.label)
+        return line
+
+
+class MultiViewPlotter:
+    """Plotter sampling a scene once and projecting it onto several views.
+
+    Parameters
+    ----------
+    plane : ~poliastro.frames.Planes
+        Reference plane of the positions.
+    length_scale_units : ~astropy.units.Unit
+        Units of the axes.
+
+    """
+
+    def __init__(self, plane=Planes.EARTH_ECLIPTIC, length_scale_units=u.AU):
+        self.plane = plane
+        self.length_scale_units = length_scale_units
+        self.tracks = []
+
+    def plot_coordinates(self, coordinates, position=None, label=None, color=None, linestyle="-"):
+        """Add a track from some already sampled positions.
+
+        Parameters
+        ----------
+        coordinates : ~astropy.coordinates.CartesianRepresentation
+            Sampled positions of the track.
+        position : ~astropy.units.Quantity
+            Optional position marked along the track.
+
+        """
+        unit = self.length_scale_units
+        track = Track(
+            coordinates.xyz.to_value(unit).T,
+            None if position is None else position.to_value(unit).reshape(3),
+            label,
+            color,
+            linestyle,
+        )
+        self.tracks.append(track)
+        return track
+
+    def plot_arcs(self, positions, label=None, color=None, linestyle="-"):
+        """Add a family of arcs, such as those of :func:`tfm.kepler.transfer_arcs`.
+
+        The arcs are joined into a single track broken by NaN rows, so that a
+        hundred of them cost a single line per view and a single legend entry.
+
+        Parameters
+        ----------
+        positions : ~astropy.units.Quantity
+            A (M, N, 3) array with the N sampled positions of each of M arcs,
+            or a (N, 3) array for a single arc.
+
+        """
+        arcs = positions.to_value(self.length_scale_units).reshape(-1, *positions.shape[-2:])
+        breaks = np.full((len(arcs), 1, 3), np.nan)
+        track = Track(
+            np.concatenate([arcs, breaks], axis=1).reshape(-1, 3)[:-1], None, label, color, linestyle
+        )
+        self.tracks.append(track)
+        return track
+
+    def plot_ephem(self, ephem, epoch=None, label=None, color=None, linestyle="-"):
+        """Add the track of an ephemeris, marking its position at an epoch."""
+        position = None if epoch is None else ephem.rv(epoch)[0]
+        return self.plot_coordinates(ephem.sample(), position, label, color, linestyle)
+
+    def plot_body_orbit(self, body, epoch, label=None, color=None, num_values=150):
+        """Add a whole revolution of a planet, marking its position at an epoch.
+
+        The orbit is labelled with its epoch and drawn in the color of the
+        body, as poliastro's ``OrbitPlotter.plot_body_orbit`` does.
+
+        """
+        ephem = Ephem.from_body(body, epoch, plane=self.plane)
+        orbit = Orbit.from_ephem(Sun, ephem, epoch)
+        samples = orbit.to_ephem(strategy=TrueAnomalyBounds(num_values=num_values)).sample()
+        return self.plot_coordinates(
+            samples,
+            orbit.r,
+            label=generate_label(epoch, label or str(body)),
+            color=color or BODY_COLORS.get(body.name),
+        )
+
+    def plot_solar_system(self, epoch, outer=False):
+        """Add the orbits of the planets, as ``plot_solar_system`` does."""
+        bodies = INNER_PLANETS + (OUTER_PLANETS if outer else ())
+        for body in bodies:
+            self.plot_body_orbit(body, epoch)
+
+    def draw(self, ax, view, limits=None, legend=True):
+        """Draw all the tracks projected onto a view."""
+        i, j = VIEWS[view]
+        unit = self.length_scale_units.to_string()
+        ax.add_patch(Circle((0, 0), self._attractor_radius(), color=BODY_COLORS["Sun"], linewidth=0))
+        for track in self.tracks:
+            track.draw(ax, view)
+
+        ax.set_xlabel(f"${'xyz'[i]}$ ({unit})")
+        ax.set_ylabel(f"${'xyz'[j]}$ ({unit})")
+        ax.set_aspect(1)
+        if limits is not None:
+            xlim, ylim = limits
+            ax.set_xlim(xlim)
+            ax.set_ylim(ylim)
+        if legend:
+            ax.legend(
+                loc="upper left", bbox_to_anchor=(1.05, 1.015), title="Names and epochs", numpoints=1
+            )
+        return ax
+
+    def _attractor_radius(self):
+        # Scaled up with the closest approach to the Sun, as poliastro draws
+        # the attractor, so that it stays visible at the scale of the orbits
+        closest = min(
+            (np.nanmin(np.linalg.norm(track.positions, axis=1)) for track in self.tracks),
+            default=0.0,
+        )
+        return max(Sun.R.to_value(self.length_scale_units), 0.15 * closest)
+
+    def savefig(
+        self, path, views, figsize=None, dpi=None, legend_views=("xy",), workers=1, writer=None
+    ):
+        """Render and save one figure per view.
+
+        Parameters
+        ----------
+        path : str
+            Path of the figures, formatted with the name of each ``view``.
+        views : dict
+            The ``(xlim, ylim)`` limits of each view, or None to autoscale.
+        figsize : tuple
+            Size of the figures in inches, matplotlib's default when None.
+        dpi : int
+            Resolution of the figures, matplotlib's default when None.
+        legend_views : tuple
+            Views drawn with a legend.
+        workers : int
+            Number of processes rendering the figures, ``None`` using all the
+            available cores.
+        writer : ~tfm.writer.FigureWriter
+            Optional writer the drawn figures are handed off to, saving them
+            in the background instead of waiting for them.
+
+        Returns
+        -------
+        list
+            Paths of the saved figures.
+
+        """
+        if writer is not None:
+            paths = []
+            for view, limits in views.items():
+                figure, ax = plt.subplots(figsize=figsize, dpi=dpi)
+                self.draw(ax, view, limits, view in legend_views)
+                paths.append(path.format(view=view))
+                writer.savefig(paths[-1], figure, close=True, bbox_inches="tight")
+            return paths
+
+        panels = [
+            (self, view, limits, view in legend_views, path.format(view=view), figsize, dpi)
+            for view, limits in views.items()
+        ]
+        if workers == 1:
+            return [_render(*panel) for panel in panels]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_render, *zip(*panels)))
+
+    def show(self, views, figsize=None, legend_views=("xy",)):
+        """Draw and show one figure per view, one after the other.
+
+        Parameters
+        ----------
+        views : dict
+            The ``(xlim, ylim)`` limits of each view, or None to autoscale.
+        figsize : tuple
+            Size of the figures in inches, matplotlib's default when None.
+        legend_views : tuple
+            Views drawn with a legend.
+
+        """
+        for view, limits in views.items():
+            _, ax = plt.subplots(figsize=figsize)
+            self.draw(ax, view, limits, view in legend_views)
+            plt.show()
+
+
+def _render(plotter, view, limits, legend, path, figsize, dpi):
+    figure, ax = plt.subplots(figsize=figsize, dpi=dpi)
+    plotter.draw(ax, view, limits, legend)
+    figure.savefig(path, bbox_inches="tight")
+    plt.close(figure)
+    return path
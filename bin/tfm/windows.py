@@ -0,0 +1,303 @@
+"""Queries of the best transfer windows.
+
+Reading the global minimum of a porkchop only yields the best transfer, while
+mission design needs secondary windows as well. :func:`best_windows` returns
+the best few distinct transfers meeting some constraints, solving only the
+parts of the launch x arrival grid which may hold them:
+
+1. The corners of square tiles of the grid are solved first.
+2. Tiles violating the time of flight bounds are dropped, and so are the ones
+   whose estimated lower bound of a constrained cost exceeds its limit.
+3. The rest of tiles are solved in order of increasing lower bound of the
+   objective, stopping once no tile can improve the selected windows.
+
+Bounds are estimated from the tile corners, assuming costs do not dip below
+their corners by more than they vary along them. Costs are smooth away from
+the 180 degrees transfers, whose spikes only widen the bounds.
+
+"""
+from astropy import units as u
+import numpy as np
+
+from poliastro.bodies import Sun
+
+from tfm.optimize import OBJECTIVES
+from tfm.porkchop import UNITS, branch_costs, sample_states
+
+
+class TransferWindow:
+    """Transfer selected by a window query.
+
+    Parameters
+    ----------
+    launch, arrival : ~astropy.time.Time
+        Launch and arrival epochs.
+    costs : dict
+        Costs of the transfer in the units of :data:`tfm.porkchop.UNITS`.
+
+    """
+
+    def __init__(self, launch, arrival, costs):
+        self.launch = launch
+        self.arrival = arrival
+        self.costs = costs
+
+    def __getitem__(self, name):
+        return self.costs[name] << UNITS[name]
+
+    def __repr__(self):
+        return (
+            f"TransferWindow(launch={self.launch.iso}, arrival={self.arrival.iso}, "
+            f"c3_launch={self['c3_launch']:.2f}, tof={self['tof']:.1f}, avl={self['avl']:.2f})"
+        )
+
+
+class _Constraints:
+    """Upper bounds on the costs and bounds on the time of flight."""
+
+    def __init__(self, max_c3=None, min_tof=None, max_tof=None, max_avl=None):
+        self.limits = {}
+        if max_c3 is not None:
+            self.limits["c3_launch"] = max_c3.to_value(UNITS["c3_launch"])
+        if max_avl is not None:
+            self.limits["avl"] = max_avl.to_value(UNITS["avl"])
+        self.min_tof = 0.0 if min_tof is None else min_tof.to_value(u.day)
+        self.max_tof = np.inf if max_tof is None else max_tof.to_value(u.day)
+
+    def feasible(self, costs):
+        """Mask of the transfers meeting all the constraints."""
+        feasible = (costs["tof"] >= self.min_tof) & (costs["tof"] <= self.max_tof)
+        for name, limit in self.limits.items():
+            feasible &= costs[name] <= limit
+        return feasible
+
+
+def _lower_bound(corners):
+    """Estimated lower bound of a cost within each tile from its corners."""
+    lowest, highest = np.min(corners, axis=0), np.max(corners, axis=0)
+    # Tiles with unsolvable corners cannot be bounded
+    return np.where(np.isfinite(lowest) & np.isfinite(highest), 2 * lowest - highest, -np.inf)
+
+
+def select_windows(values, jd_launch, jd_arrival, count, separation):
+    """Pick the best cells lying apart from each other.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Objective of each candidate transfer, NaN for the unfeasible ones.
+    jd_launch, jd_arrival : numpy.ndarray
+        Launch and arrival Julian dates of each candidate.
+    count : int
+        Maximum number of cells to be picked.
+    separation : float
+        Minimum distance in days between the launch or the arrival dates of
+        any two picked cells.
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of the picked candidates, best first.
+
+    """
+    available = np.isfinite(values)
+    picked = []
+    while len(picked) < count and available.any():
+        index = np.flatnonzero(available)[np.argmin(values[available])]
+        picked.append(index)
+        available &= (np.abs(jd_launch - jd_launch[index]) >= separation) | (
+            np.abs(jd_arrival - jd_arrival[index]) >= separation
+        )
+    return np.array(picked, dtype=int)
+
+
+def porkchop_windows(
+    porkchop,
+    count=5,
+    objective="c3_launch",
+    separation=30 * u.day,
+    max_c3=None,
+    min_tof=None,
+    max_tof=None,
+    max_avl=None,
+):
+    """Best distinct transfer windows of an already solved porkchop.
+
+    See :func:`best_windows` for the parameters.
+
+    """
+    function, _ = OBJECTIVES[objective]
+    constraints = _Constraints(max_c3, min_tof, max_tof, max_avl)
+    with np.errstate(invalid="ignore"):
+        values = np.where(constraints.feasible(porkchop.grids), function(porkchop.grids), np.nan)
+
+    jd_launch, jd_arrival = np.meshgrid(
+        porkchop.launch_span.tdb.jd, porkchop.arrival_span.tdb.jd, indexing="ij"
+    )
+    picked = select_windows(
+        values.ravel(), jd_launch.ravel(), jd_arrival.ravel(), count, separation.to_value(u.day)
+    )
+    i, j = np.unravel_index(picked, values.shape)
+    return [
+        TransferWindow(
+            porkchop.launch_span[a],
+            porkchop.arrival_span[b],
+            {name: float(grid[a, b]) for name, grid in porkchop.grids.items()},
+        )
+        for a, b in zip(i, j)
+    ]
+
+
+def best_windows(
+    departure_body,
+    target_body,
+    launch_span,
+    arrival_span,
+    count=5,
+    objective="c3_launch",
+    separation=30 * u.day,
+    max_c3=None,
+    min_tof=None,
+    max_tof=None,
+    max_avl=None,
+    prograde=True,
+    escape_velocity=0 * u.km / u.s,
+    attractor=Sun,
+    tile_size=16,
+    tiles_per_batch=8,
+    counter=None,
+):
+    """Find the best distinct transfer windows without solving the whole grid.
+
+    Parameters
+    ----------
+    departure_body, target_body : ~poliastro.ephem.Ephem
+        Ephemerides of the departure and target bodies.
+    launch_span, arrival_span : ~astropy.time.Time
+        Launch and arrival epochs of the searched grid.
+    count : int
+        Maximum number of windows.
+    objective : str
+        One of :data:`tfm.optimize.OBJECTIVES`, ranking the windows.
+    separation : ~astropy.units.Quantity
+        Minimum distance between the launch or the arrival dates of any two
+        windows.
+    max_c3 : ~astropy.units.Quantity
+        Optional upper bound on the launch energy.
+    min_tof, max_tof : ~astropy.units.Quantity
+        Optional bounds on the time of flight.
+    max_avl : ~astropy.units.Quantity
+        Optional upper bound on the arrival velocity.
+    prograde : bool
+        Whether the transfers are prograde or retrograde.
+    escape_velocity : ~astropy.units.Quantity
+        Escape velocity from the departure body.
+    attractor : ~poliastro.bodies.Body
+        Main attractor of the transfers.
+    tile_size : int
+        Number of cells per side of the tiles bounded from their corners.
+    tiles_per_batch : int
+        Number of tiles solved together between two updates of the selected
+        windows.
+    counter : tfm.lambert.IterationCounter
+        Optional counter of the Lambert problems solved.
+
+    Returns
+    -------
+    list
+        The :class:`TransferWindow` found, best first.
+
+    """
+    function, _ = OBJECTIVES[objective]
+    constraints = _Constraints(max_c3, min_tof, max_tof, max_avl)
+    separation = separation.to_value(u.day)
+
+    jd_launch, jd_arrival = launch_span.tdb.jd, arrival_span.tdb.jd
+    r_departure, v_departure = sample_states(departure_body, launch_span)
+    r_target, v_target = sample_states(target_body, arrival_span)
+    k = attractor.k.to_value(u.km**3 / u.s**2)
+
+    # Costs of every solved cell, NaN for the pending ones
+    shape = (len(jd_launch), len(jd_arrival))
+    grids = {name: np.full(shape, np.nan) for name in UNITS}
+    solved = np.zeros(shape, dtype=bool)
+
+    def solve(i, j):
+        unsolved = ~solved[i, j]
+        i, j = i[unsolved], j[unsolved]
+        (costs,) = branch_costs(
+            k,
+            jd_launch[i],
+            r_departure[i],
+            v_departure[i],
+            jd_arrival[j],
+            r_target[j],
+            v_target[j],
+            directions=(prograde,),
+            escape_velocity=escape_velocity.to_value(u.km / u.s),
+            counter=counter,
+        )
+        for name, values in costs.items():
+            grids[name][i, j] = values
+        solved[i, j] = True
+
+    # Tile corners, shared by neighbouring tiles
+    rows = np.unique(np.append(np.arange(0, shape[0], tile_size), shape[0] - 1))
+    columns = np.unique(np.append(np.arange(0, shape[1], tile_size), shape[1] - 1))
+    corner_i, corner_j = np.meshgrid(rows, columns, indexing="ij")
+    solve(corner_i.ravel(), corner_j.ravel())
+
+    # Tiles span from a corner to the next one, both included
+    i0, j0 = np.meshgrid(rows[:-1], columns[:-1], indexing="ij")
+    i1, j1 = np.meshgrid(rows[1:], columns[1:], indexing="ij")
+    i0, j0, i1, j1 = i0.ravel(), j0.ravel(), i1.ravel(), j1.ravel()
+
+    def corners(name):
+        grid = grids[name]
+        return np.stack([grid[i0, j0], grid[i0, j1], grid[i1, j0], grid[i1, j1]])
+
+    # Time of flight bounds are exact, costs ones estimated
+    keep = (jd_arrival[j1] - jd_launch[i0] >= constraints.min_tof) & (
+        jd_arrival[j0] - jd_launch[i1] <= constraints.max_tof
+    )
+    for name, limit in constraints.limits.items():
+        keep &= _lower_bound(corners(name)) <= limit
+    bounds = _lower_bound(function({name: corners(name) for name in UNITS}))
+
+    def select():
+        with np.errstate(invalid="ignore"):
+            values = np.where(constraints.feasible(grids), function(grids), np.nan)
+        i, j = np.nonzero(np.isfinite(values))
+        picked = select_windows(values[i, j], jd_launch[i], jd_arrival[j], count, separation)
+        return i[picked], j[picked], values[i[picked], j[picked]]
+
+    # Solve the most promising tiles a few at a time, until the bounds of the
+    # rest exceed the worst selected window
+    pending = keep.copy()
+    while pending.any():
+        _, _, values = select()
+        threshold = values[-1] if len(values) == count else np.inf
+        candidates = np.flatnonzero(pending & (bounds <= threshold))
+        if candidates.size == 0:
+            break
+        batch = candidates[np.argsort(bounds[candidates], kind="stable")[:tiles_per_batch]]
+        pending[batch] = False
+
+        cells = [
+            np.meshgrid(np.arange(i0[t], i1[t] + 1), np.arange(j0[t], j1[t] + 1), indexing="ij")
+            for t in batch
+        ]
+        solve(
+            np.concatenate([i.ravel() for i, _ in cells]),
+            np.concatenate([j.ravel() for _, j in cells]),
+        )
+
+    i, j, _ = select()
+    return [
+        TransferWindow(
+            launch_span[a],
+            arrival_span[b],
+            {name: float(grid[a, b]) for name, grid in grids.items()},
+        )
+        for a, b in zip(i, j)
+    ]
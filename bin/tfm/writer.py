@@ -0,0 +1,151 @@
+"""Background writer of matplotlib figures.
+
+Rendering and encoding a large figure with ``savefig`` easily takes longer than
+drawing it, and the scripts used to wait for it before going on with the next
+computation. :class:`FigureWriter` instead pickles each finished figure, which
+is a fraction of the cost, and hands it off to a worker process which renders
+and saves it while the script keeps computing.
+
+Since figures are copied when handed off, the script is free to modify or
+close them right after. Failures of the worker are collected and reported by
+:meth:`FigureWriter.flush`.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+
+from matplotlib import pyplot as plt
+
+
+class FigureWriteError(RuntimeError):
+    """Raised when some of the figures handed to a writer could not be saved.
+
+    Parameters
+    ----------
+    failures : list
+        The ``(path, exception)`` pairs of the failed figures.
+
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        lines = [f"{path}: {type(error).__name__}: {error}" for path, error in failures]
+        super().__init__(f"Failed to save {len(failures)} figures\n" + "\n".join(lines))
+
+
+def _init_worker():
+    # Unpickled figures must never open windows in the workers
+    plt.switch_backend("Agg")
+
+
+def _write(data, path, kwargs):
+    figure = pickle.loads(data)
+    try:
+        figure.savefig(path, **kwargs)
+    finally:
+        plt.close(figure)
+    return path
+
+
+class FigureWriter:
+    """Queue of figures saved in the background.
+
+    Parameters
+    ----------
+    workers : int
+        Number of processes rendering the figures.
+
+    Examples
+    --------
+    >>> with FigureWriter() as writer:
+    ...     writer.savefig("fig/static/porkchop.png", bbox_inches="tight")
+    ...     # Keep computing while the figure is written
+
+    """
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self._pool = None
+        self._pending = []
+        self._failures = []
+
+    def savefig(self, path, figure=None, close=False, **kwargs):
+        """Hand a figure off to be saved, as ``plt.savefig`` would save it.
+
+        Parameters
+        ----------
+        path : str
+            Path of the saved figure.
+        figure : ~matplotlib.figure.Figure
+            Figure to be saved, the current one when None.
+        close : bool
+            Whether to close the figure once handed off.
+        **kwargs
+            Passed to :meth:`matplotlib.figure.Figure.savefig`.
+
+        """
+        figure = figure if figure is not None else plt.gcf()
+        try:
+            data = pickle.dumps(figure)
+        except Exception:
+            # Figures holding unpicklable artists are saved right away
+            self._save_now(figure, path, kwargs)
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            self._pending.append((path, self._pool.submit(_write, data, path, kwargs)))
+        if close:
+            plt.close(figure)
+
+    def _save_now(self, figure, path, kwargs):
+        try:
+            figure.savefig(path, **kwargs)
+        except Exception as error:
+            self._failures.append((path, error))
+
+    def flush(self):
+        """Wait for every pending figure to be saved.
+
+        Returns
+        -------
+        list
+            Paths of the figures saved since the last flush.
+
+        Raises
+        ------
+        FigureWriteError
+            If any of the figures could not be saved.
+
+        """
+        saved = []
+        for path, future in self._pending:
+            try:
+                saved.append(future.result())
+            except Exception as error:
+                self._failures.append((path, error))
+        self._pending = []
+
+        failures, self._failures = self._failures, []
+        if failures:
+            raise FigureWriteError(failures)
+        return saved
+
+    def close(self):
+        """Flush the pending figures and stop the workers."""
+        try:
+            return self.flush()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._pool is not None:
+            # Do not hide the original error behind the ones of the figures
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -2,7 +2,6 @@ from astropy import units as u
 from astropy.time import Time
 import matplotlib.pyplot as plt
 
-from poliastro.ephem import Ephem
 from poliastro.frames import Planes
 from poliastro.bodies import Sun, Earth
 from poliastro.plotting import OrbitPlotter
@@ -10,9 +9,11 @@ from poliastro.plotting.misc import plot_solar_system
 from poliastro.plotting.orbit.backends import Matplotlib2D
 from poliastro.util import time_range
 
+from tfm.ephem import load_ephem
 
 
-l2 = Ephem.from_csv("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
+
+l2 = load_ephem("bin/ephem/semb-l2.csv", plane=Planes.EARTH_ECLIPTIC)
 
 start = Time("2024-01-01", scale="tdb")
 end = Time("2025-01-01", scale="tdb")